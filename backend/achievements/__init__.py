@@ -0,0 +1,15 @@
+from flask import Blueprint
+
+achievements_bp = Blueprint('achievements', __name__)
+
+def create_achievement_routes(app, db):
+    """
+    Register achievement routes with the Flask application.
+    
+    Args:
+        app: Flask application instance
+        db: SQLAlchemy database instance
+    """
+    from .routes import register_achievement_routes
+    register_achievement_routes(achievements_bp, db)
+    app.register_blueprint(achievements_bp, url_prefix='/achievements')
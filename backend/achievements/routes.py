@@ -0,0 +1,19 @@
+from flask import jsonify
+from flask_login import login_required, current_user
+import logging
+
+from .utils import achievements
+
+logger = logging.getLogger(__name__)
+
+
+def register_achievement_routes(bp, db):
+    @bp.route('', methods=['GET'])
+    @login_required
+    def get_achievements():
+        """Every achievement with whether the current user has earned it"""
+        try:
+            return jsonify({'achievements': achievements.listing(current_user.id)})
+        except Exception as e:
+            logger.error(f"Error getting achievements: {str(e)}")
+            return jsonify({'error': 'Failed to get achievements'}), 500
@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Tuple
+
+
+@dataclass(frozen=True)
+class Rule:
+    """An achievement earned once a metric of an event reaches a threshold"""
+    code: str
+    event: str
+    metric: str
+    threshold: int
+    title: str
+    description: str
+
+    def to_dict(self) -> Dict:
+        return {
+            'code': self.code,
+            'type': self.event,
+            'title': self.title,
+            'description': self.description
+        }
+
+
+# Metrics reported with each event, all read from maintained counters:
+#   meditation: sessions, minutes, streak (MeditationStreak)
+#   activity:   completed, streak (ActivityStreak), categories (UserCategoryStats)
+#   journey:    milestones, journeys_completed, streak (UserJourneyProgress, calendar)
+#   mood:       days_logged, streak (mood calendar)
+RULES: Tuple[Rule, ...] = (
+    Rule('meditation_5', 'meditation', 'sessions', 5, "Meditation Beginner", "Completed 5 meditation sessions!"),
+    Rule('meditation_20', 'meditation', 'sessions', 20, "Regular Meditator", "Completed 20 meditation sessions!"),
+    Rule('meditation_50', 'meditation', 'sessions', 50, "Meditation Enthusiast", "Completed 50 meditation sessions!"),
+    Rule('meditation_100', 'meditation', 'sessions', 100, "Meditation Master", "Completed 100 meditation sessions!"),
+    Rule('meditation_streak_7', 'meditation', 'streak', 7, "Week of Zen", "Maintained a 7-day meditation streak!"),
+    Rule('meditation_minutes_600', 'meditation', 'minutes', 600, "Ten Hours of Calm", "Meditated for 10 hours in total!"),
+    Rule('activity_1', 'activity', 'completed', 1, "First Step", "Completed your first activity!"),
+    Rule('activity_10', 'activity', 'completed', 10, "Getting Active", "Completed 10 activities!"),
+    Rule('activity_50', 'activity', 'completed', 50, "Activity Pro", "Completed 50 activities!"),
+    Rule('activity_streak_7', 'activity', 'streak', 7, "Active Week", "Completed activities 7 days in a row!"),
+    Rule('activity_categories_3', 'activity', 'categories', 3, "Explorer", "Tried activities from 3 categories!"),
+    Rule('journey_milestone_1', 'journey', 'milestones', 1, "Journey Begun", "Completed your first journey milestone!"),
+    Rule('journey_completed_1', 'journey', 'journeys_completed', 1, "Journey Champion", "Completed a whole journey!"),
+    Rule('journey_streak_3', 'journey', 'streak', 3, "On the Path", "Completed milestones 3 days in a row!"),
+    Rule('mood_1', 'mood', 'days_logged', 1, "First Check-in", "Logged your mood for the first time!"),
+    Rule('mood_30', 'mood', 'days_logged', 30, "Self-Aware", "Logged your mood on 30 days!"),
+    Rule('mood_streak_7', 'mood', 'streak', 7, "Mood Tracker", "Logged your mood 7 days in a row!"),
+)
+
+RULES_BY_CODE: Dict[str, Rule] = {rule.code: rule for rule in RULES}
+
+RULES_BY_EVENT: Dict[str, Tuple[Rule, ...]] = {}
+for _rule in RULES:
+    RULES_BY_EVENT[_rule.event] = RULES_BY_EVENT.get(_rule.event, ()) + (_rule,)
+
+
+def earned(event: str, metrics: Mapping[str, int]) -> List[Rule]:
+    """
+    Rules of an event whose thresholds the metrics reach.
+
+    Args:
+        event (str): Event name, e.g. 'meditation'
+        metrics: The user's current metric values for that event
+
+    Returns:
+        List[Rule]: Satisfied rules, whether or not already awarded
+    """
+    return [rule for rule in RULES_BY_EVENT.get(event, ())
+            if (metrics.get(rule.metric) or 0) >= rule.threshold]
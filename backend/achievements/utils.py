@@ -0,0 +1,109 @@
+import logging
+from datetime import datetime
+from typing import Dict, List, Mapping, Set
+
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import Session
+
+from cache import LRUCache
+from counters import counters
+from extensions import db, socketio
+from models import UserAchievement
+
+from .rules import RULES_BY_CODE, earned
+
+logger = logging.getLogger(__name__)
+
+_PENDING = 'achievements_pending'
+
+
+class AchievementEngine:
+    """
+    Awards achievements from completion events.
+
+    Callers report an event with the user's current metrics, read from the
+    counters they maintain anyway, inside the transaction that recorded the
+    completion. Only the rules of that event are evaluated, and codes the
+    user already holds are skipped using a per-user cache of awarded codes,
+    so a completion normally costs no extra statement. New awards are
+    inserted idempotently through the (user_id, code) unique index and
+    pushed to the user's Socket.IO room once the transaction commits.
+    """
+
+    def __init__(self, max_users: int = 4096):
+        # user id -> set of awarded codes
+        self._awarded = LRUCache(max_entries=max_users, ttl=None)
+
+    def awarded(self, user_id: int) -> Set[str]:
+        """Codes the user has been awarded"""
+        codes = self._awarded.get(user_id)
+        if codes is None:
+            codes = {code for code, in db.session.query(UserAchievement.code).filter(
+                UserAchievement.user_id == user_id
+            )}
+            self._awarded.set(user_id, codes)
+        return codes
+
+    def record(self, user_id: int, event: str, metrics: Mapping[str, int]) -> List[Dict]:
+        """
+        Evaluate an event and award the achievements it unlocks.
+
+        Args:
+            user_id (int): User the event happened to
+            event (str): 'meditation', 'activity', 'journey' or 'mood'
+            metrics: The user's metrics after the event, see rules.RULES
+
+        Returns:
+            List[Dict]: Achievements newly awarded by this event
+        """
+        held = self.awarded(user_id)
+        new = []
+        for rule in earned(event, metrics):
+            if rule.code in held:
+                continue
+            if counters.claim(UserAchievement, user_id=user_id, code=rule.code):
+                new.append({**rule.to_dict(), 'awarded_at': datetime.utcnow().isoformat()})
+            else:
+                # Awarded by another worker since the codes were cached
+                self._awarded.update(user_id, lambda codes: codes.add(rule.code))
+
+        if new:
+            db.session.info.setdefault(_PENDING, []).append((user_id, new))
+        return new
+
+    def _committed(self, session) -> None:
+        """Cache and push the awards of a committed transaction"""
+        for user_id, new in session.info.pop(_PENDING, ()):
+            self._awarded.update(user_id, lambda codes: codes.update(award['code'] for award in new))
+            for award in new:
+                try:
+                    socketio.emit('achievement_unlocked', award, room=str(user_id))
+                except Exception as e:
+                    logger.error(f"Error pushing achievement: {str(e)}")
+
+    def listing(self, user_id: int) -> List[Dict]:
+        """Every achievement with whether and when the user earned it"""
+        awarded = dict(db.session.query(UserAchievement.code, UserAchievement.awarded_at).filter(
+            UserAchievement.user_id == user_id
+        ))
+        return [
+            {
+                **rule.to_dict(),
+                'earned': code in awarded,
+                'awarded_at': awarded[code].isoformat() if awarded.get(code) else None
+            }
+            for code, rule in RULES_BY_CODE.items()
+        ]
+
+
+achievements = AchievementEngine()
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _push_committed_awards(session):
+    achievements._committed(session)
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_awards(session):
+    session.info.pop(_PENDING, None)
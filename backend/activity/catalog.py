@@ -0,0 +1,115 @@
+import hashlib
+import json
+import random
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class ActivityCatalog:
+    """
+    In-memory copy of the activity catalog for recommendations.
+
+    Activities are kept serialized by id, and every category plus the
+    whole catalog has an id pool shuffled once at load time. Drawing
+    random candidates walks a pool from a random offset, so picking ``n``
+    activities costs O(n) instead of an ``ORDER BY random()`` sort of the
+    activity table.
+
+    Every category also has an id-ordered listing with an ETag computed
+    from its contents at load time, so listing endpoints answer
+    conditional requests without serializing anything. ``version`` counts
+    loads; ``invalidate`` marks the catalog for reloading on next use.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._lock = threading.RLock()
+        self._random = random.Random(seed)
+        self._activities: Dict[int, Dict[str, Any]] = {}
+        self._pools: Dict[Optional[str], List[int]] = {}
+        self._listings: Dict[Optional[str], Tuple[List[Dict[str, Any]], str]] = {}
+        self.version = 0
+        self.loaded = False
+
+    def load(self, activities: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replace the catalog contents.
+
+        Args:
+            activities: Serialized activities, see ``Activity.to_dict``
+        """
+        by_id = {activity['id']: activity for activity in activities}
+        pools: Dict[Optional[str], List[int]] = {None: list(by_id)}
+        for activity_id, activity in by_id.items():
+            pools.setdefault(activity['category'], []).append(activity_id)
+
+        listings = {
+            category: self._listing([by_id[activity_id] for activity_id in sorted(ids)])
+            for category, ids in pools.items()
+        }
+
+        with self._lock:
+            for pool in pools.values():
+                self._random.shuffle(pool)
+            self._activities = by_id
+            self._pools = pools
+            self._listings = listings
+            self.version += 1
+            self.loaded = True
+
+    def invalidate(self) -> None:
+        """Reload on next use; the current contents are served until then"""
+        self.loaded = False
+
+    def get(self, activity_id: int) -> Optional[Dict[str, Any]]:
+        """Get a serialized activity"""
+        return self._activities.get(activity_id)
+
+    def listing(self, category: Optional[str] = None) -> Tuple[List[Dict[str, Any]], str]:
+        """
+        Get the activities of a category, or of the whole catalog.
+
+        Returns:
+            Tuple[List[Dict[str, Any]], str]: Serialized activities ordered
+            by id, and the ETag of that list
+        """
+        listing = self._listings.get(category)
+        return listing if listing is not None else self._listing([])
+
+    def sample(self, count: int, category: Optional[str] = None,
+               exclude: Iterable[int] = ()) -> List[int]:
+        """
+        Draw up to ``count`` distinct random activity ids.
+
+        Args:
+            count (int): Number of ids
+            category (Optional[str]): Only draw from this category
+            exclude: Ids not to return; only the ones met while walking
+                the pool are checked
+
+        Returns:
+            List[int]: Activity ids in random order
+        """
+        excluded: Set[int] = set(exclude)
+        with self._lock:
+            pool = self._pools.get(category, [])
+            if not pool:
+                return []
+            start = self._random.randrange(len(pool))
+
+            picked = []
+            for offset in range(len(pool)):
+                activity_id = pool[(start + offset) % len(pool)]
+                if activity_id not in excluded:
+                    picked.append(activity_id)
+                    if len(picked) == count:
+                        break
+            return picked
+
+    @staticmethod
+    def _listing(activities: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], str]:
+        """Pair a list of activities with an ETag of its contents"""
+        digest = hashlib.sha1(json.dumps(activities, sort_keys=True, default=str).encode('utf-8'))
+        return activities, digest.hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._activities)
@@ -0,0 +1,207 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Users per dense block when accumulating item co-occurrences
+USER_BLOCK = 4096
+# Pulls similarities of items with few common raters towards zero
+SHRINKAGE = 5.0
+# How much a mood improvement counts next to the effectiveness rating
+MOOD_WEIGHT = 0.3
+
+
+def interaction_scores(ratings: np.ndarray, mood_deltas: np.ndarray) -> np.ndarray:
+    """
+    Combine effectiveness ratings (1-5) and mood deltas (-9..9) into one
+    score in [-1, 1]; missing values (NaN) count as neutral.
+    """
+    rating_part = np.nan_to_num((ratings - 3.0) / 2.0)
+    mood_part = np.nan_to_num(np.clip(mood_deltas / 4.0, -1.0, 1.0))
+    return (1.0 - MOOD_WEIGHT) * rating_part + MOOD_WEIGHT * mood_part
+
+
+def model_dtype(neighbors: int) -> np.dtype:
+    """Record layout of the saved model: one row per activity"""
+    return np.dtype([
+        ('activity_id', '<i8'),
+        ('neighbors', '<i8', (neighbors,)),
+        ('similarities', '<f4', (neighbors,)),
+    ])
+
+
+def train(user_ids: np.ndarray, activity_ids: np.ndarray, scores: np.ndarray,
+          neighbors: int = 20) -> np.ndarray:
+    """
+    Train an item-item collaborative filtering model.
+
+    Repeated interactions of a user with an activity are averaged, every
+    user's scores are centered on their mean (adjusted cosine), and the
+    item-item dot products and co-rater counts are accumulated over dense
+    blocks of users, so memory stays at O(items^2 + block * items).
+
+    Args:
+        user_ids, activity_ids, scores: One entry per interaction
+        neighbors (int): Most similar activities kept per activity
+
+    Returns:
+        np.ndarray: Model records sorted by activity_id, see model_dtype;
+        unused neighbor slots have id -1 and similarity 0
+    """
+    items, item_index = np.unique(activity_ids, return_inverse=True)
+    users, user_index = np.unique(user_ids, return_inverse=True)
+    n_items = len(items)
+
+    # Average repeated interactions per (user, item)
+    pair = user_index.astype(np.int64) * n_items + item_index
+    pairs, pair_index = np.unique(pair, return_inverse=True)
+    pair_scores = np.bincount(pair_index, weights=scores) / np.bincount(pair_index)
+    pair_users, pair_items = pairs // n_items, pairs % n_items
+
+    # Adjusted cosine: center each user's scores on their mean
+    user_means = np.bincount(pair_users, weights=pair_scores, minlength=len(users)) \
+        / np.maximum(np.bincount(pair_users, minlength=len(users)), 1)
+    centered = pair_scores - user_means[pair_users]
+
+    dots = np.zeros((n_items, n_items))
+    co_raters = np.zeros((n_items, n_items))
+    for block_start in range(0, len(users), USER_BLOCK):
+        in_block = (pair_users >= block_start) & (pair_users < block_start + USER_BLOCK)
+        rows = pair_users[in_block] - block_start
+        block = np.zeros((min(USER_BLOCK, len(users) - block_start), n_items))
+        block[rows, pair_items[in_block]] = centered[in_block]
+        rated = np.zeros_like(block)
+        rated[rows, pair_items[in_block]] = 1.0
+        dots += block.T @ block
+        co_raters += rated.T @ rated
+
+    norms = np.sqrt(np.diag(dots))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        similarity = dots / np.outer(norms, norms)
+    similarity = np.nan_to_num(similarity) * co_raters / (co_raters + SHRINKAGE)
+    np.fill_diagonal(similarity, 0.0)
+    similarity[similarity < 0] = 0.0
+
+    kept = min(neighbors, max(n_items - 1, 0))
+    model = np.zeros(n_items, dtype=model_dtype(neighbors))
+    model['activity_id'] = items
+    model['neighbors'] = -1
+    if kept:
+        top = np.argpartition(-similarity, kept - 1, axis=1)[:, :kept]
+        top_similarity = np.take_along_axis(similarity, top, axis=1)
+        order = np.argsort(-top_similarity, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_similarity = np.take_along_axis(top_similarity, order, axis=1)
+        positive = top_similarity > 0
+        model['neighbors'][:, :kept] = np.where(positive, items[top], -1)
+        model['similarities'][:, :kept] = np.where(positive, top_similarity, 0.0)
+    return model
+
+
+def save(model: np.ndarray, path: str) -> None:
+    """Write a model next to the old one, then swap it in atomically"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp.npy'
+    np.save(temporary, model)
+    os.replace(temporary, path)
+
+
+class CollaborativeModel:
+    """
+    Serves top-N activity recommendations from a trained model file.
+
+    The file is memory-mapped, so every worker shares one copy through the
+    page cache and loading costs no parsing. Workers notice a retrained
+    file by its modification time, checked at most every
+    ``reload_interval`` seconds.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: float = 60.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._model: Optional[np.ndarray] = None
+        self._mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app) -> None:
+        """
+        Configure the model from the application config.
+
+        Args:
+            app: Flask application instance
+        """
+        self.path = app.config.get('ACTIVITY_MODEL_PATH', self.path)
+        self.reload_interval = app.config.get('ACTIVITY_MODEL_RELOAD_INTERVAL', self.reload_interval)
+
+    def model(self) -> Optional[np.ndarray]:
+        """Get the mapped model, (re)loading it if the file changed"""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.reload_interval:
+            return self._model
+
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path) if self.path else None
+            except OSError:
+                mtime = None
+            if mtime is None:
+                self._model, self._mtime = None, None
+            elif mtime != self._mtime:
+                try:
+                    self._model = np.load(self.path, mmap_mode='r')
+                    self._mtime = mtime
+                    logger.info(f"Loaded activity model with {len(self._model)} activities")
+                except (OSError, ValueError) as e:
+                    logger.error(f"Error loading activity model: {str(e)}")
+                    self._model, self._mtime = None, None
+            return self._model
+
+    def recommend(self, seeds: Dict[int, float], limit: int,
+                  exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """
+        Score activities by their similarity to activities a user rated.
+
+        Args:
+            seeds: activity_id -> the user's score for it; only positively
+                scored activities are used
+            limit (int): Number of activities to return
+            exclude: Activity ids not to return, besides the seeds
+
+        Returns:
+            List[Tuple[int, float]]: ``(activity_id, score)``, best first;
+            empty without a model or known seeds
+        """
+        model = self.model()
+        if model is None or not len(model) or not seeds:
+            return []
+
+        liked = [(activity_id, score) for activity_id, score in seeds.items() if score > 0]
+        seed_ids = np.array([activity_id for activity_id, _ in liked], dtype=np.int64)
+        seed_scores = np.array([score for _, score in liked])
+        if not len(seed_ids):
+            return []
+
+        # Rows of the seeds in the activity_id-sorted model
+        rows = np.searchsorted(model['activity_id'], seed_ids)
+        known = (rows < len(model)) & (model['activity_id'][np.minimum(rows, len(model) - 1)] == seed_ids)
+        rows, seed_scores = rows[known], seed_scores[known]
+        if not len(rows):
+            return []
+
+        candidates = model['neighbors'][rows].ravel()
+        weights = (model['similarities'][rows] * seed_scores[:, None]).ravel()
+        ids, index = np.unique(candidates, return_inverse=True)
+        totals = np.bincount(index, weights=weights)
+
+        dropped = np.isin(ids, np.concatenate([seed_ids, np.fromiter(exclude, dtype=np.int64)]))
+        keep = (ids >= 0) & (totals > 0) & ~dropped
+        ids, totals = ids[keep], totals[keep]
+        order = np.argsort(-totals, kind='stable')[:limit]
+        return [(int(ids[i]), float(totals[i])) for i in order]
@@ -5,7 +5,7 @@ from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 import logging
 from sqlalchemy import func
-from .utils import ActivityManager, ActivityRecommender
+from .utils import ActivityManager, ActivityRecommender, get_activity, get_activity_catalog
 from models import Activity, UserActivity, ActivityStreak
 
 # Configure logging
@@ -56,19 +56,23 @@ def register_routes(bp: Blueprint, db: SQLAlchemy) -> None:
     def get_activities() -> Tuple[Dict[str, Any], int]:
         """
         Get list of all available activities, optionally filtered by category.
+        Served from the activity catalog; answers 304 when the client's
+        If-None-Match matches the listing's ETag.
         
         Returns:
             Tuple containing response data and status code
         """
         try:
-            category = request.args.get('category')
-            query = Activity.query
+            category = request.args.get('category') or None
+            activities, etag = get_activity_catalog().listing(category)
 
-            if category:
-                query = query.filter_by(category=category)
-
-            activities = query.all()
-            return jsonify([activity.to_dict() for activity in activities]), 200
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = jsonify(activities)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
             
         except Exception as e:
             logger.error(f"Error getting activities: {str(e)}")
@@ -214,10 +218,9 @@ def register_routes(bp: Blueprint, db: SQLAlchemy) -> None:
             # Format activity data
             activity_data = []
             for ua in activities.items:
-                activity = Activity.query.get(ua.activity_id)
                 activity_data.append({
                     'id': ua.id,
-                    'activity': activity.to_dict(),
+                    'activity': get_activity(ua.activity_id),
                     'started_at': ua.started_at.isoformat(),
                     'completed_at': ua.completed_at.isoformat() if ua.completed_at else None,
                     'mood_before': ua.mood_before,
@@ -2,14 +2,72 @@ from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime, timedelta, date
 from sqlalchemy import and_, or_, func, desc
 from sqlalchemy.orm.session import Session
-from models import Activity, UserActivity, ActivityStreak, User
+from models import Activity, UserActivity, ActivityStreak, ActivityCalendar, User, UserCategoryStats
+from extensions import db
+from counters import counters
+from cache import invalidate_on_commit
+from achievements.utils import achievements
+from .catalog import ActivityCatalog
+from .collaborative import CollaborativeModel, interaction_scores
 import logging
+import threading
+import numpy as np
 from collections import defaultdict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Activity catalog for recommendations, loaded on first use
+activity_catalog = ActivityCatalog()
+_activity_catalog_load_lock = threading.Lock()
+
+# Candidates drawn per recommendation slot, to allow for completed ones
+CANDIDATE_FACTOR = 3
+
+# Item-item model trained offline by train_activity_model.py
+collaborative_model = CollaborativeModel()
+# Latest rated completions used as the seeds of collaborative recommendations
+SEED_LIMIT = 50
+
+
+def get_activity_catalog() -> ActivityCatalog:
+    """
+    Get the activity catalog, loading it from the database on first use.
+
+    Returns:
+        ActivityCatalog: Catalog with shuffled id pools per category
+    """
+    if not activity_catalog.loaded:
+        with _activity_catalog_load_lock:
+            if not activity_catalog.loaded:
+                activity_catalog.load(activity.to_dict() for activity in Activity.query.all())
+                logger.info(f"Loaded activity catalog with {len(activity_catalog)} activities")
+    return activity_catalog
+
+
+def get_activity(activity_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get a serialized activity from the catalog.
+
+    A miss is checked against the database, since the activity may have
+    been added by another worker; the catalog is then reloaded.
+
+    Returns:
+        Optional[Dict[str, Any]]: Activity, or None if it does not exist
+    """
+    activity = get_activity_catalog().get(activity_id)
+    if activity is None:
+        row = Activity.query.get(activity_id)
+        if row is not None:
+            activity_catalog.invalidate()
+            activity = row.to_dict()
+    return activity
+
+
+# Reload the catalog after any activity is added, edited or removed
+invalidate_on_commit(Activity, lambda _: activity_catalog.invalidate())
+
 class ActivityRecommender:
     """Handles personalized activity recommendations based on user history and preferences."""
     
@@ -28,58 +86,65 @@ class ActivityRecommender:
             List of recommended activities with metadata
         """
         try:
-            # Get user's completed activities
-            completed_activities = UserActivity.query.filter(
+            catalog = get_activity_catalog()
+            collaborative = self._collaborative_candidates(user_id, limit * CANDIDATE_FACTOR)
+
+            # The two most effective categories, from the maintained totals
+            best_categories = UserCategoryStats.query.filter(
+                UserCategoryStats.user_id == user_id,
+                UserCategoryStats.rating_count > 0
+            ).order_by(
+                (UserCategoryStats.rating_sum * 1.0 / UserCategoryStats.rating_count).desc()
+            ).limit(2).all()
+
+            # Draw a few extra candidates per slot from the shuffled pools
+            drawn = []
+            for stats in best_categories:
+                drawn.append((stats.category, catalog.sample(
+                    (limit // 2) * CANDIDATE_FACTOR, category=stats.category,
+                    exclude=collaborative + [activity_id for _, ids in drawn for activity_id in ids]
+                )))
+            drawn.append((None, catalog.sample(
+                limit * CANDIDATE_FACTOR,
+                exclude=collaborative + [activity_id for _, ids in drawn for activity_id in ids]
+            )))
+
+            # Only the drawn candidates are checked against the user's history
+            candidate_ids = collaborative + [activity_id for _, ids in drawn for activity_id in ids]
+            completed = {activity_id for activity_id, in self.db.query(UserActivity.activity_id).filter(
                 UserActivity.user_id == user_id,
+                UserActivity.activity_id.in_(candidate_ids),
                 UserActivity.completed_at.isnot(None)
-            ).all()
-
-            # Calculate category effectiveness
-            category_effectiveness = defaultdict(list)
-            for ua in completed_activities:
-                activity = Activity.query.get(ua.activity_id)
-                if ua.effectiveness_rating:
-                    category_effectiveness[activity.category].append(
-                        ua.effectiveness_rating
-                    )
-
-            # Get average effectiveness per category
-            category_scores = {
-                cat: sum(ratings)/len(ratings)
-                for cat, ratings in category_effectiveness.items()
-            }
-
-            recommended = []
-            if category_scores:
-                # Prioritize effective categories
-                best_categories = sorted(
-                    category_scores.items(),
-                    key=lambda x: x[1],
-                    reverse=True
-                )[:2]
-
-                for category, score in best_categories:
-                    activities = Activity.query.filter(
-                        Activity.category == category,
-                        ~Activity.id.in_([ua.activity_id for ua in completed_activities])
-                    ).limit(limit//2).all()
-
-                    recommended.extend([{
-                        **activity.to_dict(),
-                        'recommendation_reason': f'Based on your success with {category} activities'
-                    } for activity in activities])
+            ).distinct()} if candidate_ids else set()
+
+            # Collaborative picks first, the heuristic fills what is left
+            recommended = [{
+                **catalog.get(activity_id),
+                'recommendation_reason': 'People who found your activities helpful also liked this'
+            } for activity_id in collaborative
+                if activity_id not in completed and catalog.get(activity_id)][:limit]
+
+            for category, ids in drawn[:-1]:
+                fresh = [activity_id for activity_id in ids if activity_id not in completed]
+                slots = min(limit // 2, limit - len(recommended))
+                recommended.extend({
+                    **catalog.get(activity_id),
+                    'recommendation_reason': f'Based on your success with {category} activities'
+                } for activity_id in fresh[:slots])
 
             # Fill remaining slots with new activities
             remaining = limit - len(recommended)
             if remaining > 0:
-                new_activities = Activity.query.filter(
-                    ~Activity.id.in_([r['id'] for r in recommended])
-                ).order_by(func.random()).limit(remaining).all()
-
-                recommended.extend([{
-                    **activity.to_dict(),
+                chosen = {activity['id'] for activity in recommended}
+                fill = [activity_id for activity_id in drawn[-1][1]
+                        if activity_id not in chosen and activity_id not in completed]
+                # Fall back to completed activities rather than leaving slots empty
+                fill += [activity_id for activity_id in drawn[-1][1]
+                         if activity_id not in chosen and activity_id in completed]
+                recommended.extend({
+                    **catalog.get(activity_id),
                     'recommendation_reason': 'Try something new!'
-                } for activity in new_activities])
+                } for activity_id in fill[:remaining])
 
             return recommended
 
@@ -87,6 +152,47 @@ class ActivityRecommender:
             logger.error(f"Error getting recommendations: {str(e)}")
             return []
 
+    def _collaborative_candidates(self, user_id: int, count: int) -> List[int]:
+        """
+        Get activities similar to the ones the user rated well, from the
+        collaborative model; empty until a model has been trained.
+
+        Args:
+            user_id: User's ID
+            count: Maximum number of candidates
+
+        Returns:
+            List of activity ids, best first
+        """
+        if collaborative_model.model() is None:
+            return []
+
+        history = self.db.query(
+            UserActivity.activity_id,
+            UserActivity.effectiveness_rating,
+            UserActivity.mood_before,
+            UserActivity.mood_after
+        ).filter(
+            UserActivity.user_id == user_id,
+            UserActivity.completed_at.isnot(None)
+        ).order_by(UserActivity.completed_at.desc()).limit(SEED_LIMIT).all()
+        if not history:
+            return []
+
+        scores = interaction_scores(
+            np.array([row.effectiveness_rating for row in history], dtype=np.float64),
+            np.array([row.mood_after - row.mood_before
+                      if row.mood_after is not None and row.mood_before is not None else None
+                      for row in history], dtype=np.float64)
+        )
+        # Average repeated completions of the same activity
+        totals = defaultdict(list)
+        for row, score in zip(history, scores):
+            totals[row.activity_id].append(float(score))
+        seeds = {activity_id: sum(values) / len(values) for activity_id, values in totals.items()}
+
+        return [activity_id for activity_id, _ in collaborative_model.recommend(seeds, count)]
+
 class ActivityManager:
     """Main interface for activity-related operations."""
     
@@ -148,8 +254,7 @@ class ActivityManager:
     def start_activity(self, user_id: int, activity_id: int, mood_before: float) -> Dict[str, Any]:
         """Start a new activity session."""
         try:
-            activity = Activity.query.get(activity_id)
-            if not activity:
+            if not get_activity(activity_id):
                 return {'error': 'Activity not found'}, 404
 
             user_activity = UserActivity(
@@ -158,8 +263,8 @@ class ActivityManager:
                 mood_before=mood_before,
                 started_at=datetime.utcnow()
             )
-            self.db.session.add(user_activity)
-            self.db.session.commit()
+            self.db.add(user_activity)
+            self.db.commit()
 
             return {
                 'success': True,
@@ -169,7 +274,7 @@ class ActivityManager:
 
         except Exception as e:
             logger.error(f"Error starting activity: {str(e)}")
-            self.db.session.rollback()
+            self.db.rollback()
             return {'error': str(e)}
 
     def complete_activity(
@@ -193,48 +298,84 @@ class ActivityManager:
             user_activity.mood_after = mood_after
             user_activity.effectiveness_rating = effectiveness_rating
 
+            # Maintain the per-category totals used by recommendations; an
+            # activity deleted since the session started has no category
+            activity = get_activity(user_activity.activity_id)
+            if activity is None:
+                logger.warning(f"Activity {user_activity.activity_id} of session {user_activity.id} "
+                               f"no longer exists; category stats not updated")
+            else:
+                category = activity['category']
+                improvement = mood_after - user_activity.mood_before \
+                    if mood_after is not None and user_activity.mood_before is not None else None
+                counters.claim(UserCategoryStats, user_id=user_id, category=category)
+                UserCategoryStats.query.filter_by(user_id=user_id, category=category).update({
+                    UserCategoryStats.completed_count: UserCategoryStats.completed_count + 1,
+                    UserCategoryStats.rating_sum: UserCategoryStats.rating_sum + (effectiveness_rating or 0),
+                    UserCategoryStats.rating_count: UserCategoryStats.rating_count + (1 if effectiveness_rating else 0),
+                    UserCategoryStats.improvement_sum: UserCategoryStats.improvement_sum + (improvement or 0),
+                    UserCategoryStats.improvement_count: UserCategoryStats.improvement_count + (1 if improvement is not None else 0),
+                    UserCategoryStats.improved_count: UserCategoryStats.improved_count + (1 if improvement is not None and improvement > 0 else 0)
+                }, synchronize_session=False)
+
             # Update streak
             streak = ActivityStreak.query.filter_by(user_id=user_id).first()
             if not streak:
-                streak = ActivityStreak(user_id=user_id)
-                self.db.session.add(streak)
+                streak = ActivityStreak(user_id=user_id, current_streak=0, longest_streak=0,
+                                        total_activities_completed=0)
+                self.db.add(streak)
+
+            ActivityCalendar.mark(user_id, 'activity', user_activity.completed_at.date())
+            streak.update_streak(user_activity.completed_at, ActivityCalendar.load(user_id, 'activity'))
 
-            streak.update_streak(user_activity.completed_at)
+            awarded = achievements.record(user_id, 'activity', {
+                'completed': streak.total_activities_completed,
+                'streak': streak.current_streak,
+                'categories': UserCategoryStats.query.filter_by(user_id=user_id).count()
+            })
             
-            self.db.session.commit()
+            self.db.commit()
 
             return {
                 'success': True,
                 'message': 'Activity completed successfully',
                 'streak': streak.current_streak,
-                'mood_improvement': mood_after - user_activity.mood_before
+                'mood_improvement': mood_after - user_activity.mood_before,
+                'achievements': awarded
             }
 
         except Exception as e:
             logger.error(f"Error completing activity: {str(e)}")
-            self.db.session.rollback()
+            self.db.rollback()
             return {'error': str(e)}
 
     def get_activity_stats(self, user_id: int) -> Dict[str, Any]:
-        """Get comprehensive activity statistics for a user."""
+        """
+        Get comprehensive activity statistics for a user.
+
+        Totals come from the per-category stats maintained by
+        complete_activity, read together with the streak; the recent trend
+        is a second, indexed read of the latest completions.
+        """
         try:
-            # Get user's streak info
-            streak = ActivityStreak.query.filter_by(user_id=user_id).first()
-            
-            # Get completed activities
-            completed_activities = UserActivity.query.filter(
-                UserActivity.user_id == user_id,
-                UserActivity.completed_at.isnot(None)
-            ).all()
+            rows = self.db.query(ActivityStreak, UserCategoryStats).select_from(User).outerjoin(
+                ActivityStreak, ActivityStreak.user_id == User.id
+            ).outerjoin(
+                UserCategoryStats, UserCategoryStats.user_id == User.id
+            ).filter(User.id == user_id).all()
+            streak = rows[0][0] if rows else None
+            categories = [category for _, category in rows if category is not None]
 
-            # Calculate mood improvements
-            mood_improvements = []
-            for activity in completed_activities:
-                if activity.mood_before and activity.mood_after:
-                    mood_improvements.append(activity.mood_after - activity.mood_before)
+            improvement_sum = sum(category.improvement_sum for category in categories)
+            improvement_count = sum(category.improvement_count for category in categories)
 
             # Get recent activity trend
-            recent_activities = UserActivity.query.filter(
+            recent_activities = self.db.query(
+                UserActivity.completed_at,
+                UserActivity.mood_before,
+                UserActivity.mood_after,
+                UserActivity.effectiveness_rating
+            ).filter(
                 UserActivity.user_id == user_id,
                 UserActivity.completed_at.isnot(None)
             ).order_by(
@@ -250,15 +391,19 @@ class ActivityManager:
 
             return {
                 'streak_stats': {
-                    'current_streak': streak.current_streak if streak else 0,
+                    # The stored streak is broken once a full day passes without activity
+                    'current_streak': streak.current_streak if streak and streak.last_activity_date
+                        and streak.last_activity_date >= datetime.utcnow().date() - timedelta(days=1) else 0,
                     'longest_streak': streak.longest_streak if streak else 0,
-                    'total_completed': len(completed_activities)
+                    'total_completed': sum(category.completed_count for category in categories)
                 },
                 'mood_stats': {
-                    'average_improvement': sum(mood_improvements) / len(mood_improvements) 
-                        if mood_improvements else 0,
-                    'activities_with_improvement': len([i for i in mood_improvements if i > 0])
+                    'average_improvement': improvement_sum / improvement_count
+                        if improvement_count else 0,
+                    'activities_with_improvement': sum(category.improved_count for category in categories)
                 },
+                'categories': [category.to_dict() for category in
+                               sorted(categories, key=lambda category: -category.completed_count)],
                 'recent_trend': activity_trend
             }
 
@@ -267,5 +412,6 @@ class ActivityManager:
             return {
                 'streak_stats': {'current_streak': 0, 'longest_streak': 0, 'total_completed': 0},
                 'mood_stats': {'average_improvement': 0, 'activities_with_improvement': 0},
+                'categories': [],
                 'recent_trend': []
             }
\ No newline at end of file
@@ -11,6 +11,11 @@ from flask_login import LoginManager
 from mood import create_mood_routes
 from models import ReminderLog, StressAssessment, init_auth,User
 from extensions import db, bcrypt, socketio, login_manager
+from counters import counters
+import backfills
+from trending import trending
+from activity.utils import collaborative_model
+from smile_journey.leaderboard import leaderboards
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 from flask_apscheduler import APScheduler
@@ -173,7 +178,23 @@ def create_app():
         SESSION_COOKIE_HTTPONLY=True,
         SESSION_COOKIE_SAMESITE='Lax',
         PERMANENT_SESSION_LIFETIME=timedelta(days=7),
-        JSON_SORT_KEYS=False
+        JSON_SORT_KEYS=False,
+        # Coalesce like/usage counter updates in memory and flush periodically
+        COUNTER_BUFFER_ENABLED=False,
+        COUNTER_FLUSH_INTERVAL=5.0,
+        # First pages of community feeds served from memory
+        FEED_CACHE_MAX_COMMUNITIES=256,
+        FEED_CACHE_PAGES=2,
+        FEED_CACHE_TTL=60.0,
+        # Trending ranking: score half-life and size of each top-K board
+        TRENDING_HALF_LIFE_HOURS=24.0,
+        TRENDING_TOP_K=100,
+        TRENDING_VIEW_FLUSH_INTERVAL=5.0,
+        # Item-item activity model written by train_activity_model.py
+        ACTIVITY_MODEL_PATH=os.path.join(basedir, 'activity_model.npy'),
+        ACTIVITY_MODEL_RELOAD_INTERVAL=60.0,
+        # Journey coin leaderboards are rebuilt from the database this often
+        LEADERBOARD_REFRESH_INTERVAL=300.0
     )
 
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -181,6 +202,10 @@ def create_app():
     db.init_app(app)
     bcrypt.init_app(app)
     socketio.init_app(app, cors_allowed_origins="http://localhost:3000")
+    counters.init_app(app)
+    trending.init_app(app)
+    collaborative_model.init_app(app)
+    leaderboards.init_app(app)
    
     login_manager = LoginManager()
     login_manager.init_app(app)
@@ -200,8 +225,17 @@ def create_app():
             'login_required': True
         }), 401
     with app.app_context():
-        from models import User, SessionLog, UserProblem, Profile, Message, Group, ChatRequest, GroupJoinRequest, Blog
+        from models import User, SessionLog, UserProblem, Profile, Message, Group, ChatRequest, GroupJoinRequest, ensure_schema
         db.create_all()
+        added_columns = ensure_schema()
+        # Aggregates are rebuilt by `flask backfill`, never at startup
+        pending_backfills = backfills.pending(added_columns)
+        if pending_backfills:
+            logger.warning(
+                f"Backfills not yet run: {', '.join(pending_backfills)}; "
+                f"run `flask --app app backfill all`"
+            )
+        backfills.register_backfill_commands(app)
         
         from auth.routes import register_routes as register_auth_routes
         from users.routes import register_routes as register_user_routes
@@ -209,9 +243,12 @@ def create_app():
         from bot.routes import register_routes as register_bot_routes
         from blogs.routes import blogs_bp
         from workshops.routes import workshops_bp
+        from stress_assesment.routes import stress_bp
         from friends.routes import register_profile_routes
         from community import create_community_routes
-        from activity.routes import register_routes
+        from search import create_search_routes
+        from achievements import create_achievement_routes
+        from activity.routes import register_routes as register_activity_routes
         from meditation.routes import register_meditation_routes
         from models import MeditationSession, MeditationPreset, MeditationStreak
         from smile_journey.routes import register_journey_routes
@@ -227,9 +264,11 @@ def create_app():
         chats_bp = Blueprint('chats', __name__)
         bot_bp = Blueprint('bot', __name__)
         profile_bp=Blueprint('friends',__name__)
-        register_routes(activities_bp, db)
+        register_activity_routes(activities_bp, db)
         create_mood_routes(app, db)
         create_community_routes(app, db)
+        create_search_routes(app, db)
+        create_achievement_routes(app, db)
         register_auth_routes(auth_bp, db, bcrypt, login_manager)
         register_user_routes(users_bp, db)
         register_chat_routes(chats_bp, db, socketio)
@@ -243,6 +282,7 @@ def create_app():
         app.register_blueprint(activities_bp)
         app.register_blueprint(workshops_bp, url_prefix='/workshops')
         app.register_blueprint(profile_bp, url_prefix='/profile')
+        app.register_blueprint(stress_bp, url_prefix='/stress')
     @app.errorhandler(404)
     def not_found_error(error):
         return jsonify({'error': 'Resource not found'}), 404
@@ -2,6 +2,7 @@ from flask import request, jsonify, session, redirect, url_for
 from flask_login import login_user, logout_user, login_required, current_user
 from models import User, SessionLog, UserProblem
 from .utils import hash_password, check_password
+from friends.utils import people_index
 from flask import make_response
 
 def register_routes(bp, db, bcrypt, login_manager):
@@ -29,6 +30,7 @@ def register_routes(bp, db, bcrypt, login_manager):
             )
             db.session.add(user)
             db.session.commit()
+            people_index.add(user.id, user.name)
          
             return jsonify({'message': 'User registered successfully'}), 201
             
@@ -73,6 +75,7 @@ def register_routes(bp, db, bcrypt, login_manager):
             )
             db.session.add(user)
             db.session.commit()
+            people_index.add(user.id, user.name)
         login_user(user)
         new_session = SessionLog(user_id=user.id)
         db.session.add(new_session)
@@ -110,6 +113,7 @@ def register_routes(bp, db, bcrypt, login_manager):
                 problem.smile_reason = data.get('smile_reason', problem.smile_reason)
 
             db.session.commit()
+            people_index.set_smile_reason(current_user.id, problem.smile_reason)
             response = jsonify({'message': 'Answer saved successfully'})
             response.headers.add('Access-Control-Allow-Origin', 'http://localhost:3000')  # Allow your frontend origin
             response.headers.add('Access-Control-Allow-Credentials', 'true')
@@ -135,6 +139,7 @@ def register_routes(bp, db, bcrypt, login_manager):
         if problem:
             problem.smile_reason = data['smile_reason']
             db.session.commit()
+            people_index.set_smile_reason(current_user.id, problem.smile_reason)
             return jsonify({'message': 'Smile reason updated successfully'})
         return jsonify({'message': 'Problem data not found'}), 404
 
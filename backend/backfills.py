@@ -0,0 +1,212 @@
+# backfills.py
+"""
+Jobs that rebuild maintained aggregates from their source tables.
+
+The aggregates are kept current by the write paths, so these only need to
+run after an upgrade adds one, or to repair drift:
+
+    flask --app app backfill                 # list backfills and their state
+    flask --app app backfill all             # run every pending backfill
+    flask --app app backfill mood-rollups --restart
+
+Per-user backfills replace the rows of one batch of users at a time and
+store a checkpoint in the same transaction, so an interrupted run resumes
+after the last committed batch and re-running a batch is harmless. Nothing
+here runs at application startup.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import click
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+# A step processes the batch after ``last_id`` and returns the number of
+# rows it wrote and the id to continue after, or None once done
+Step = Callable[[int, int], Tuple[int, Optional[int]]]
+
+
+@dataclass(frozen=True)
+class Backfill:
+    name: str
+    description: str
+    step: Step
+    # (table, column) pairs whose addition makes this backfill necessary
+    columns: Tuple[Tuple[str, str], ...] = ()
+
+
+def _next_ids(model, last_id: int, batch_size: int) -> List[int]:
+    """Next batch of primary keys of a model"""
+    return [row_id for row_id, in db.session.query(model.id).filter(
+        model.id > last_id
+    ).order_by(model.id).limit(batch_size)]
+
+
+def per_user(rebuild: Callable[[List[int]], int]) -> Step:
+    """Step that rebuilds the rows of the next batch of users"""
+    def step(last_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        from models import User
+
+        user_ids = _next_ids(User, last_id, batch_size)
+        if not user_ids:
+            return 0, None
+        return rebuild(user_ids), user_ids[-1]
+    return step
+
+
+def per_item(model, score: Callable[[List[int]], int]) -> Step:
+    """Step that processes the next batch of rows of a model"""
+    def step(last_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        row_ids = _next_ids(model, last_id, batch_size)
+        if not row_ids:
+            return 0, None
+        return score(row_ids), row_ids[-1]
+    return step
+
+
+def once(run: Callable[[], int]) -> Step:
+    """Step for a backfill that is a single idempotent statement"""
+    def step(last_id: int, batch_size: int) -> Tuple[int, Optional[int]]:
+        return run(), None
+    return step
+
+
+def _backfills() -> Dict[str, Backfill]:
+    """Registered backfills, in the order 'all' runs them"""
+    from models import (
+        ActivityCalendar, Blog, CommunityComment, CommunityPost, MeditationStreak,
+        MoodDailyRollup, MoodEntryEmotion, UserCategoryStats, Workshop
+    )
+    from trending import trending
+
+    post_comments = db.session.query(db.func.count(CommunityComment.id))\
+        .filter(CommunityComment.post_id == CommunityPost.id).scalar_subquery()
+
+    backfills = [
+        Backfill('blog-summaries', 'Excerpts and reading times of blogs',
+                 once(Blog.backfill_summaries), (('blog', 'excerpt'),)),
+        Backfill('blog-comment-counts', 'Comment counts of blogs',
+                 once(Blog.backfill_comment_counts), (('blog', 'comment_count'),)),
+        Backfill('workshop-ratings', 'Rating totals and histograms of workshops',
+                 once(Workshop.backfill_ratings), (('workshop', 'rating_count'), ('workshop', 'ratings_1'))),
+        Backfill('mood-rollups', 'Daily mood rollups',
+                 per_user(MoodDailyRollup.backfill)),
+        Backfill('mood-emotions', 'Emotion tag index of mood entries',
+                 per_user(MoodEntryEmotion.backfill)),
+        Backfill('category-stats', 'Per-category activity totals',
+                 per_user(UserCategoryStats.backfill), (('user_category_stats', 'improvement_count'),)),
+        # Reads mood days from the rollups
+        Backfill('activity-calendar', 'Daily activity calendars',
+                 per_user(ActivityCalendar.backfill)),
+        # Reads streaks from the calendars
+        Backfill('meditation-streaks', 'Meditation statistics and goal progress',
+                 per_user(MeditationStreak.backfill),
+                 (('meditation_streak', 'started_sessions'), ('meditation_streak', 'week_sessions'))),
+        Backfill('trending-blogs', 'Trending scores of blogs',
+                 per_item(Blog, lambda ids: trending.backfill(
+                     Blog, ids, like=Blog.likes, comment=Blog.comment_count))),
+        Backfill('trending-posts', 'Trending scores of community posts',
+                 per_item(CommunityPost, lambda ids: trending.backfill(
+                     CommunityPost, ids, like=CommunityPost.likes, comment=post_comments))),
+    ]
+    return {backfill.name: backfill for backfill in backfills}
+
+
+def run_backfill(name: str, batch_size: int = 500, restart: bool = False,
+                 echo: Callable[[str], None] = logger.info) -> int:
+    """
+    Run a backfill to completion, resuming from its checkpoint.
+
+    Args:
+        name (str): Registered backfill name
+        batch_size (int): Users or items per transaction
+        restart (bool): Start over even if completed or partly done
+        echo: Receives progress messages
+
+    Returns:
+        int: Number of rows written by this run
+    """
+    from models import BackfillProgress
+
+    backfill = _backfills()[name]
+    progress = BackfillProgress.query.filter_by(name=name).first()
+    if progress is None:
+        progress = BackfillProgress(name=name, last_id=0, processed=0)
+        db.session.add(progress)
+    elif progress.completed_at is not None and not restart:
+        echo(f"{name}: already completed at {progress.completed_at.isoformat()}")
+        return 0
+    if restart:
+        progress.last_id, progress.processed = 0, 0
+        progress.started_at, progress.completed_at = datetime.utcnow(), None
+    db.session.commit()
+
+    written = 0
+    try:
+        while True:
+            count, last_id = backfill.step(progress.last_id, batch_size)
+            written += count
+            progress.processed += count
+            if last_id is None:
+                progress.completed_at = datetime.utcnow()
+            else:
+                progress.last_id = last_id
+            # The checkpoint commits together with the batch it covers
+            db.session.commit()
+            if last_id is None:
+                echo(f"{name}: done, {written} rows written")
+                return written
+            echo(f"{name}: {written} rows written, up to id {last_id}")
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def pending(added_columns: Iterable[Tuple[str, str]] = ()) -> List[str]:
+    """
+    Names of backfills that never completed or whose columns were just
+    added. Only reads.
+    """
+    from models import BackfillProgress
+
+    added = set(added_columns)
+    completed = {name for name, in db.session.query(BackfillProgress.name).filter(
+        BackfillProgress.completed_at.isnot(None)
+    )}
+    return [name for name, backfill in _backfills().items()
+            if name not in completed or added & set(backfill.columns)]
+
+
+def register_backfill_commands(app) -> None:
+    """Add the ``flask backfill`` command to an application"""
+
+    @app.cli.command('backfill')
+    @click.argument('names', nargs=-1)
+    @click.option('--batch-size', default=500, show_default=True, help='Users or items per transaction')
+    @click.option('--restart', is_flag=True, help='Start over instead of resuming')
+    def backfill_command(names, batch_size, restart):
+        """Rebuild maintained aggregates; 'all' runs every backfill in order."""
+        from models import BackfillProgress
+
+        backfills = _backfills()
+        if not names:
+            states = {progress.name: progress for progress in BackfillProgress.query.all()}
+            for name, backfill in backfills.items():
+                progress = states.get(name)
+                state = 'not run' if progress is None else \
+                    'completed' if progress.completed_at else f'resumes after id {progress.last_id}'
+                click.echo(f"{name:22} {state:28} {backfill.description}")
+            return
+
+        if 'all' in names:
+            names = list(backfills)
+        unknown = [name for name in names if name not in backfills]
+        if unknown:
+            raise click.BadParameter(f"Unknown backfill: {', '.join(unknown)}", param_hint='NAMES')
+
+        for name in names:
+            run_backfill(name, batch_size, restart, echo=click.echo)
@@ -1,10 +1,15 @@
 import logging
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from models import Blog, Comment, User
+from models import Blog, BlogInteraction, Comment, User
 from extensions import db
+from counters import counters
+from cursors import decode_cursor, encode_cursor
+from trending import trending
+from search.utils import search_index
 from datetime import datetime
 from typing import Dict, Any, Tuple, Optional
+from sqlalchemy import and_, or_
 from sqlalchemy.exc import SQLAlchemyError
 
 # Configure logging
@@ -17,22 +22,71 @@ logger = logging.getLogger(__name__)
 # Initialize blueprint
 blogs_bp = Blueprint('blogs', __name__)
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
+def page_size() -> int:
+    """Read the limit query parameter, clamped to a sane page size."""
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def conditional_json(payload: Any):
+    """JSON response with an ETag; answers 304 if the client copy is current."""
+    response = jsonify(payload)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+def blog_list_query():
+    """List-view columns of blogs with the author name joined in."""
+    return db.session.query(
+        Blog.id, Blog.title, Blog.excerpt, Blog.reading_time, Blog.created_at,
+        Blog.user_id, Blog.likes, Blog.dislikes, User.name.label('author_name')
+    ).outerjoin(User, User.id == Blog.user_id)
+
+def serialize_blog_row(row) -> Dict[str, Any]:
+    """Convert a blog_list_query row to its JSON representation."""
+    return {
+        'blog_id': row.id,
+        'title': row.title,
+        'excerpt': row.excerpt,
+        'reading_time': row.reading_time or 1,
+        'created_at': row.created_at.isoformat(),
+        'created_by': row.user_id,
+        'author_name': row.author_name or 'Unknown',
+        'likes': row.likes or 0,
+        'dislikes': row.dislikes or 0
+    }
+
 @blogs_bp.route('/blogs', methods=['GET', 'POST'])
 @login_required
 def blog_operations() -> Tuple[Dict[str, Any], int]:
     """Handle blog listing and creation operations."""
     if request.method == 'GET':
         try:
-            # Get all blogs ordered by creation date
-            blogs = Blog.query.order_by(Blog.created_at.desc()).all()
-            blogs_list = []
-            for blog in blogs:
-                blog_dict = blog.to_dict()
-                # Add author name to each blog
-                author = User.query.get(blog.user_id)
-                blog_dict['author_name'] = author.name if author else 'Unknown'
-                blogs_list.append(blog_dict)
-            return jsonify(blogs_list), 200
+            # List view: newest first, authors joined, excerpt instead of content
+            query = blog_list_query()
+
+            cursor = request.args.get('cursor')
+            if cursor:
+                created_at, blog_id = decode_cursor(cursor)
+                query = query.filter(or_(
+                    Blog.created_at < created_at,
+                    and_(Blog.created_at == created_at, Blog.id < blog_id)
+                ))
+
+            limit = page_size()
+            rows = query.order_by(Blog.created_at.desc(), Blog.id.desc())\
+                .limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            return conditional_json({
+                'blogs': [serialize_blog_row(row) for row in rows],
+                'next_cursor': encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+            })
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             logger.error(f"Error retrieving blogs: {str(e)}")
             return jsonify({'error': 'Failed to retrieve blogs'}), 500
@@ -52,6 +106,9 @@ def blog_operations() -> Tuple[Dict[str, Any], int]:
         )
         
         db.session.add(new_blog)
+        db.session.flush()
+        search_index.index_blog(new_blog)
+        trending.record(Blog, new_blog.id, 'create')
         db.session.commit()
         
         return jsonify({
@@ -64,31 +121,99 @@ def blog_operations() -> Tuple[Dict[str, Any], int]:
         db.session.rollback()
         return jsonify({'error': 'Failed to create blog'}), 500
 
+@blogs_bp.route('/blogs/trending', methods=['GET'])
+@login_required
+def trending_blogs() -> Tuple[Dict[str, Any], int]:
+    """Get the currently trending blogs, served from the trending board."""
+    try:
+        limit = max(1, min(request.args.get('limit', 20, type=int), trending.top_k))
+        ranked = trending.top(Blog, limit=limit)
+        rows = {
+            row.id: row for row in blog_list_query()
+            .filter(Blog.id.in_([blog_id for blog_id, _ in ranked]))
+        } if ranked else {}
+
+        return jsonify({'blogs': [
+            {**serialize_blog_row(rows[blog_id]), 'trending_score': round(score, 4)}
+            for blog_id, score in ranked if blog_id in rows
+        ]})
+    except Exception as e:
+        logger.error(f"Error retrieving trending blogs: {str(e)}")
+        return jsonify({'error': 'Failed to retrieve trending blogs'}), 500
+
+@blogs_bp.route('/blogs/<int:blog_id>', methods=['GET'])
+@login_required
+def get_blog(blog_id: int) -> Tuple[Dict[str, Any], int]:
+    """Get a single blog with its full content."""
+    row = db.session.query(Blog, User.name)\
+        .outerjoin(User, User.id == Blog.user_id)\
+        .filter(Blog.id == blog_id).first()
+    if row is None:
+        return jsonify({'error': 'Blog not found'}), 404
+
+    try:
+        blog, author_name = row
+        payload = {**blog.to_dict(), 'author_name': author_name or 'Unknown'}
+
+        trending.record(Blog, blog.id, 'view')
+
+        return conditional_json(payload)
+    except Exception as e:
+        logger.error(f"Error retrieving blog: {str(e)}")
+        return jsonify({'error': 'Failed to retrieve blog'}), 500
+
 @blogs_bp.route('/blogs/<int:blog_id>/comments', methods=['GET', 'POST'])
 @login_required
 def handle_comments(blog_id: int) -> Tuple[Dict[str, Any], int]:
     """Handle blog comment operations."""
-    # Verify blog exists
-    blog = Blog.query.get_or_404(blog_id)
-    
     if request.method == 'GET':
         try:
-            # Get all comments for the blog
-            comments = Comment.query.filter_by(blog_id=blog_id)\
-                .order_by(Comment.created_at.desc()).all()
-            comments_list = []
-            for comment in comments:
-                comment_dict = comment.to_dict()
-                # Add author name to each comment
-                author = User.query.get(comment.user_id)
-                comment_dict['author_name'] = author.name if author else 'Unknown'
-                comments_list.append(comment_dict)
-            return jsonify(comments_list), 200
+            # Blog counters double as the existence check: one query
+            stats = db.session.query(
+                Blog.likes, Blog.dislikes, Blog.comment_count
+            ).filter(Blog.id == blog_id).first()
+            if stats is None:
+                return jsonify({'error': 'Blog not found'}), 404
+
+            # One page of comments with authors joined: a second query
+            query = db.session.query(Comment, User.name)\
+                .outerjoin(User, User.id == Comment.user_id)\
+                .filter(Comment.blog_id == blog_id)
+
+            cursor = request.args.get('cursor')
+            if cursor:
+                created_at, comment_id = decode_cursor(cursor)
+                query = query.filter(or_(
+                    Comment.created_at < created_at,
+                    and_(Comment.created_at == created_at, Comment.id < comment_id)
+                ))
+
+            limit = page_size()
+            rows = query.order_by(Comment.created_at.desc(), Comment.id.desc())\
+                .limit(limit + 1).all()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+
+            return conditional_json({
+                'comments': [
+                    {**comment.to_dict(), 'author_name': author_name or 'Unknown'}
+                    for comment, author_name in rows
+                ],
+                'next_cursor': encode_cursor(rows[-1][0].created_at, rows[-1][0].id) if has_more else None,
+                'comment_count': stats.comment_count or 0,
+                'likes': stats.likes or 0,
+                'dislikes': stats.dislikes or 0
+            })
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             logger.error(f"Error retrieving comments: {str(e)}")
             return jsonify({'error': 'Failed to retrieve comments'}), 500
             
     # POST request - Add new comment
+    if db.session.query(Blog.id).filter(Blog.id == blog_id).first() is None:
+        return jsonify({'error': 'Blog not found'}), 404
+
     try:
         data = request.get_json()
         if not data or 'content' not in data:
@@ -102,11 +227,13 @@ def handle_comments(blog_id: int) -> Tuple[Dict[str, Any], int]:
         )
         
         db.session.add(new_comment)
+        counters.increment(Blog.comment_count, blog_id)
+        trending.record(Blog, blog_id, 'comment')
         db.session.commit()
         
         return jsonify({
             'message': 'Comment added successfully',
-            'comment': new_comment.to_dict()
+            'comment': {**new_comment.to_dict(), 'author_name': current_user.name}
         }), 201
         
     except Exception as e:
@@ -114,6 +241,59 @@ def handle_comments(blog_id: int) -> Tuple[Dict[str, Any], int]:
         db.session.rollback()
         return jsonify({'error': 'Failed to add comment'}), 500
 
+@blogs_bp.route('/blogs/<int:blog_id>/<any(like, dislike):reaction>', methods=['POST'])
+@login_required
+def react_to_blog(blog_id: int, reaction: str) -> Tuple[Dict[str, Any], int]:
+    """Like or dislike a blog; each user keeps at most one reaction per blog."""
+    if db.session.query(Blog.id).filter_by(id=blog_id).scalar() is None:
+        return jsonify({'error': 'Blog not found'}), 404
+
+    try:
+        counter_columns = {'like': Blog.likes, 'dislike': Blog.dislikes}
+        liked = False
+
+        if counters.claim(BlogInteraction, blog_id=blog_id,
+                          user_id=current_user.id, interaction_type=reaction):
+            counters.increment(counter_columns[reaction], blog_id)
+            message = f'Blog {reaction}d successfully'
+            liked = reaction == 'like'
+        else:
+            # Flip an opposite reaction with a conditional update so two
+            # concurrent clicks cannot both move the counters
+            previous = 'dislike' if reaction == 'like' else 'like'
+            switched = BlogInteraction.query.filter_by(
+                blog_id=blog_id,
+                user_id=current_user.id,
+                interaction_type=previous
+            ).update({
+                'interaction_type': reaction,
+                'created_at': datetime.utcnow()
+            }, synchronize_session=False)
+
+            if switched:
+                counters.increment(counter_columns[previous], blog_id, -1)
+                counters.increment(counter_columns[reaction], blog_id)
+                message = f'Blog {reaction}d successfully'
+                liked = reaction == 'like'
+            else:
+                message = f'Blog already {reaction}d'
+
+        if liked:
+            trending.record(Blog, blog_id, 'like')
+
+        db.session.commit()
+
+        return jsonify({
+            'message': message,
+            'likes': counters.value(Blog.likes, blog_id),
+            'dislikes': counters.value(Blog.dislikes, blog_id)
+        }), 200
+
+    except Exception as e:
+        logger.error(f"Error recording blog {reaction}: {str(e)}")
+        db.session.rollback()
+        return jsonify({'error': f'Failed to {reaction} blog'}), 500
+
 @blogs_bp.errorhandler(404)
 def not_found_error(error: Exception) -> Tuple[Dict[str, str], int]:
     """Handle 404 errors."""
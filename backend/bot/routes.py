@@ -4,6 +4,7 @@ from flask_login import login_required, current_user
 from datetime import datetime
 import logging
 from models import Message
+from workshops.utils import record_bot_emotion
 from .utils import WebEmpatheticChatbot
 
 logger = logging.getLogger(__name__)
@@ -37,6 +38,8 @@ def register_routes(bp, db):
             
             # Generate response using chatbot instance
             response_data = chatbot.generate_response(user_message, current_user.id)
+            # Detected emotions feed workshop recommendations
+            record_bot_emotion(current_user.id, response_data.get('metadata', {}).get('emotion'))
             return jsonify(response_data)
 
         except Exception as e:
@@ -0,0 +1,163 @@
+# cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache with a size limit, TTL and hit-rate metrics.
+
+    Entries are evicted least-recently-used first once ``max_entries`` is
+    reached, and treated as missing once they are older than ``ttl`` seconds.
+    A ``ttl`` of ``None`` keeps entries until they are evicted or invalidated.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss
+            count (bool): Record the lookup as a hit or miss; callers that
+                look further inside the value record it with ``record``
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if count:
+                self.record(value is not _MISSING)
+            return default if value is _MISSING else value
+
+    def record(self, hit: bool) -> None:
+        """Record the outcome of a lookup in the hit-rate metrics"""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def update(self, key: Hashable, fn: Callable[[Any], None]) -> bool:
+        """
+        Modify a cached value in place (write-through).
+
+        Args:
+            key: Cache key
+            fn: Callable applied to the cached value while the lock is held
+
+        Returns:
+            bool: True if the key was cached and updated
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                return False
+            fn(value)
+            return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry"""
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get size and hit-rate metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable) -> Any:
+        """Return the live value for key or _MISSING; caller holds the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+
+        value, stored_at = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            self.expirations += 1
+            return _MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+
+def invalidate_on_commit(model: type, callback: Callable[[Hashable], None],
+                         key: Callable[[Any], Hashable] = lambda obj: None) -> None:
+    """
+    Call ``callback`` once the transaction writing instances of ``model``
+    has committed.
+
+    Waiting for the commit keeps a concurrent reload from caching rows of a
+    transaction that may still roll back. Bulk ``Query.update``/``delete``
+    statements bypass the session and are not seen.
+
+    Args:
+        model: Mapped class to watch
+        callback: Called once per distinct key of the written instances
+        key: Cache key of an instance, e.g. its owner's id; read while the
+            instance is flushed, since no SQL can be emitted after commit
+    """
+    info_key = ('invalidate_on_commit', model)
+
+    @event.listens_for(Session, 'before_flush')
+    def collect(session, flush_context, instances):
+        keys = {key(obj) for obj in (*session.new, *session.dirty, *session.deleted)
+                if isinstance(obj, model)}
+        if keys:
+            session.info.setdefault(info_key, set()).update(keys)
+
+    @event.listens_for(Session, 'after_commit')
+    def run(session):
+        for cache_key in session.info.pop(info_key, ()):
+            callback(cache_key)
+
+    @event.listens_for(Session, 'after_rollback')
+    def discard(session):
+        session.info.pop(info_key, None)
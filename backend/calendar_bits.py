@@ -0,0 +1,104 @@
+# calendar_bits.py
+from datetime import date
+from typing import Iterable, Optional, Tuple
+
+
+def month_index(day: date) -> int:
+    """Months since year 0, the key of a month of calendar bits"""
+    return day.year * 12 + day.month - 1
+
+
+def month_start(index: int) -> date:
+    """First day of a month_index"""
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def day_bit(day: date) -> int:
+    """Bit of a day within its month's bits"""
+    return 1 << (day.day - 1)
+
+
+class DayCalendar:
+    """
+    Set of days on which a user was active, as the bits of one integer.
+
+    Bit ``i`` stands for ``origin + i days``. Months are stored as 31-bit
+    integers (bit ``d - 1`` for day ``d``) and shifted into place on load,
+    so a calendar spanning years is a few hundred bits. Streaks and window
+    counts are shifts, masks and popcounts over that integer instead of
+    walks over sorted timestamps.
+    """
+
+    def __init__(self, origin: Optional[date] = None, bits: int = 0):
+        self.origin = origin or date.today()
+        self.bits = bits
+
+    @classmethod
+    def from_months(cls, months: Iterable[Tuple[int, int]]) -> 'DayCalendar':
+        """
+        Build a calendar from ``(month_index, days)`` pairs; pairs for the
+        same month, e.g. of different activity kinds, are combined.
+        """
+        months = [(index, days) for index, days in months if days]
+        if not months:
+            return cls()
+
+        origin = month_start(min(index for index, _ in months))
+        bits = 0
+        for index, days in months:
+            bits |= days << (month_start(index) - origin).days
+        return cls(origin, bits)
+
+    def _index(self, day: date) -> int:
+        return (day - self.origin).days
+
+    def add(self, day: date) -> None:
+        """Mark a day as active"""
+        index = self._index(day)
+        if index < 0:
+            self.bits <<= -index
+            self.origin, index = day, 0
+        self.bits |= 1 << index
+
+    def __contains__(self, day: date) -> bool:
+        index = self._index(day)
+        return index >= 0 and bool(self.bits >> index & 1)
+
+    def days_active(self, start: date, end: date) -> int:
+        """Number of active days from start to end, both inclusive"""
+        first, last = max(self._index(start), 0), self._index(end)
+        if last < first:
+            return 0
+        return (self.bits >> first & ((1 << (last - first + 1)) - 1)).bit_count()
+
+    def current_streak(self, today: date) -> int:
+        """
+        Consecutive active days ending today, or yesterday if today has no
+        activity yet, so a streak isn't broken before the day is over.
+        """
+        last = self._index(today)
+        if last >= 0 and not self.bits >> last & 1:
+            last -= 1
+        if last < 0 or not self.bits >> last & 1:
+            return 0
+
+        # The highest inactive day at or before `last` ends the streak
+        inactive = ~self.bits & ((1 << (last + 1)) - 1)
+        return last + 1 if not inactive else last - (inactive.bit_length() - 1)
+
+    def longest_streak(self) -> int:
+        """Longest run of consecutive active days"""
+        bits, longest = self.bits, 0
+        # Each step removes the last day of every run
+        while bits:
+            bits &= bits >> 1
+            longest += 1
+        return longest
+
+    def __or__(self, other: 'DayCalendar') -> 'DayCalendar':
+        origin = min(self.origin, other.origin)
+        return DayCalendar(origin, self.bits << (self.origin - origin).days
+                           | other.bits << (other.origin - origin).days)
+
+    def __len__(self) -> int:
+        return self.bits.bit_count()
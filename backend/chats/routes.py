@@ -1,15 +1,22 @@
 from flask import request, jsonify
 from flask_login import login_required, current_user
 from models import User, Message, Friendship
+from search.utils import search_index
 import nltk
 from datetime import datetime
-from sqlalchemy import or_, and_
+from sqlalchemy import and_, literal, or_, select, union_all
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Page size limits for chat history and message search
+DEFAULT_HISTORY_PAGE = 50
+MAX_HISTORY_PAGE = 200
+MAX_SEARCH_RESULTS = 50
+MAX_SEARCH_CONTEXT = 5
+
 # Download required NLTK data
 nltk.download('stopwords')
 nltk.download('punkt')
@@ -52,44 +59,211 @@ def register_routes(bp, db, socketio):
         ).first()
         return bool(friendship)
 
+    def between(user_id, friend_id):
+        """Filter matching the messages exchanged by two users"""
+        return or_(
+            and_(Message.sender_id == user_id,
+                 Message.receiver_id == friend_id),
+            and_(Message.sender_id == friend_id,
+                 Message.receiver_id == user_id)
+        )
+
+    def load_context(user_id, anchors, context):
+        """
+        Load the messages around several messages in one query.
+
+        Each side of each anchor is a separate ``LIMIT`` subquery on the
+        conversation index, combined with ``UNION ALL``.
+
+        Args:
+            user_id (int): ID of the caller
+            anchors (list): ``(message id, friend id)`` pairs
+            context (int): Number of messages on each side of an anchor
+
+        Returns:
+            dict: Anchor id -> ``(older, newer)`` message lists, oldest first
+        """
+        windows = []
+        for anchor_id, friend_id in anchors:
+            for side, order in ((Message.id < anchor_id, Message.id.desc()),
+                                (Message.id > anchor_id, Message.id.asc())):
+                windows.append(
+                    select(literal(anchor_id).label('anchor_id'), Message.id.label('message_id'))
+                    .where(between(user_id, friend_id), side)
+                    .order_by(order).limit(context)
+                    .subquery().select()
+                )
+
+        surrounding = {anchor_id: ([], []) for anchor_id, _ in anchors}
+        if not windows:
+            return surrounding
+        window = union_all(*windows).subquery()
+        for msg, anchor_id in db.session.query(Message, window.c.anchor_id)\
+                .join(window, window.c.message_id == Message.id).order_by(Message.id):
+            surrounding[anchor_id][msg.id > anchor_id].append(msg)
+        return surrounding
+
+    def load_conversation(user_id, friend_id, limit=None, before=None, after=None, around=None):
+        """
+        Load messages between two users in chronological order.
+
+        Message ids are the cursors: pass the first loaded id as ``before``
+        to page back, the last one as ``after`` to page forward, or any id
+        as ``around`` to open the conversation at that message. Without a
+        cursor or limit the whole conversation is returned.
+
+        Args:
+            user_id (int): ID of one participant
+            friend_id (int): ID of the other participant
+            limit (int): Maximum number of messages
+            before (int): Only load messages older than this id
+            after (int): Only load messages newer than this id
+            around (int): Center the page on this message id
+
+        Returns:
+            list: Message objects, oldest first
+        """
+        conversation = Message.query.filter(between(user_id, friend_id))
+
+        if around is not None:
+            older = conversation.filter(Message.id < around)\
+                .order_by(Message.id.desc()).limit(limit // 2).all()
+            newer = conversation.filter(Message.id >= around)\
+                .order_by(Message.id.asc()).limit(limit - limit // 2).all()
+            return older[::-1] + newer
+        if after is not None:
+            return conversation.filter(Message.id > after)\
+                .order_by(Message.id.asc()).limit(limit).all()
+        if before is not None:
+            conversation = conversation.filter(Message.id < before)
+        if before is not None or limit is not None:
+            return conversation.order_by(Message.id.desc()).limit(limit).all()[::-1]
+        return conversation.order_by(Message.timestamp.asc()).all()
+
+    def serialize_message(msg, names):
+        """Convert a message to JSON using preloaded sender names"""
+        return {
+            'id': msg.id,
+            'sender_id': msg.sender_id,
+            'sender_name': names.get(msg.sender_id, 'Unknown'),
+            'content': msg.content,
+            'timestamp': msg.timestamp.isoformat(),
+            'is_read': msg.is_read
+        }
+
     @bp.route('/friends/chat/<int:friend_id>', methods=['GET'])
     @login_required
     def get_chat_history(friend_id):
-        """Get chat history with a specific friend"""
+        """
+        Get chat history with a specific friend.
+
+        Supports the ``before``, ``after`` and ``around`` message id cursors
+        with ``limit``; without them the whole history is returned.
+        """
         try:
             if not is_friend(current_user.id, friend_id):
                 return jsonify({'error': 'Can only view messages from friends'}), 403
 
-            # Get messages between current user and friend
-            messages = Message.query.filter(
-                or_(
-                    and_(Message.sender_id == current_user.id,
-                         Message.receiver_id == friend_id),
-                    and_(Message.sender_id == friend_id,
-                         Message.receiver_id == current_user.id)
-                )
-            ).order_by(Message.timestamp.asc()).all()
+            cursors = {
+                name: request.args.get(name, type=int)
+                for name in ('before', 'after', 'around')
+            }
+            limit = request.args.get('limit', type=int)
+            if limit is None and any(value is not None for value in cursors.values()):
+                limit = DEFAULT_HISTORY_PAGE
+            if limit is not None:
+                limit = max(1, min(limit, MAX_HISTORY_PAGE))
+
+            messages = load_conversation(current_user.id, friend_id, limit=limit, **cursors)
 
             # Mark unread messages as read
-            unread_messages = [msg for msg in messages 
-                             if msg.receiver_id == current_user.id and not msg.is_read]
-            for msg in unread_messages:
-                msg.is_read = True
+            for msg in messages:
+                if msg.receiver_id == current_user.id and not msg.is_read:
+                    msg.is_read = True
+
+            friend = User.query.get(friend_id)
+            names = {
+                current_user.id: current_user.name,
+                friend_id: friend.name if friend else 'Unknown'
+            }
+            history = [serialize_message(msg, names) for msg in messages]
             db.session.commit()
 
-            return jsonify([{
-                'id': msg.id,
-                'sender_id': msg.sender_id,
-                'sender_name': User.query.get(msg.sender_id).name,
-                'content': msg.content,
-                'timestamp': msg.timestamp.isoformat(),
-                'is_read': msg.is_read
-            } for msg in messages])
+            return jsonify(history)
 
         except Exception as e:
             logger.error(f"Error getting chat history: {str(e)}")
+            db.session.rollback()
             return jsonify({'error': 'Failed to retrieve chat history'}), 500
 
+    @bp.route('/friends/search', methods=['GET'])
+    @login_required
+    def search_messages():
+        """
+        Search the caller's private conversations, newest hits first.
+
+        Each hit comes with up to ``context`` messages before and after it
+        in its conversation, loaded for all hits in one query. Pass
+        ``next_cursor`` back as ``before`` to get older hits.
+        """
+        try:
+            query = request.args.get('q', '').strip()
+            if not query:
+                return jsonify({'error': 'Search query is required'}), 400
+            if not search_index.available:
+                return jsonify({'error': 'Search is not available'}), 503
+
+            limit = max(1, min(request.args.get('limit', 20, type=int), MAX_SEARCH_RESULTS))
+            context = max(0, min(request.args.get('context', 2, type=int), MAX_SEARCH_CONTEXT))
+
+            hits = search_index.search_messages(
+                query,
+                user_id=current_user.id,
+                friend_id=request.args.get('friend_id', type=int),
+                limit=limit + 1,
+                before=request.args.get('before', type=int)
+            )
+            next_cursor = hits[limit - 1]['id'] if len(hits) > limit else None
+            hits = hits[:limit]
+
+            messages = {
+                msg.id: msg
+                for msg in Message.query.filter(Message.id.in_([hit['id'] for hit in hits]))
+            } if hits else {}
+            user_ids = {msg.sender_id for msg in messages.values()} | \
+                {msg.receiver_id for msg in messages.values()}
+            names = dict(
+                db.session.query(User.id, User.name).filter(User.id.in_(user_ids)).all()
+            ) if user_ids else {}
+
+            friends = {
+                msg.id: msg.receiver_id if msg.sender_id == current_user.id else msg.sender_id
+                for msg in messages.values()
+            }
+            surrounding = load_context(current_user.id, list(friends.items()), context) if context else {}
+
+            results = []
+            for hit in hits:
+                msg = messages.get(hit['id'])
+                if msg is None:
+                    continue
+
+                friend_id = friends[msg.id]
+                older, newer = surrounding.get(msg.id, ([], []))
+                results.append({
+                    'friend_id': friend_id,
+                    'friend_name': names.get(friend_id, 'Unknown'),
+                    'message': {**serialize_message(msg, names), 'snippet': hit['snippet']},
+                    'before': [serialize_message(m, names) for m in older],
+                    'after': [serialize_message(m, names) for m in newer]
+                })
+
+            return jsonify({'results': results, 'next_cursor': next_cursor})
+
+        except Exception as e:
+            logger.error(f"Error searching messages: {str(e)}")
+            return jsonify({'error': 'Failed to search messages'}), 500
+
     @bp.route('/friends/send/<int:friend_id>', methods=['POST'])
     @login_required
     def send_message(friend_id):
@@ -117,6 +291,8 @@ def register_routes(bp, db, socketio):
                 is_read=False
             )
             db.session.add(message)
+            db.session.flush()
+            search_index.index_message(message)
             db.session.commit()
 
             # Emit real-time notification
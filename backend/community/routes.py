@@ -1,12 +1,60 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
-from models import Community, CommunityPost, CommunityComment, UserProblem, User
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload
+from models import (
+    Community, CommunityPost, CommunityComment, CommunityPostLike, UserProblem, User,
+    community_members
+)
 from extensions import db
+from counters import counters
+from trending import trending
+from .utils import FeedCache
+from search.utils import search_index
 from datetime import datetime
+from itertools import islice
+import heapq
 
 community_bp = Blueprint('community', __name__)
 
 def register_community_routes(bp, db):
+    feed_cache = FeedCache.from_config(current_app.config)
+
+    def is_member(community_id, user_id):
+        """Check membership with a primary-key lookup instead of loading all members"""
+        return db.session.query(community_members.c.user_id).filter_by(
+            community_id=community_id,
+            user_id=user_id
+        ).first() is not None
+
+    def load_feed_page(community_id, page, per_page):
+        """Query one feed page with authors and comment counts in bulk"""
+        posts = CommunityPost.query.filter_by(community_id=community_id)\
+            .options(joinedload(CommunityPost.author))\
+            .order_by(CommunityPost.created_at.desc())\
+            .paginate(page=page, per_page=per_page)
+
+        post_ids = [post.id for post in posts.items]
+        comment_counts = dict(
+            db.session.query(CommunityComment.post_id, func.count(CommunityComment.id))
+            .filter(CommunityComment.post_id.in_(post_ids))
+            .group_by(CommunityComment.post_id)
+            .all()
+        ) if post_ids else {}
+
+        return {
+            'posts': [{
+                'id': post.id,
+                'content': post.content,
+                'author': post.author.name,
+                'likes': post.likes,
+                'created_at': post.created_at.isoformat(),
+                'comment_count': comment_counts.get(post.id, 0)
+            } for post in posts.items],
+            'total_pages': posts.pages,
+            'current_page': posts.page
+        }
+
     @bp.route('/communities', methods=['GET'])
     @login_required
     def get_communities():
@@ -49,33 +97,27 @@ def register_community_routes(bp, db):
     @login_required
     def community_posts(community_id):
         try:
-            community = Community.query.get_or_404(community_id)
-            
             # Verify user is a member
-            if current_user not in community.members:
+            if not is_member(community_id, current_user.id):
+                if not Community.query.get(community_id):
+                    return jsonify({'error': 'Community not found'}), 404
                 return jsonify({'error': 'You are not a member of this community'}), 403
 
             if request.method == 'GET':
                 # Get posts with pagination
                 page = request.args.get('page', 1, type=int)
                 per_page = request.args.get('per_page', 10, type=int)
-                
-                posts = CommunityPost.query.filter_by(community_id=community_id)\
-                    .order_by(CommunityPost.created_at.desc())\
-                    .paginate(page=page, per_page=per_page)
 
-                return jsonify({
-                    'posts': [{
-                        'id': post.id,
-                        'content': post.content,
-                        'author': post.author.name,
-                        'likes': post.likes,
-                        'created_at': post.created_at.isoformat(),
-                        'comment_count': len(post.comments)
-                    } for post in posts.items],
-                    'total_pages': posts.pages,
-                    'current_page': posts.page
-                })
+                if not feed_cache.is_cacheable(page, per_page):
+                    return jsonify(load_feed_page(community_id, page, per_page))
+
+                payload = feed_cache.get_page(community_id, page, per_page)
+                if payload is None:
+                    generation = feed_cache.generation(community_id)
+                    payload = load_feed_page(community_id, page, per_page)
+                    feed_cache.put_page(community_id, page, per_page, payload, generation)
+
+                return jsonify(payload)
 
             # Handle POST request
             data = request.get_json()
@@ -88,7 +130,11 @@ def register_community_routes(bp, db):
                 content=data['content']
             )
             db.session.add(new_post)
+            db.session.flush()
+            search_index.index_post(new_post)
+            trending.record(CommunityPost, new_post.id, 'create')
             db.session.commit()
+            feed_cache.invalidate_community(community_id)
 
             return jsonify({
                 'message': 'Post created successfully',
@@ -108,6 +154,9 @@ def register_community_routes(bp, db):
             if request.method == 'GET':
                 comments = CommunityComment.query.filter_by(post_id=post_id)\
                     .order_by(CommunityComment.created_at).all()
+
+                # Opening a post's thread counts as a view
+                trending.record(CommunityPost, post.id, 'view')
                     
                 return jsonify([{
                     'id': comment.id,
@@ -127,7 +176,9 @@ def register_community_routes(bp, db):
                 content=data['content']
             )
             db.session.add(new_comment)
+            trending.record(CommunityPost, post.id, 'comment')
             db.session.commit()
+            feed_cache.bump_post(post.community_id, post.id, 'comment_count')
 
             return jsonify({
                 'message': 'Comment added successfully',
@@ -143,18 +194,89 @@ def register_community_routes(bp, db):
     def like_post(post_id):
         try:
             post = CommunityPost.query.get_or_404(post_id)
-            post.likes += 1
+
+            # A user can like a post only once; repeated clicks are no-ops
+            if not counters.claim(CommunityPostLike, post_id=post.id, user_id=current_user.id):
+                return jsonify({
+                    'message': 'Post already liked',
+                    'new_like_count': counters.value(CommunityPost.likes, post.id)
+                })
+
+            counters.increment(CommunityPost.likes, post.id)
+            trending.record(CommunityPost, post.id, 'like')
             db.session.commit()
+
+            like_count = counters.value(CommunityPost.likes, post.id)
+            feed_cache.update_post(post.community_id, post.id, likes=like_count)
             
             return jsonify({
                 'message': 'Post liked successfully',
-                'new_like_count': post.likes
+                'new_like_count': like_count
             })
 
         except Exception as e:
             db.session.rollback()
             return jsonify({'error': str(e)}), 500
 
+    def trending_posts(community_ids, limit):
+        """Serialize the trending posts of some communities, merging their boards"""
+        boards = [trending.top(CommunityPost, community_id, limit) for community_id in community_ids]
+        ranked = list(islice(heapq.merge(*boards, key=lambda entry: entry[1], reverse=True), limit))
+        posts = {
+            post.id: post
+            for post in CommunityPost.query.options(joinedload(CommunityPost.author))
+            .filter(CommunityPost.id.in_([post_id for post_id, _ in ranked]))
+        } if ranked else {}
+
+        results = []
+        for post_id, score in ranked:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            results.append({
+                'id': post.id,
+                'community_id': post.community_id,
+                'content': post.content,
+                'author': post.author.name if post.author else 'Unknown',
+                'likes': post.likes or 0,
+                'created_at': post.created_at.isoformat(),
+                'trending_score': round(score, 4)
+            })
+        return results
+
+    @bp.route('/trending', methods=['GET'])
+    @login_required
+    def global_trending():
+        """Trending posts across the communities the user has joined"""
+        try:
+            limit = max(1, min(request.args.get('limit', 20, type=int), trending.top_k))
+            community_ids = {
+                community_id for community_id, in db.session.query(community_members.c.community_id)
+                .filter(community_members.c.user_id == current_user.id)
+            }
+            return jsonify({'posts': trending_posts(community_ids, limit)})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @bp.route('/communities/<int:community_id>/trending', methods=['GET'])
+    @login_required
+    def community_trending(community_id):
+        """Trending posts of one community"""
+        try:
+            if not is_member(community_id, current_user.id):
+                return jsonify({'error': 'You are not a member of this community'}), 403
+
+            limit = max(1, min(request.args.get('limit', 20, type=int), trending.top_k))
+            return jsonify({'posts': trending_posts([community_id], limit)})
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
+    @bp.route('/feed-cache/stats', methods=['GET'])
+    @login_required
+    def feed_cache_stats():
+        """Get hit-rate metrics of the community feed cache"""
+        return jsonify(feed_cache.stats())
+
     @bp.route('/communities/<int:community_id>/members', methods=['GET'])
     @login_required
     def get_community_members(community_id):
@@ -0,0 +1,109 @@
+from typing import Any, Dict, Optional
+from collections import defaultdict
+import logging
+import threading
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class FeedCache:
+    """
+    Cache of the first pages of each community feed.
+
+    Every member of a community sees the same first page until someone
+    posts, so pages are cached per community and kept current by the write
+    paths: new posts drop the community's pages, while likes and comments
+    patch the cached post in place.
+    """
+
+    def __init__(self, max_communities: int = 256, ttl: Optional[float] = 60.0,
+                 max_pages: int = 2):
+        self.max_pages = max_pages
+        # community_id -> {(page, per_page): payload}
+        self.cache = LRUCache(max_entries=max_communities, ttl=ttl)
+        # Bumped on every invalidation and write-through so a page read from
+        # the database before a new post, like or comment is not stored after it
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'FeedCache':
+        """Create a feed cache from the FEED_CACHE_* application settings"""
+        return cls(
+            max_communities=config.get('FEED_CACHE_MAX_COMMUNITIES', 256),
+            ttl=config.get('FEED_CACHE_TTL', 60.0),
+            max_pages=config.get('FEED_CACHE_PAGES', 2)
+        )
+
+    def is_cacheable(self, page: int, per_page: int) -> bool:
+        """Only the first few pages with a sane page size are cached"""
+        return 1 <= page <= self.max_pages and 1 <= per_page <= 50
+
+    def get_page(self, community_id: int, page: int, per_page: int) -> Optional[Dict[str, Any]]:
+        """Get a cached feed page or None"""
+        pages = self.cache.get(community_id, count=False)
+        payload = pages.get((page, per_page)) if pages else None
+        self.cache.record(payload is not None)
+        return payload
+
+    def generation(self, community_id: int) -> int:
+        """Get the invalidation generation to pass to put_page"""
+        with self._lock:
+            return self._generations[community_id]
+
+    def put_page(self, community_id: int, page: int, per_page: int,
+                 payload: Dict[str, Any], generation: int) -> None:
+        """Store a feed page unless the community changed since it was read"""
+        def add(pages):
+            pages[(page, per_page)] = payload
+
+        with self._lock:
+            if self._generations[community_id] != generation:
+                return
+            if not self.cache.update(community_id, add):
+                self.cache.set(community_id, {(page, per_page): payload})
+
+    def invalidate_community(self, community_id: int) -> None:
+        """Drop all cached pages of a community, e.g. after a new post"""
+        with self._lock:
+            self._generations[community_id] += 1
+            self.cache.invalidate(community_id)
+
+    def update_post(self, community_id: int, post_id: int, **fields) -> None:
+        """
+        Write a changed post field through to every cached page holding it.
+
+        Args:
+            community_id (int): Community the post belongs to
+            post_id (int): ID of the changed post
+            **fields: Post fields to overwrite, e.g. likes or comment_count
+        """
+        def apply(pages):
+            for payload in pages.values():
+                for post in payload['posts']:
+                    if post['id'] == post_id:
+                        post.update(fields)
+
+        self._write_through(community_id, apply)
+
+    def bump_post(self, community_id: int, post_id: int, field: str, delta: int = 1) -> None:
+        """Add delta to a numeric field of a cached post, e.g. comment_count"""
+        def apply(pages):
+            for payload in pages.values():
+                for post in payload['posts']:
+                    if post['id'] == post_id:
+                        post[field] = (post.get(field) or 0) + delta
+
+        self._write_through(community_id, apply)
+
+    def _write_through(self, community_id: int, apply) -> None:
+        """Patch the cached pages of a community and reject pages read before the change"""
+        with self._lock:
+            self._generations[community_id] += 1
+            self.cache.update(community_id, apply)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit-rate metrics for the feed cache"""
+        return {**self.cache.stats(), 'max_pages': self.max_pages}
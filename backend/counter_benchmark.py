@@ -0,0 +1,137 @@
+"""
+Contention benchmark for the counter service.
+
+Simulates many users clicking "like" on the same community post at once and
+compares the old read-modify-write update with atomic and buffered counters.
+
+Usage:
+    python counter_benchmark.py [--threads 16] [--clicks 200]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+from extensions import db
+from counters import CounterBuffer, CounterService
+from models import CommunityPost, CommunityPostLike
+
+
+def create_benchmark_app(db_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite:///' + db_path,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 60}}
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def reset_post(app):
+    with app.app_context():
+        CommunityPostLike.query.delete()
+        CommunityPost.query.delete()
+        post = CommunityPost(community_id=1, user_id=1, content='benchmark', likes=0)
+        db.session.add(post)
+        db.session.commit()
+        return post.id
+
+
+def run_clicks(app, threads, clicks, click):
+    """Run ``clicks`` calls of ``click`` on each of ``threads`` threads"""
+    errors = []
+
+    def worker(worker_id):
+        with app.app_context():
+            for n in range(clicks):
+                try:
+                    click(worker_id, n)
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append(str(e))
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - started, errors
+
+
+def report(name, clicks, expected, actual, elapsed, errors):
+    print(f"{name:<22} expected={expected:<7} actual={actual:<7} "
+          f"lost={expected - actual:<6} {clicks / elapsed:>10.0f} clicks/s  errors={len(errors)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--clicks', type=int, default=200)
+    args = parser.parse_args()
+
+    expected = args.threads * args.clicks
+    db_path = os.path.join(tempfile.mkdtemp(), 'counter_benchmark.db')
+    app = create_benchmark_app(db_path)
+
+    # Old behaviour: load the row, add one in Python, write it back
+    post_id = reset_post(app)
+
+    def read_modify_write(worker_id, n):
+        post = CommunityPost.query.get(post_id)
+        post.likes += 1
+        db.session.commit()
+
+    elapsed, errors = run_clicks(app, args.threads, args.clicks, read_modify_write)
+    with app.app_context():
+        report('read-modify-write', expected, expected, CommunityPost.query.get(post_id).likes, elapsed, errors)
+
+    # Atomic UPDATE ... SET likes = likes + 1
+    post_id = reset_post(app)
+    service = CounterService(db)
+
+    def atomic(worker_id, n):
+        service.increment(CommunityPost.likes, post_id)
+        db.session.commit()
+
+    elapsed, errors = run_clicks(app, args.threads, args.clicks, atomic)
+    with app.app_context():
+        report('atomic', expected, expected, service.value(CommunityPost.likes, post_id), elapsed, errors)
+
+    # Coalesced in memory, written by a single flush
+    post_id = reset_post(app)
+    service = CounterService(db)
+    service.buffer = CounterBuffer()
+
+    def buffered(worker_id, n):
+        service.increment(CommunityPost.likes, post_id)
+
+    elapsed, errors = run_clicks(app, args.threads, args.clicks, buffered)
+    with app.app_context():
+        started = time.perf_counter()
+        service.flush()
+        elapsed += time.perf_counter() - started
+        report('buffered', expected, expected, CommunityPost.query.get(post_id).likes, elapsed, errors)
+
+    # Idempotency: every thread repeatedly likes as the same user
+    post_id = reset_post(app)
+    service = CounterService(db)
+
+    def like_once(worker_id, n):
+        if service.claim(CommunityPostLike, post_id=post_id, user_id=1):
+            service.increment(CommunityPost.likes, post_id)
+        db.session.commit()
+
+    elapsed, errors = run_clicks(app, args.threads, args.clicks, like_once)
+    with app.app_context():
+        report('same user (claim)', expected, 1, service.value(CommunityPost.likes, post_id), elapsed, errors)
+
+
+if __name__ == '__main__':
+    main()
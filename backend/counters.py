@@ -0,0 +1,223 @@
+# counters.py
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+
+def run_periodically(app, interval: float, callback, name: str,
+                     stop: threading.Event) -> threading.Thread:
+    """
+    Call ``callback`` in an application context every ``interval`` seconds
+    on a daemon thread, until ``stop`` is set.
+    """
+    def run():
+        while not stop.wait(interval):
+            with app.app_context():
+                callback()
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+class CounterBuffer:
+    """
+    In-memory write-coalescing buffer for counter deltas.
+
+    Many clicks on the same row collapse into a single UPDATE per flush,
+    so the database write lock is taken once per interval instead of once
+    per request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deltas: Dict[Tuple[Any, str, int], int] = defaultdict(int)
+
+    @staticmethod
+    def _key(column, row_id: int) -> Tuple[Any, str, int]:
+        # Model attributes overload ==, so key on the model class and name
+        return column.class_, column.key, row_id
+
+    def add(self, column, row_id: int, delta: int) -> None:
+        """Queue a delta for a counter column of a single row"""
+        with self._lock:
+            self._deltas[self._key(column, row_id)] += delta
+
+    def pending(self, column, row_id: int) -> int:
+        """Get the not yet flushed delta for a counter"""
+        with self._lock:
+            return self._deltas.get(self._key(column, row_id), 0)
+
+    def drain(self) -> Dict[Tuple[Any, str, int], int]:
+        """Take all queued deltas, leaving the buffer empty"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(int)
+        return {key: delta for key, delta in deltas.items() if delta}
+
+    def restore(self, deltas: Dict[Tuple[Any, str, int], int]) -> None:
+        """Put deltas back after a failed flush so they are retried"""
+        with self._lock:
+            for key, delta in deltas.items():
+                self._deltas[key] += delta
+
+
+class CounterService:
+    """
+    Shared service for contention-free counters (likes, usage counts, tallies).
+
+    Increments are issued as a single atomic ``UPDATE ... SET col = col + n``
+    instead of a read-modify-write on a loaded model, so concurrent requests
+    can no longer overwrite each other's updates. When the write buffer is
+    enabled, deltas are coalesced in memory and flushed periodically.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.buffer: Optional[CounterBuffer] = None
+        self.flush_interval = 5.0
+        self._app = None
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        """
+        Configure the service from the application config.
+
+        Args:
+            app: Flask application instance
+        """
+        self._app = app
+        self.flush_interval = app.config.get('COUNTER_FLUSH_INTERVAL', 5.0)
+        if app.config.get('COUNTER_BUFFER_ENABLED', False):
+            self.buffer = CounterBuffer()
+            self._start_flusher()
+            atexit.register(self.shutdown)
+
+    def increment(self, column, row_id: int, delta: int = 1) -> None:
+        """
+        Atomically add ``delta`` to a counter column of one row.
+
+        The update joins the caller's transaction; it is committed together
+        with the rest of the request. With buffering enabled the delta is
+        queued and written by the next flush instead.
+
+        Args:
+            column: Model attribute of the counter, e.g. ``CommunityPost.likes``
+            row_id (int): Primary key of the row to update
+            delta (int): Amount to add, may be negative
+        """
+        if self.buffer is not None:
+            self.buffer.add(column, row_id, delta)
+            return
+        self._apply(column, row_id, delta)
+
+    def value(self, column, row_id: int) -> int:
+        """
+        Read the current value of a counter, including buffered deltas.
+
+        Args:
+            column: Model attribute of the counter
+            row_id (int): Primary key of the row
+
+        Returns:
+            int: Counter value as seen by the next flush
+        """
+        model = column.class_
+        stored = self.db.session.query(column).filter(model.id == row_id).scalar() or 0
+        if self.buffer is not None:
+            stored += self.buffer.pending(column, row_id)
+        return stored
+
+    def claim(self, model, **keys) -> bool:
+        """
+        Insert a per-user marker row exactly once.
+
+        Relies on a unique constraint over ``keys`` and uses the dialect's
+        ``ON CONFLICT DO NOTHING`` so the check and the insert are a single
+        statement. Used to make actions such as likes idempotent per user.
+
+        Args:
+            model: Marker model with a unique constraint over ``keys``
+            **keys: Column values of the marker row
+
+        Returns:
+            bool: True if the marker was inserted, False if it already existed
+        """
+        table = model.__table__
+        dialect = self.db.session.get_bind().dialect.name
+
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            try:
+                self.db.session.add(model(**keys))
+                self.db.session.flush()
+                return True
+            except IntegrityError:
+                self.db.session.rollback()
+                return False
+
+        stmt = insert(table).values(**keys).on_conflict_do_nothing()
+        return self.db.session.execute(stmt).rowcount == 1
+
+    def flush(self) -> int:
+        """
+        Write all buffered deltas in one transaction.
+
+        Returns:
+            int: Number of rows updated
+        """
+        if self.buffer is None:
+            return 0
+
+        deltas = self.buffer.drain()
+        if not deltas:
+            return 0
+
+        try:
+            for (model, name, row_id), delta in deltas.items():
+                self._apply(getattr(model, name), row_id, delta)
+            self.db.session.commit()
+            return len(deltas)
+        except Exception as e:
+            logger.error(f"Error flushing counters: {str(e)}")
+            self.db.session.rollback()
+            self.buffer.restore(deltas)
+            return 0
+
+    def shutdown(self) -> None:
+        """Stop the background flusher and write any remaining deltas"""
+        self._stop.set()
+        if self._app is not None and self.buffer is not None:
+            with self._app.app_context():
+                self.flush()
+
+    def _apply(self, column, row_id: int, delta: int) -> None:
+        """Issue the atomic UPDATE for one counter"""
+        model = column.class_
+        self.db.session.query(model).filter(model.id == row_id).update(
+            {column: func.coalesce(column, 0) + delta},
+            synchronize_session=False
+        )
+
+    def _start_flusher(self) -> None:
+        """Start the daemon thread that periodically flushes the buffer"""
+        if self._flusher is not None:
+            return
+
+        self._flusher = run_periodically(self._app, self.flush_interval, self.flush,
+                                         'counter-flusher', self._stop)
+
+
+counters = CounterService(db)
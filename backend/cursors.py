@@ -0,0 +1,44 @@
+# cursors.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, Tuple, Union
+
+
+def encode_cursor(key: Union[datetime, float], row_id: int) -> str:
+    """
+    Encode the (sort key, id) position of the last item of a page for
+    keyset pagination.
+
+    Args:
+        key: Sort key of the item, a timestamp or a score
+        row_id (int): ID of the item, breaking ties between equal keys
+
+    Returns:
+        str: Opaque URL-safe cursor
+    """
+    value = key.isoformat() if isinstance(key, datetime) else key
+    raw = json.dumps([value, row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: str, key_type: type = datetime) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor (str): Cursor from a previous page
+        key_type (type): Type of the sort key, ``datetime`` or ``float``
+
+    Returns:
+        Tuple[Any, int]: Sort key and id of the last item of the page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        key, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key = datetime.fromisoformat(key) if key_type is datetime else key_type(key)
+        return key, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
@@ -0,0 +1,169 @@
+# downsample.py
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+EPOCH = datetime(1970, 1, 1)
+MIN_POINTS = 3
+MAX_POINTS = 1000
+MODES = ('lttb', 'minmax')
+
+
+def parse_args(args: Mapping[str, Any]) -> Tuple[Optional[int], str]:
+    """
+    Read the ``points`` and ``mode`` query parameters of a history endpoint.
+
+    Args:
+        args: Request query parameters
+
+    Returns:
+        Tuple[Optional[int], str]: Target point count, None if not requested,
+        clamped to MIN_POINTS..MAX_POINTS, and the downsampling mode
+
+    Raises:
+        ValueError: If points is not an integer or mode is unknown
+    """
+    mode = args.get('mode', 'lttb')
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+
+    points = args.get('points')
+    if points is None:
+        return None, mode
+    try:
+        points = int(points)
+    except (TypeError, ValueError) as e:
+        raise ValueError('points must be an integer') from e
+    return max(MIN_POINTS, min(points, MAX_POINTS)), mode
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets selection of the points that best keep
+    the visual shape of a series.
+
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previously
+    selected point and the mean of the next bucket. The per-bucket area is
+    computed over the whole bucket at once.
+
+    Args:
+        x (np.ndarray): Ascending x values
+        y (np.ndarray): y values
+        threshold (int): Number of points to keep
+
+    Returns:
+        np.ndarray: Indices of the kept points, ascending
+    """
+    n = len(x)
+    if threshold >= n or threshold < MIN_POINTS:
+        return np.arange(n)
+
+    # threshold - 2 buckets over the points between the first and the last
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_start, next_end = (edges[bucket + 1], edges[bucket + 2]) \
+            if bucket + 2 < len(edges) else (n - 1, n)
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[previous] - mean_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (mean_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def bucket_stats(x: np.ndarray, y_min: np.ndarray, y_max: np.ndarray, y_sum: np.ndarray,
+                 counts: np.ndarray, buckets: int) -> Dict[str, np.ndarray]:
+    """
+    Combine points into equal-width time buckets with min, mean and max.
+
+    Points may already be aggregates (e.g. daily rollups), so each carries
+    its own min, max, sum and count; raw points use the value for all
+    three and a count of 1. Empty buckets are left out.
+
+    Args:
+        x (np.ndarray): Ascending x values
+        buckets (int): Number of buckets over the x range
+
+    Returns:
+        Dict[str, np.ndarray]: ``start`` (index of each bucket's first point),
+        ``min``, ``mean``, ``max`` and ``count`` per non-empty bucket
+    """
+    edges = np.linspace(x[0], x[-1], buckets + 1)
+    bucket_of = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, buckets - 1)
+    starts = np.flatnonzero(np.r_[True, np.diff(bucket_of) != 0])
+
+    bucket_counts = np.add.reduceat(counts, starts)
+    return {
+        'start': starts,
+        'min': np.minimum.reduceat(y_min, starts),
+        'mean': np.add.reduceat(y_sum, starts) / bucket_counts,
+        'max': np.maximum.reduceat(y_max, starts),
+        'count': bucket_counts
+    }
+
+
+def downsample(timestamps: Sequence[datetime], values: Sequence[float], points: int,
+               mode: str = 'lttb', minimums: Optional[Sequence[float]] = None,
+               maximums: Optional[Sequence[float]] = None,
+               counts: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+    """
+    Downsample a time series to at most ``points`` chart points.
+
+    Args:
+        timestamps: Ascending point times
+        values: Point values; the mean when points are aggregates
+        points (int): Target number of points
+        mode (str): 'lttb' keeps representative original points,
+            'minmax' returns min/mean/max per time bucket
+        minimums, maximums, counts: Per-point aggregates, for points that
+            summarize several readings
+
+    Returns:
+        List[Dict[str, Any]]: ``{'timestamp', 'value'}`` points for 'lttb',
+        ``{'timestamp', 'min', 'mean', 'max', 'count'}`` buckets for 'minmax'
+    """
+    if not timestamps:
+        return []
+
+    x = np.array([(timestamp - EPOCH).total_seconds() for timestamp in timestamps])
+    y = np.asarray(values, dtype=np.float64)
+
+    if mode == 'lttb':
+        return [
+            {'timestamp': timestamps[i].isoformat(), 'value': float(y[i])}
+            for i in lttb(x, y, points)
+        ]
+
+    counts = np.ones(len(y)) if counts is None else np.asarray(counts, dtype=np.float64)
+    stats = bucket_stats(
+        x,
+        y if minimums is None else np.asarray(minimums, dtype=np.float64),
+        y if maximums is None else np.asarray(maximums, dtype=np.float64),
+        y * counts,
+        counts,
+        points
+    )
+    return [
+        {
+            'timestamp': timestamps[start].isoformat(),
+            'min': float(minimum),
+            'mean': float(mean),
+            'max': float(maximum),
+            'count': int(count)
+        }
+        for start, minimum, mean, maximum, count in zip(
+            stats['start'], stats['min'], stats['mean'], stats['max'], stats['count']
+        )
+    ]
@@ -0,0 +1,194 @@
+import bisect
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Sorts after every character, so (prefix + _MAX_CHAR,) bounds a prefix range
+_MAX_CHAR = '\U0010ffff'
+
+
+def name_words(text: Optional[str]) -> List[str]:
+    """Split a name or query into case-folded words"""
+    return re.findall(r'\w+', (text or '').casefold())
+
+
+def reason_key(smile_reason: Optional[str]) -> Optional[str]:
+    """Normalize a smile reason so equal reasons compare equal"""
+    key = ' '.join((smile_reason or '').casefold().split())
+    return key or None
+
+
+class PeopleIndex:
+    """
+    In-memory prefix index over user names for people search.
+
+    Every word of a name is stored as a ``(word, user_id)`` pair in a sorted
+    list, so the names having a word that starts with a prefix form one
+    contiguous range found with two binary searches. A second sorted list per
+    smile reason serves searches limited to people sharing a reason.
+
+    The index is loaded once from the database and then kept current by the
+    register and profile update paths.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys: List[Tuple[str, int]] = []
+        self._by_reason: Dict[str, List[Tuple[str, int]]] = {}
+        self._names: Dict[int, str] = {}
+        self._reasons: Dict[int, str] = {}
+        self.loaded = False
+
+    def load(self, people: Iterable[Tuple[int, str, Optional[str]]]) -> None:
+        """
+        Replace the index contents.
+
+        Args:
+            people: ``(user_id, name, smile_reason)`` rows; only the first row
+                of a user is used
+        """
+        keys = []
+        by_reason = defaultdict(list)
+        names = {}
+        reasons = {}
+
+        for user_id, name, smile_reason in people:
+            if user_id in names:
+                continue
+            names[user_id] = name or ''
+            entries = [(word, user_id) for word in set(name_words(name))]
+            keys.extend(entries)
+            reason = reason_key(smile_reason)
+            if reason:
+                reasons[user_id] = reason
+                by_reason[reason].extend(entries)
+
+        keys.sort()
+        for entries in by_reason.values():
+            entries.sort()
+
+        with self._lock:
+            self._keys = keys
+            self._by_reason = dict(by_reason)
+            self._names = names
+            self._reasons = reasons
+            self.loaded = True
+
+    def add(self, user_id: int, name: str, smile_reason: Optional[str] = None) -> None:
+        """Add a user, or replace their entries if already indexed"""
+        with self._lock:
+            if user_id in self._names:
+                smile_reason = smile_reason or self._reasons.get(user_id)
+                self.remove(user_id)
+
+            self._names[user_id] = name or ''
+            reason = reason_key(smile_reason)
+            if reason:
+                self._reasons[user_id] = reason
+            self._insert(user_id, self._keys)
+            if reason:
+                self._insert(user_id, self._by_reason.setdefault(reason, []))
+
+    def set_smile_reason(self, user_id: int, smile_reason: Optional[str]) -> None:
+        """Move an indexed user to the list of their new smile reason"""
+        with self._lock:
+            if user_id not in self._names:
+                return
+
+            old = self._reasons.pop(user_id, None)
+            if old:
+                self._delete(user_id, self._by_reason.get(old, []))
+
+            reason = reason_key(smile_reason)
+            if reason:
+                self._reasons[user_id] = reason
+                self._insert(user_id, self._by_reason.setdefault(reason, []))
+
+    def remove(self, user_id: int) -> None:
+        """Drop a user from the index"""
+        with self._lock:
+            if user_id not in self._names:
+                return
+            self._delete(user_id, self._keys)
+            reason = self._reasons.pop(user_id, None)
+            if reason:
+                self._delete(user_id, self._by_reason.get(reason, []))
+            del self._names[user_id]
+
+    def smile_reason(self, user_id: int) -> Optional[str]:
+        """Get the normalized smile reason of an indexed user"""
+        return self._reasons.get(user_id)
+
+    def search(self, query: str, limit: int = 10, exclude: Iterable[int] = (),
+               smile_reason: Optional[str] = None) -> List[Tuple[int, str]]:
+        """
+        Find users whose name has a word starting with every query word.
+
+        Args:
+            query (str): Typed text, e.g. "ali" or "alice sm"
+            limit (int): Maximum number of results
+            exclude: User ids to leave out, e.g. the caller and their friends
+            smile_reason (Optional[str]): Only return users with this reason
+
+        Returns:
+            List[Tuple[int, str]]: ``(user_id, name)`` pairs ordered by the
+            matching word
+        """
+        words = name_words(query)
+        if not words:
+            return []
+
+        with self._lock:
+            if smile_reason is None:
+                keys = self._keys
+            else:
+                keys = self._by_reason.get(reason_key(smile_reason), [])
+
+            # Walk the narrowest range and check the other words per user
+            start, end = min(
+                (self._range(keys, word) for word in set(words)),
+                key=lambda bounds: bounds[1] - bounds[0]
+            )
+
+            results = []
+            seen = set(exclude)
+            for index in range(start, end):
+                user_id = keys[index][1]
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+
+                name = self._names[user_id]
+                if len(words) > 1 and not self._matches(name, words):
+                    continue
+                results.append((user_id, name))
+                if len(results) >= limit:
+                    break
+
+            return results
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    @staticmethod
+    def _range(keys: List[Tuple[str, int]], prefix: str) -> Tuple[int, int]:
+        """Bounds of the entries whose word starts with prefix"""
+        return (bisect.bisect_left(keys, (prefix,)),
+                bisect.bisect_left(keys, (prefix + _MAX_CHAR,)))
+
+    @staticmethod
+    def _matches(name: str, words: List[str]) -> bool:
+        """Check that every query word prefixes some word of the name"""
+        candidates = name_words(name)
+        return all(any(word.startswith(query) for word in candidates) for query in words)
+
+    def _insert(self, user_id: int, keys: List[Tuple[str, int]]) -> None:
+        for word in set(name_words(self._names[user_id])):
+            bisect.insort(keys, (word, user_id))
+
+    def _delete(self, user_id: int, keys: List[Tuple[str, int]]) -> None:
+        for word in set(name_words(self._names[user_id])):
+            index = bisect.bisect_left(keys, (word, user_id))
+            if index < len(keys) and keys[index] == (word, user_id):
+                del keys[index]
@@ -4,12 +4,15 @@ from datetime import datetime
 from typing import Dict, List, Optional
 from models import User, UserProblem, Profile, Friendship, Blog, Notification
 from extensions import db, socketio
+from .utils import get_people_index, get_friend_ids
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_PEOPLE_RESULTS = 20
+
 def register_profile_routes(users_bp):
     """
     Register all profile and friendship related routes.
@@ -62,6 +65,49 @@ def register_profile_routes(users_bp):
             logger.error(f"Error in get_user_profile: {str(e)}")
             return jsonify({'error': str(e)}), 500
 
+    @users_bp.route('/people/search', methods=['GET'])
+    @login_required
+    def search_people():
+        """
+        Autocomplete people by name for friend discovery.
+
+        Query parameters:
+            q: Typed name prefix, e.g. "ali" or "alice sm"
+            limit: Maximum number of results
+            same_reason: "true" to only suggest people sharing the caller's
+                smile reason
+
+        Returns:
+            JSON list of matching users who are not yet friends
+        """
+        try:
+            query = request.args.get('q', '').strip()
+            if not query:
+                return jsonify([])
+
+            limit = max(1, min(request.args.get('limit', 10, type=int), MAX_PEOPLE_RESULTS))
+            index = get_people_index()
+
+            smile_reason = None
+            if request.args.get('same_reason', 'false').lower() == 'true':
+                smile_reason = index.smile_reason(current_user.id)
+                if smile_reason is None:
+                    return jsonify([])
+
+            exclude = get_friend_ids(current_user.id)
+            exclude.add(current_user.id)
+
+            return jsonify([
+                {'id': user_id, 'name': name}
+                for user_id, name in index.search(
+                    query, limit=limit, exclude=exclude, smile_reason=smile_reason
+                )
+            ])
+
+        except Exception as e:
+            logger.error(f"Error in search_people: {str(e)}")
+            return jsonify({'error': 'Failed to search people'}), 500
+
     @users_bp.route('/send-friend-request/<int:user_id>', methods=['POST'])
     @login_required
     def send_friend_request(user_id: int):
@@ -1,14 +1,59 @@
 from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_, func
-from models import Message, User, Friendship, FriendRequest
+from models import Message, User, Friendship, FriendRequest, UserProblem
 from extensions import db
+from .people_index import PeopleIndex
 import logging
+import threading
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Name prefix index for people search, loaded on first use
+people_index = PeopleIndex()
+_people_index_load_lock = threading.Lock()
+
+
+def get_people_index() -> PeopleIndex:
+    """
+    Get the people index, loading it from the database on first use.
+
+    Returns:
+        PeopleIndex: Index kept current by register and profile updates
+    """
+    if not people_index.loaded:
+        with _people_index_load_lock:
+            if not people_index.loaded:
+                rows = db.session.query(User.id, User.name, UserProblem.smile_reason)\
+                    .outerjoin(UserProblem, UserProblem.user_id == User.id)\
+                    .order_by(User.id, UserProblem.id)
+                people_index.load(rows.yield_per(10000))
+                logger.info(f"Loaded people index with {len(people_index)} users")
+    return people_index
+
+
+def get_friend_ids(user_id: int) -> Set[int]:
+    """
+    Get the ids of a user's accepted friends in either direction.
+
+    Args:
+        user_id (int): The ID of the user
+
+    Returns:
+        Set[int]: IDs of the user's friends
+    """
+    sent = db.session.query(Friendship.friend_id).filter(
+        Friendship.user_id == user_id,
+        Friendship.status == 'accepted'
+    )
+    received = db.session.query(Friendship.user_id).filter(
+        Friendship.friend_id == user_id,
+        Friendship.status == 'accepted'
+    )
+    return {friend_id for friend_id, in sent.union(received).all()}
+
 class FriendshipManager:
     """
     A comprehensive utility class for managing friend relationships and requests
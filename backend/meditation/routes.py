@@ -1,5 +1,5 @@
 # meditation/routes.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from .utils import MeditationManager
 import logging
@@ -89,6 +89,17 @@ def register_meditation_routes(bp, db):
             logger.error(f"Error getting meditation stats: {str(e)}")
             return jsonify({'error': 'Internal server error'}), 500
 
+    @bp.route('/meditation/progress', methods=['GET'])
+    @login_required
+    def get_meditation_progress():
+        """Get user's streak and weekly/monthly goal progress"""
+        try:
+            return jsonify({'progress': meditation_manager.get_progress(current_user.id)})
+
+        except Exception as e:
+            logger.error(f"Error getting meditation progress: {str(e)}")
+            return jsonify({'error': 'Internal server error'}), 500
+
     @bp.route('/meditation/recommendations', methods=['GET'])
     @login_required
     def get_recommendations():
@@ -106,12 +117,17 @@ def register_meditation_routes(bp, db):
     @bp.route('/meditation/presets', methods=['GET'])
     @login_required
     def get_meditation_presets():
-        """Get available meditation presets and ambient sounds"""
+        """Get available meditation presets and ambient sounds, with an ETag"""
         try:
-            return jsonify({
-                'durations': meditation_manager.preset_durations,
-                'ambient_sounds': meditation_manager.default_ambient_sounds
-            })
+            presets, etag = meditation_manager.get_presets(current_user.id)
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = jsonify(presets)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
 
         except Exception as e:
             logger.error(f"Error getting presets: {str(e)}")
@@ -1,11 +1,20 @@
 # meditation/utils.py
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import func
-from models import User, MeditationSession, MeditationPreset
+from models import User, MeditationSession, MeditationPreset, MeditationStreak, ActivityCalendar
+from counters import counters
+from achievements.utils import achievements
+from cache import LRUCache, invalidate_on_commit
 from dataclasses import dataclass
+import hashlib
 import json
 
+# Preset catalog per user: (payload, etag). The TTL bounds how stale the
+# buffered use counts can get; edits invalidate the entry on commit.
+preset_cache = LRUCache(max_entries=1024, ttl=300.0)
+invalidate_on_commit(MeditationPreset, preset_cache.invalidate, key=lambda preset: preset.user_id)
+
 @dataclass
 class MeditationStats:
     total_sessions: int
@@ -26,6 +35,31 @@ class MeditationManager:
             'rain', 'ocean', 'forest', 'white_noise', 'tibetan_bells'
         ]
 
+    def get_presets(self, user_id: int) -> Tuple[Dict, str]:
+        """
+        Get the durations, ambient sounds and the user's saved presets,
+        read through the preset cache.
+
+        Returns:
+            Tuple[Dict, str]: Preset catalog and its ETag
+        """
+        cached = preset_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        presets = MeditationPreset.query.filter_by(user_id=user_id).order_by(
+            MeditationPreset.is_favorite.desc(),
+            MeditationPreset.id
+        ).all()
+        payload = {
+            'durations': self.preset_durations,
+            'ambient_sounds': self.default_ambient_sounds,
+            'presets': [preset.to_dict() for preset in presets]
+        }
+        etag = hashlib.sha1(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+        preset_cache.set(user_id, (payload, etag))
+        return payload, etag
+
     def create_session(self, user_id: int, duration: int, 
                       ambient_sound: Optional[str] = None) -> Dict:
         """Create a new meditation session"""
@@ -42,6 +76,11 @@ class MeditationManager:
                 started_at=datetime.utcnow()
             )
             self.db.session.add(session)
+            self._streak_row(user_id)
+            MeditationStreak.query.filter_by(user_id=user_id).update(
+                {MeditationStreak.started_sessions: MeditationStreak.started_sessions + 1},
+                synchronize_session=False
+            )
             self.db.session.commit()
 
             return {
@@ -51,6 +90,9 @@ class MeditationManager:
                 'started_at': session.started_at.isoformat()
             }
 
+        except ValueError:
+            self.db.session.rollback()
+            raise
         except Exception as e:
             self.db.session.rollback()
             raise Exception(f"Error creating meditation session: {str(e)}")
@@ -61,13 +103,20 @@ class MeditationManager:
             session = MeditationSession.query.get(session_id)
             if not session:
                 raise ValueError("Session not found")
+            if session.completion_status == 'completed':
+                raise ValueError("Session already completed")
 
             session.completed_at = datetime.utcnow()
             session.actual_duration = actual_duration
             session.completion_status = 'completed'
 
             # Update user's meditation stats
-            self._update_user_stats(session.user_id, actual_duration)
+            streak = self._update_user_stats(session)
+            awarded = achievements.record(session.user_id, 'meditation', {
+                'sessions': streak.total_sessions,
+                'minutes': streak.total_minutes,
+                'streak': streak.current_streak
+            })
             
             self.db.session.commit()
 
@@ -76,125 +125,69 @@ class MeditationManager:
                 'planned_duration': session.duration,
                 'actual_duration': actual_duration,
                 'completion_status': 'completed',
-                'achievements': self._check_achievements(session.user_id)
+                'achievements': awarded
             }
 
+        except ValueError:
+            self.db.session.rollback()
+            raise
         except Exception as e:
             self.db.session.rollback()
             raise Exception(f"Error completing meditation session: {str(e)}")
 
     def get_user_stats(self, user_id: int) -> MeditationStats:
-        """Get comprehensive meditation statistics for a user"""
+        """Get comprehensive meditation statistics for a user, from their streak row"""
         try:
-            sessions = MeditationSession.query.filter_by(
-                user_id=user_id,
-                completion_status='completed'
-            ).all()
-
-            if not sessions:
-                return MeditationStats(
-                    total_sessions=0,
-                    total_minutes=0,
-                    longest_streak=0,
-                    current_streak=0,
-                    average_duration=0,
-                    favorite_duration=0,
-                    completion_rate=0
-                )
-
-            # Calculate streaks
-            current_streak, longest_streak = self._calculate_streaks(sessions)
-
-            # Calculate favorite duration
-            duration_counts = {}
-            for session in sessions:
-                duration_counts[session.duration] = duration_counts.get(session.duration, 0) + 1
-            favorite_duration = max(duration_counts.items(), key=lambda x: x[1])[0]
-
-            # Calculate completion rate
-            all_sessions = MeditationSession.query.filter_by(user_id=user_id).count()
-            completed_sessions = len(sessions)
-            completion_rate = (completed_sessions / all_sessions) * 100 if all_sessions > 0 else 0
-
-            return MeditationStats(
-                total_sessions=completed_sessions,
-                total_minutes=sum(session.actual_duration for session in sessions),
-                longest_streak=longest_streak,
-                current_streak=current_streak,
-                average_duration=sum(session.actual_duration for session in sessions) / len(sessions),
-                favorite_duration=favorite_duration,
-                completion_rate=completion_rate
-            )
+            return self._stats_from(MeditationStreak.query.filter_by(user_id=user_id).first())
 
         except Exception as e:
             raise Exception(f"Error getting meditation stats: {str(e)}")
 
-    def _calculate_streaks(self, sessions: List[MeditationSession]) -> tuple:
-        """Calculate current and longest meditation streaks"""
-        if not sessions:
-            return 0, 0
-
-        # Sort sessions by date
-        sorted_sessions = sorted(sessions, key=lambda x: x.completed_at)
-        
-        # Calculate streaks
-        current_streak = 1
-        longest_streak = 1
-        temp_streak = 1
-        
-        for i in range(1, len(sorted_sessions)):
-            prev_date = sorted_sessions[i-1].completed_at.date()
-            curr_date = sorted_sessions[i].completed_at.date()
-            
-            if (curr_date - prev_date).days == 1:
-                temp_streak += 1
-                longest_streak = max(longest_streak, temp_streak)
-            else:
-                temp_streak = 1
-                
-        # Check if current streak is still active
-        if (datetime.utcnow().date() - sorted_sessions[-1].completed_at.date()).days <= 1:
-            current_streak = temp_streak
-        else:
-            current_streak = 0
-            
-        return current_streak, longest_streak
-
-    def _update_user_stats(self, user_id: int, duration: int) -> None:
-        """Update user's meditation statistics"""
-        # Implementation for updating user stats
-        pass
-
-    def _check_achievements(self, user_id: int) -> List[Dict]:
-        """Check and award meditation-related achievements"""
-        stats = self.get_user_stats(user_id)
-        achievements = []
-
-        # Session count achievements
-        session_milestones = {
-            5: "Meditation Beginner",
-            20: "Regular Meditator",
-            50: "Meditation Enthusiast",
-            100: "Meditation Master"
-        }
-
-        for count, title in session_milestones.items():
-            if stats.total_sessions >= count:
-                achievements.append({
-                    'type': 'meditation',
-                    'title': title,
-                    'description': f"Completed {count} meditation sessions!"
-                })
-
-        # Streak achievements
-        if stats.current_streak >= 7:
-            achievements.append({
-                'type': 'streak',
-                'title': "Week of Zen",
-                'description': "Maintained a 7-day meditation streak!"
-            })
+    def get_progress(self, user_id: int) -> Dict:
+        """Get the user's streak and weekly/monthly goal progress from their streak row"""
+        streak = MeditationStreak.query.filter_by(user_id=user_id).first()
+        if streak is None:
+            streak = MeditationStreak(user_id=user_id, current_streak=0, longest_streak=0,
+                                      total_sessions=0, total_minutes=0, weekly_goal=7,
+                                      monthly_minutes_goal=500, week_sessions=0, month_minutes=0)
+        progress = streak.to_dict()
+        progress['current_streak'] = streak.streak_on(datetime.utcnow().date())
+        return progress
+
+    def _stats_from(self, streak: Optional[MeditationStreak]) -> MeditationStats:
+        """Convert a user's streak row to their statistics"""
+        if not streak or not streak.total_sessions:
+            return MeditationStats(
+                total_sessions=0,
+                total_minutes=0,
+                longest_streak=0,
+                current_streak=0,
+                average_duration=0,
+                favorite_duration=0,
+                completion_rate=0
+            )
 
-        return achievements
+        return MeditationStats(
+            total_sessions=streak.total_sessions,
+            total_minutes=streak.total_minutes,
+            longest_streak=streak.longest_streak,
+            current_streak=streak.streak_on(datetime.utcnow().date()),
+            average_duration=streak.average_duration,
+            favorite_duration=streak.favorite_duration,
+            completion_rate=streak.completion_rate
+        )
+
+    def _streak_row(self, user_id: int) -> MeditationStreak:
+        """Get the user's streak row for update, creating it if needed"""
+        counters.claim(MeditationStreak, user_id=user_id)
+        return MeditationStreak.query.filter_by(user_id=user_id).with_for_update().one()
+
+    def _update_user_stats(self, session: MeditationSession) -> MeditationStreak:
+        """Fold a completed session into the user's calendar and streak row"""
+        ActivityCalendar.mark(session.user_id, 'meditation', session.completed_at.date())
+        streak = self._streak_row(session.user_id)
+        streak.add_session(session, ActivityCalendar.load(session.user_id, 'meditation'))
+        return streak
 
     def get_recommended_sessions(self, user_id: int) -> List[Dict]:
         """Get personalized session recommendations"""
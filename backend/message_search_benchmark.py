@@ -0,0 +1,153 @@
+"""
+Benchmark for private message search on a large synthetic message table.
+
+Compares a LIKE '%word%' scan restricted to the caller's conversations with
+the FTS5 message index, and measures what indexing costs on each send.
+
+Usage:
+    python message_search_benchmark.py [--messages 2000000] [--users 20000] [--queries 200]
+"""
+import argparse
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import or_
+
+from extensions import db
+from models import Message
+from search.utils import search_index
+
+VOCABULARY_SIZE = 5000
+WORDS_PER_MESSAGE = (3, 20)
+INSERT_BATCH = 50000
+
+
+def create_benchmark_app(db_path):
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI='sqlite:///' + db_path,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False
+    )
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def generate_messages(rng, messages, users):
+    """Yield message rows with Zipf-like word frequencies, like real chat text"""
+    vocabulary = [f'word{n}' for n in range(VOCABULARY_SIZE)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCABULARY_SIZE)))
+    now = datetime.utcnow().isoformat(sep=' ')
+
+    for _ in range(messages):
+        sender = rng.randrange(1, users + 1)
+        receiver = rng.randrange(1, users + 1)
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(*WORDS_PER_MESSAGE))
+        yield sender, receiver, ' '.join(words), now
+
+
+def load_messages(app, rng, messages, users):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            batch = []
+            for row in generate_messages(rng, messages, users):
+                batch.append(row)
+                if len(batch) == INSERT_BATCH:
+                    conn.exec_driver_sql(
+                        "INSERT INTO message (sender_id, receiver_id, content, timestamp, is_read) "
+                        "VALUES (?, ?, ?, ?, 0)", batch
+                    )
+                    batch = []
+            if batch:
+                conn.exec_driver_sql(
+                    "INSERT INTO message (sender_id, receiver_id, content, timestamp, is_read) "
+                    "VALUES (?, ?, ?, ?, 0)", batch
+                )
+
+
+def like_search(user_id, word, limit):
+    """The naive query: substring match over every message of the user"""
+    return Message.query.filter(
+        or_(Message.sender_id == user_id, Message.receiver_id == user_id),
+        Message.content.like(f'%{word}%')
+    ).order_by(Message.id.desc()).limit(limit).all()
+
+
+def fts_search(user_id, word, limit):
+    return search_index.search_messages(word, user_id=user_id, limit=limit)
+
+
+def time_queries(search, queries, limit):
+    timings = []
+    hits = 0
+    for user_id, word in queries:
+        started = time.perf_counter()
+        hits += len(search(user_id, word, limit))
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, hits
+
+
+def report(name, timings, hits):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{name:<18} median={statistics.median(timings):>9.2f} ms  "
+          f"p95={p95:>9.2f} ms  max={timings[-1]:>9.2f} ms  hits={hits}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db_path = os.path.join(tempfile.mkdtemp(), 'message_search_benchmark.db')
+    app = create_benchmark_app(db_path)
+
+    started = time.perf_counter()
+    load_messages(app, rng, args.messages, args.users)
+    print(f"Loaded {args.messages} messages in {time.perf_counter() - started:.1f}s")
+
+    with app.app_context():
+        started = time.perf_counter()
+        counts = search_index.rebuild('messages')
+        print(f"Indexed {counts['messages']} messages in {time.perf_counter() - started:.1f}s "
+              f"(database {os.path.getsize(db_path) / 2 ** 20:.0f} MiB)")
+
+        # Searches by random users for words from the whole frequency range
+        queries = [
+            (rng.randrange(1, args.users + 1), f'word{rng.randrange(VOCABULARY_SIZE)}')
+            for _ in range(args.queries)
+        ]
+        report('LIKE scan', *time_queries(like_search, queries, args.limit))
+        report('FTS5 index', *time_queries(fts_search, queries, args.limit))
+
+        # Incremental maintenance cost on the send path
+        for name, index in (('send', False), ('send + index', True)):
+            timings = []
+            for _ in range(500):
+                sender, receiver, content, _ = next(generate_messages(rng, 1, args.users))
+                started = time.perf_counter()
+                message = Message(sender_id=sender, receiver_id=receiver, content=content,
+                                  timestamp=datetime.utcnow(), is_read=False)
+                db.session.add(message)
+                db.session.flush()
+                if index:
+                    search_index.index_message(message)
+                db.session.commit()
+                timings.append((time.perf_counter() - started) * 1000)
+            report(name, timings, 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Resolve duplicate rows that keep unique indexes from being added to existing tables.
+
+The application refuses to start while such rows exist, since the indexes
+back its insert-or-ignore writes. This lists every conflict, resolves the
+ones it knows how to and creates the indexes:
+
+    blog_interaction   keeps each user's latest reaction to a blog and takes
+                       the removed ones back off the blog's likes/dislikes
+    meditation_streak  rebuilds the statistics of the affected users from
+                       their meditation sessions
+
+Conflicts in any other table are only reported, and the script exits with
+status 1 without touching them.
+
+Usage:
+    python migrate_unique_indexes.py [--dry-run] [--database PATH]
+"""
+import argparse
+import os
+import sys
+
+from flask import Flask
+from sqlalchemy import and_, case, func, inspect as sa_inspect, select
+
+from extensions import db
+from models import Blog, BlogInteraction, MeditationStreak, duplicate_keys
+
+# How many conflicting keys to print per index
+SAMPLE_SIZE = 10
+
+
+def keep_latest_reactions(keys) -> str:
+    """Delete all but the latest reaction per blog and user, correcting the counters"""
+    # Rows with a NULL key never conflict and are left alone
+    keyed = and_(BlogInteraction.blog_id.isnot(None), BlogInteraction.user_id.isnot(None))
+    latest = select(func.max(BlogInteraction.id)).where(keyed)\
+        .group_by(BlogInteraction.blog_id, BlogInteraction.user_id)
+    removed = and_(keyed, BlogInteraction.id.not_in(latest))
+    counter_columns = {'like': Blog.likes, 'dislike': Blog.dislikes}
+
+    for blog_id, interaction_type, count in db.session.query(
+        BlogInteraction.blog_id, BlogInteraction.interaction_type, func.count()
+    ).filter(removed).group_by(BlogInteraction.blog_id, BlogInteraction.interaction_type).all():
+        column = counter_columns.get(interaction_type)
+        if column is not None:
+            db.session.query(Blog).filter_by(id=blog_id).update(
+                {column: case((column > count, column - count), else_=0)}, synchronize_session=False
+            )
+
+    deleted = BlogInteraction.query.filter(removed).delete(synchronize_session=False)
+    return f"deleted {deleted} older reactions and took them off the blogs' counters"
+
+
+def rebuild_meditation_streaks(keys) -> str:
+    """Replace the duplicated rows of each user with one rebuilt from their sessions"""
+    user_ids = [user_id for user_id, _ in keys]
+    rebuilt = MeditationStreak.backfill(user_ids)
+    return f"rebuilt {rebuilt} of {len(user_ids)} users from their sessions; " \
+           f"users without sessions are left without a row"
+
+
+RESOLVERS = {
+    'blog_interaction': keep_latest_reactions,
+    'meditation_streak': rebuild_meditation_streaks,
+}
+
+
+def migrate_unique_indexes(app, dry_run=False) -> bool:
+    """
+    Report and resolve conflicts with missing unique indexes, then create them.
+
+    Returns:
+        bool: True if every missing unique index exists afterwards
+    """
+    ok = True
+    with app.app_context():
+        inspector = sa_inspect(db.engine)
+        existing_tables = set(inspector.get_table_names())
+
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            indexed = {index['name'] for index in inspector.get_indexes(table.name)}
+
+            for index in table.indexes:
+                if not index.unique or index.name in indexed:
+                    continue
+                keys = duplicate_keys(db.session.connection(), table, index)
+                columns = ', '.join(column.name for column in index.columns)
+                if not keys:
+                    print(f"{index.name}: no conflicts")
+                elif table.name not in RESOLVERS:
+                    ok = False
+                    print(f"{index.name}: {len(keys)} duplicated ({columns}) keys and no resolver; resolve by hand")
+                else:
+                    print(f"{index.name}: {len(keys)} duplicated ({columns}) keys, "
+                          f"{sum(key[-1] for key in keys) - len(keys)} extra rows")
+                for key in keys[:SAMPLE_SIZE]:
+                    print(f"    {key[:-1]}: {key[-1]} rows")
+
+                if dry_run or (keys and table.name not in RESOLVERS):
+                    continue
+                if keys:
+                    print(f"{index.name}: {RESOLVERS[table.name](keys)}")
+                index.create(db.session.connection())
+                # Each index is created in the same transaction as its fix
+                db.session.commit()
+                print(f"{index.name}: created")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--dry-run', action='store_true', help='Only report conflicts')
+    parser.add_argument('--database', default=os.path.join(os.path.abspath(os.path.dirname(__file__)), 'users.db'),
+                        help='SQLite database file (default: the one app.py uses)')
+    args = parser.parse_args()
+
+    # Not `from app import app`: the application does not start until this has run
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite:///' + args.database,
+                      SQLALCHEMY_TRACK_MODIFICATIONS=False)
+    db.init_app(app)
+    sys.exit(0 if migrate_unique_indexes(app, args.dry_run) else 1)
@@ -1,8 +1,9 @@
-from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 from flask import Flask, jsonify
 from flask_login import LoginManager, UserMixin
-from sqlalchemy import func
+from sqlalchemy import case, func
 from extensions import db
 
 class User(UserMixin, db.Model):
@@ -14,6 +15,10 @@ class User(UserMixin, db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(60), nullable=False)
     gender = db.Column(db.String(20))
+    # Latest mood check-in, read by the chatbot
+    current_mood = db.Column(db.Integer)
+    current_emotions = db.Column(db.JSON)
+    current_mood_at = db.Column(db.DateTime)
     
     # Define the many-to-many relationship for friends
     friends = db.relationship(
@@ -27,7 +32,11 @@ class User(UserMixin, db.Model):
 class Friendship(db.Model):
     """Model for managing friendships between users"""
     __tablename__ = 'friendship'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_friendship_user_status', 'user_id', 'status'),
+        db.Index('ix_friendship_friend_status', 'friend_id', 'status'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -63,7 +72,10 @@ class SessionLog(db.Model):
 
 class UserProblem(db.Model):
     __tablename__ = 'user_problem'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_user_problem_user_id', 'user_id'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -85,9 +97,11 @@ class Profile(db.Model):
 # backend_models.py
 from datetime import datetime
 from typing import Dict, Any, List
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from extensions import db
 from flask_login import UserMixin
+import math
+import re
 
 class Blog(db.Model):
     """
@@ -102,15 +116,88 @@ class Blog(db.Model):
         title (str): Title of the blog post
         content (str): Main content of the blog post
         created_at (datetime): Timestamp of post creation
+        likes (int): Number of users who liked the post
+        dislikes (int): Number of users who disliked the post
+        excerpt (str): Start of the content shown in blog listings
+        reading_time (int): Estimated reading time in minutes
+        comment_count (int): Number of comments, maintained on comment writes
+        trending_score (float): Log-space time-decayed activity score
     """
     __tablename__ = 'blog'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Newest-first listing with a (created_at, id) cursor
+        db.Index('ix_blog_created_at_id', 'created_at', 'id'),
+        db.Index('ix_blog_trending_score', 'trending_score'),
+        {'extend_existing': True}
+    )
+
+    EXCERPT_LENGTH = 200
+    WORDS_PER_MINUTE = 200
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     title = db.Column(db.String(100))
     content = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    likes = db.Column(db.Integer, default=0, server_default='0')
+    dislikes = db.Column(db.Integer, default=0, server_default='0')
+    excerpt = db.Column(db.String(300))
+    reading_time = db.Column(db.Integer, default=1, server_default='1')
+    comment_count = db.Column(db.Integer, default=0, server_default='0')
+    trending_score = db.Column(db.Float)
+
+    @classmethod
+    def summarize(cls, content: str) -> tuple:
+        """
+        Compute the list-view excerpt and reading time of blog content.
+
+        Returns:
+            tuple: (excerpt, reading time in minutes)
+        """
+        text = ' '.join((content or '').split())
+        words = len(re.findall(r'\w+', text))
+        reading_time = max(1, math.ceil(words / cls.WORDS_PER_MINUTE))
+
+        if len(text) <= cls.EXCERPT_LENGTH:
+            return text, reading_time
+        cut = text.rfind(' ', 0, cls.EXCERPT_LENGTH)
+        return text[:cut if cut > 0 else cls.EXCERPT_LENGTH] + '...', reading_time
+
+    @validates('content')
+    def _update_summary(self, key: str, content: str) -> str:
+        """Keep excerpt and reading time in step with every content change."""
+        self.excerpt, self.reading_time = self.summarize(content)
+        return content
+
+    @classmethod
+    def backfill_summaries(cls, batch_size: int = 500) -> int:
+        """
+        Compute excerpts for blogs written before the column existed.
+
+        Returns:
+            int: Number of blogs updated
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            blogs = cls.query.filter(cls.id > last_id, cls.excerpt.is_(None))\
+                .order_by(cls.id).limit(batch_size).all()
+            if not blogs:
+                return updated
+            for blog in blogs:
+                blog.excerpt, blog.reading_time = cls.summarize(blog.content)
+            db.session.commit()
+            updated += len(blogs)
+            last_id = blogs[-1].id
+
+    @classmethod
+    def backfill_comment_counts(cls) -> int:
+        """Recount comments for every blog in a single UPDATE."""
+        counted = db.select(func.count(Comment.id))\
+            .where(Comment.blog_id == cls.id).scalar_subquery()
+        updated = db.session.query(cls).update({cls.comment_count: counted}, synchronize_session=False)
+        db.session.commit()
+        return updated
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert blog post to dictionary representation."""
@@ -118,8 +205,13 @@ class Blog(db.Model):
             'blog_id': self.id,
             'title': self.title,
             'content': self.content,
+            'excerpt': self.excerpt,
+            'reading_time': self.reading_time or 1,
             'created_at': self.created_at.isoformat(),
-            'created_by': self.user_id
+            'created_by': self.user_id,
+            'likes': self.likes or 0,
+            'dislikes': self.dislikes or 0,
+            'comment_count': self.comment_count or 0
         }
 
 # In backend_models.py or wherever your models are defined
@@ -135,7 +227,10 @@ class MeditationMetrics:
 class MeditationSession(db.Model):
     """Model for storing meditation session data with comprehensive tracking"""
     __tablename__ = 'meditation_session'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_meditation_session_user_status_completed', 'user_id', 'completion_status', 'completed_at'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -226,7 +321,8 @@ class MeditationPreset(db.Model):
 
     def increment_usage(self) -> None:
         """Update preset usage statistics"""
-        self.use_count += 1
+        from counters import counters
+        counters.increment(MeditationPreset.use_count, self.id)
         self.last_used_at = datetime.utcnow()
 
     def to_dict(self) -> Dict:
@@ -249,7 +345,10 @@ class MeditationPreset(db.Model):
 class MeditationStreak(db.Model):
     """Model for tracking meditation streaks with detailed statistics"""
     __tablename__ = 'meditation_streak'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_meditation_streak_user_id', 'user_id', unique=True),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -261,44 +360,139 @@ class MeditationStreak(db.Model):
     streak_start_date = db.Column(db.Date)
     weekly_goal = db.Column(db.Integer, default=7)  # Sessions per week goal
     monthly_minutes_goal = db.Column(db.Integer, default=500)  # Minutes per month
+    started_sessions = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    duration_counts = db.Column(db.JSON)  # planned duration -> completed sessions
+    # Goal progress of the latest week/month with a session; see add_session
+    week_start = db.Column(db.Date)
+    week_sessions = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    month_start = db.Column(db.Date)
+    month_minutes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
     
     # Relationships
     user = db.relationship('User', backref=db.backref('meditation_streak', uselist=False))
 
-    def update_streak(self, meditation_date: datetime) -> None:
-        """Update streak information based on new meditation session"""
+    def update_streak(self, meditation_date: datetime, calendar: 'DayCalendar') -> None:
+        """
+        Update streak information based on new meditation session
+
+        Args:
+            meditation_date: Completion time of the session
+            calendar: The user's meditation calendar, including that day
+        """
         today = meditation_date.date()
-        
-        if not self.last_meditation_date:
-            self.current_streak = 1
-            self.streak_start_date = today
-        else:
-            days_difference = (today - self.last_meditation_date).days
-            
-            if days_difference <= 1:  # Consecutive day
-                self.current_streak += 1
-            else:  # Streak broken
-                self.current_streak = 1
-                self.streak_start_date = today
-        
+        self.current_streak = calendar.current_streak(today)
+        self.streak_start_date = today - timedelta(days=self.current_streak - 1)
         self.last_meditation_date = today
-        self.longest_streak = max(self.current_streak, self.longest_streak)
-        self.total_sessions += 1
+        self.longest_streak = max(self.current_streak, self.longest_streak or 0)
+        self.total_sessions = (self.total_sessions or 0) + 1
 
     def add_session_minutes(self, minutes: int) -> None:
         """Add completed session minutes to total"""
-        self.total_minutes += minutes
+        self.total_minutes = (self.total_minutes or 0) + minutes
+
+    def add_session(self, session: 'MeditationSession', calendar: 'DayCalendar') -> None:
+        """
+        Fold a completed session into the streak, totals and duration counts
+
+        Args:
+            session: The completed session
+            calendar: The user's meditation calendar, including that day
+        """
+        self.update_streak(session.completed_at, calendar)
+        self.add_session_minutes(session.actual_duration or 0)
+        self.add_to_goals(session.completed_at.date(), session.actual_duration or 0)
+        # Reassigned rather than mutated so the JSON change is persisted
+        counts = dict(self.duration_counts or {})
+        counts[str(session.duration)] = counts.get(str(session.duration), 0) + 1
+        self.duration_counts = counts
+
+    def add_to_goals(self, day: date, minutes: int) -> None:
+        """Count a session towards its week's and month's goals, starting new buckets as needed"""
+        week_start = day - timedelta(days=day.weekday())
+        if self.week_start is None or week_start > self.week_start:
+            self.week_start, self.week_sessions = week_start, 0
+        if week_start == self.week_start:
+            self.week_sessions = (self.week_sessions or 0) + 1
+
+        month_start = day.replace(day=1)
+        if self.month_start is None or month_start > self.month_start:
+            self.month_start, self.month_minutes = month_start, 0
+        if month_start == self.month_start:
+            self.month_minutes = (self.month_minutes or 0) + minutes
+
+    def streak_on(self, day: date) -> int:
+        """Current streak as of a day; broken once a full day passes without a session"""
+        if self.last_meditation_date and self.last_meditation_date >= day - timedelta(days=1):
+            return self.current_streak or 0
+        return 0
+
+    @property
+    def average_duration(self) -> float:
+        """Mean actual duration of completed sessions"""
+        return self.total_minutes / self.total_sessions if self.total_sessions else 0
+
+    @property
+    def favorite_duration(self) -> int:
+        """Planned duration completed most often, 0 without sessions"""
+        counts = self.duration_counts or {}
+        return int(max(counts, key=lambda duration: (counts[duration], -int(duration)))) if counts else 0
+
+    @property
+    def completion_rate(self) -> float:
+        """Percentage of started sessions that were completed"""
+        return min(self.total_sessions / self.started_sessions * 100, 100.0) if self.started_sessions else 0
+
+    @classmethod
+    def backfill(cls, user_ids: List[int]) -> int:
+        """
+        Rebuild the rows of some users from their sessions and meditation
+        calendars, replacing existing ones; see backfills.py.
+
+        Args:
+            user_ids (List[int]): Users to rebuild
+
+        Returns:
+            int: Number of rows created
+        """
+        cls.query.filter(cls.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+        rows = {}
+        for user_id, status, duration, actual_duration, completed_at in db.session.query(
+            MeditationSession.user_id, MeditationSession.completion_status, MeditationSession.duration,
+            MeditationSession.actual_duration, MeditationSession.completed_at
+        ).filter(MeditationSession.user_id.in_(user_ids)).yield_per(10000):
+            row = rows.get(user_id)
+            if row is None:
+                row = rows[user_id] = cls(user_id=user_id, started_sessions=0, total_sessions=0,
+                                          total_minutes=0, current_streak=0, longest_streak=0,
+                                          week_sessions=0, month_minutes=0)
+            row.started_sessions += 1
+            if status == 'completed' and completed_at is not None:
+                row.total_sessions += 1
+                row.total_minutes += actual_duration or 0
+                row.add_to_goals(completed_at.date(), actual_duration or 0)
+                counts = row.duration_counts or {}
+                counts[str(duration)] = counts.get(str(duration), 0) + 1
+                row.duration_counts = counts
+                if row.last_meditation_date is None or completed_at.date() > row.last_meditation_date:
+                    row.last_meditation_date = completed_at.date()
+
+        for user_id, row in rows.items():
+            if row.last_meditation_date is not None:
+                calendar = ActivityCalendar.load(user_id, 'meditation')
+                row.current_streak = calendar.current_streak(row.last_meditation_date)
+                row.longest_streak = calendar.longest_streak()
+                if row.current_streak:
+                    row.streak_start_date = row.last_meditation_date - timedelta(days=row.current_streak - 1)
+
+        db.session.add_all(rows.values())
+        return len(rows)
 
     def get_weekly_progress(self) -> Dict:
         """Calculate progress towards weekly goals"""
         today = datetime.utcnow().date()
         week_start = today - timedelta(days=today.weekday())
-        
-        weekly_sessions = MeditationSession.query.filter(
-            MeditationSession.user_id == self.user_id,
-            func.date(MeditationSession.completed_at) >= week_start,
-            MeditationSession.completion_status == 'completed'
-        ).count()
+        weekly_sessions = self.week_sessions if self.week_start == week_start else 0
 
         return {
             'sessions_completed': weekly_sessions,
@@ -310,14 +504,7 @@ class MeditationStreak(db.Model):
         """Calculate progress towards monthly goals"""
         today = datetime.utcnow().date()
         month_start = today.replace(day=1)
-        
-        monthly_minutes = db.session.query(
-            func.sum(MeditationSession.actual_duration)
-        ).filter(
-            MeditationSession.user_id == self.user_id,
-            func.date(MeditationSession.completed_at) >= month_start,
-            MeditationSession.completion_status == 'completed'
-        ).scalar() or 0
+        monthly_minutes = self.month_minutes if self.month_start == month_start else 0
 
         return {
             'minutes_completed': monthly_minutes,
@@ -408,7 +595,10 @@ class JourneyMilestone(db.Model):
 class UserJourneyProgress(db.Model):
     """User journey progress model"""
     __tablename__ = 'user_journey_progress'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_user_journey_progress_user_path', 'user_id', 'path_id'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -572,7 +762,10 @@ class ReminderLog(db.Model):
         return f'<ReminderLog {self.id} for user {self.user_id}>'
 class StressAssessment(db.Model):
     __tablename__ = 'stress_assessment'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_stress_assessment_user_date', 'user_id', 'assessment_date'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -598,7 +791,11 @@ class Comment(db.Model):
         blog_id (int): Foreign key reference to blog table
     """
     __tablename__ = 'comment'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Newest-first comment pages of one blog with a (created_at, id) cursor
+        db.Index('ix_comment_blog_created_at_id', 'blog_id', 'created_at', 'id'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -616,7 +813,7 @@ class Comment(db.Model):
             'blog_id': self.blog_id
         }
 class BlogInteraction(db.Model):
-    _tablename_ = 'blog_interaction'
+    __tablename__ = 'blog_interaction'
     
     id = db.Column(db.Integer, primary_key=True)
     blog_id = db.Column(db.Integer, db.ForeignKey('blog.id'), nullable=False)
@@ -624,8 +821,11 @@ class BlogInteraction(db.Model):
     interaction_type = db.Column(db.String(10), nullable=False)  # 'like' or 'dislike'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    _table_args_ = (
-        db.UniqueConstraint('blog_id', 'user_id', name='unique_blog_interaction'),
+    # One reaction per user per blog; a unique index so it can also be
+    # added to databases created before the constraint existed
+    __table_args__ = (
+        db.Index('ix_blog_interaction_blog_user', 'blog_id', 'user_id', unique=True),
+        {'extend_existing': True}
     )
 
 class Like(db.Model):
@@ -640,7 +840,11 @@ class Like(db.Model):
 
 class Message(db.Model):
     __tablename__ = 'message'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Conversation lookups and id-cursor paging of chat history
+        db.Index('ix_message_conversation', 'sender_id', 'receiver_id', 'id'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'))
@@ -676,7 +880,11 @@ class GroupJoinRequest(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 class Workshop(db.Model):
     __tablename__ = 'workshop'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Catalog listing per tag, sponsored first
+        db.Index('ix_workshop_tag_sponsored', 'tag', 'sponsored', 'id'),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -689,11 +897,54 @@ class Workshop(db.Model):
     tag = db.Column(db.String(50), nullable=False)
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Feedback rating aggregates, maintained when feedback is submitted
+    rating_sum = db.Column(db.Integer, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, default=0, server_default='0')
+    # Star histogram: number of 1..5 star ratings
+    ratings_1 = db.Column(db.Integer, default=0, server_default='0')
+    ratings_2 = db.Column(db.Integer, default=0, server_default='0')
+    ratings_3 = db.Column(db.Integer, default=0, server_default='0')
+    ratings_4 = db.Column(db.Integer, default=0, server_default='0')
+    ratings_5 = db.Column(db.Integer, default=0, server_default='0')
     
     # Relationships
     creator = db.relationship('User', backref='created_workshops')
     feedback = db.relationship('Feedback', backref='workshop', lazy='dynamic')
 
+    @property
+    def average_rating(self) -> Optional[float]:
+        """Mean feedback rating, or None without feedback"""
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    @classmethod
+    def histogram_column(cls, rating: int):
+        """Histogram column counting ratings of the given star value"""
+        return getattr(cls, f'ratings_{rating}')
+
+    @property
+    def rating_histogram(self) -> Dict[str, int]:
+        """Number of ratings per star value, keyed '1' to '5'"""
+        return {str(rating): getattr(self, f'ratings_{rating}') or 0 for rating in range(1, 6)}
+
+    @classmethod
+    def backfill_ratings(cls) -> int:
+        """Recompute rating aggregates from feedback in a single UPDATE"""
+        def aggregate(expression, *criteria):
+            return db.select(expression)\
+                .where(Feedback.workshop_id == cls.id, *criteria).scalar_subquery()
+
+        values = {
+            cls.rating_sum: aggregate(func.coalesce(func.sum(Feedback.rating), 0)),
+            cls.rating_count: aggregate(func.count(Feedback.id))
+        }
+        for rating in range(1, 6):
+            values[cls.histogram_column(rating)] = aggregate(
+                func.count(Feedback.id), Feedback.rating == rating
+            )
+        updated = db.session.query(cls).update(values, synchronize_session=False)
+        db.session.commit()
+        return updated
+
 class Feedback(db.Model):
     __tablename__ = 'feedback'
     __table_args__ = {'extend_existing': True}
@@ -708,6 +959,8 @@ class Feedback(db.Model):
     # Add unique constraint to ensure one feedback per user per workshop
     __table_args__ = (
         db.UniqueConstraint('workshop_id', 'user_id', name='unique_workshop_feedback'),
+        # Newest-first feedback pages of a workshop
+        db.Index('ix_feedback_workshop_timestamp_id', 'workshop_id', 'timestamp', 'id'),
         {'extend_existing': True}
     )
 from datetime import datetime
@@ -734,7 +987,12 @@ community_members = db.Table('community_members',
 
 class CommunityPost(db.Model):
     __tablename__ = 'community_post'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Loading the global and per-community trending boards
+        db.Index('ix_community_post_trending_score', 'trending_score'),
+        db.Index('ix_community_post_community_trending', 'community_id', 'trending_score'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     community_id = db.Column(db.Integer, db.ForeignKey('community.id'))
@@ -742,6 +1000,8 @@ class CommunityPost(db.Model):
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     likes = db.Column(db.Integer, default=0)
+    # Log-space time-decayed activity score, see trending.TrendingEngine
+    trending_score = db.Column(db.Float)
     
     # Relationship to get user information
     author = db.relationship('User', backref='community_posts')
@@ -759,6 +1019,20 @@ class CommunityComment(db.Model):
     # Relationships
     author = db.relationship('User', backref='community_comments')
     post = db.relationship('CommunityPost', backref='comments')
+
+class CommunityPostLike(db.Model):
+    """Marker row recording that a user liked a community post"""
+    __tablename__ = 'community_post_like'
+
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('community_post.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('post_id', 'user_id', name='unique_post_like'),
+        {'extend_existing': True}
+    )
 class Activity(db.Model):
     """Activity model representing wellness activities users can perform."""
     __tablename__ = 'activity'
@@ -790,7 +1064,11 @@ class Activity(db.Model):
 class UserActivity(db.Model):
     """Model tracking user's activity sessions and progress."""
     __tablename__ = 'user_activity'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_user_activity_user_activity', 'user_id', 'activity_id'),
+        db.Index('ix_user_activity_user_completed', 'user_id', 'completed_at'),
+        {'extend_existing': True}
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -818,6 +1096,84 @@ class UserActivity(db.Model):
             'notes': self.notes
         }
 
+class UserCategoryStats(db.Model):
+    """Per-user completion and effectiveness totals of an activity category."""
+    __tablename__ = 'user_category_stats'
+    __table_args__ = (
+        db.Index('ix_user_category_stats_user_category', 'user_id', 'category', unique=True),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+    completed_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    rating_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Mood improvement (mood_after - mood_before) of completions with both moods
+    improvement_sum = db.Column(db.Float, default=0, server_default='0', nullable=False)
+    improvement_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    improved_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    @property
+    def effectiveness(self) -> Optional[float]:
+        """Mean effectiveness rating, or None without ratings"""
+        return self.rating_sum / self.rating_count if self.rating_count else None
+
+    @property
+    def average_improvement(self) -> float:
+        """Mean mood improvement, 0 without mood readings"""
+        return self.improvement_sum / self.improvement_count if self.improvement_count else 0
+
+    def to_dict(self) -> Dict:
+        """Convert category totals to dictionary representation."""
+        return {
+            'category': self.category,
+            'completed': self.completed_count,
+            'average_effectiveness': self.effectiveness,
+            'average_improvement': self.average_improvement,
+            'activities_with_improvement': self.improved_count
+        }
+
+    @classmethod
+    def backfill(cls, user_ids: List[int]) -> int:
+        """
+        Rebuild the totals of some users from their completed activities,
+        replacing existing ones; see backfills.py.
+
+        Args:
+            user_ids (List[int]): Users to rebuild
+
+        Returns:
+            int: Number of rows created
+        """
+        cls.query.filter(cls.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+        improvement = UserActivity.mood_after - UserActivity.mood_before
+        rows = db.session.query(
+            UserActivity.user_id,
+            Activity.category,
+            func.count(UserActivity.id),
+            func.coalesce(func.sum(UserActivity.effectiveness_rating), 0),
+            func.count(UserActivity.effectiveness_rating),
+            func.coalesce(func.sum(improvement), 0),
+            func.count(improvement),
+            func.count(case((improvement > 0, 1)))
+        ).join(Activity, Activity.id == UserActivity.activity_id).filter(
+            UserActivity.user_id.in_(user_ids),
+            UserActivity.completed_at.isnot(None)
+        ).group_by(UserActivity.user_id, Activity.category).all()
+
+        db.session.add_all([
+            cls(user_id=user_id, category=category, completed_count=completed,
+                rating_sum=rating_sum, rating_count=rating_count,
+                improvement_sum=improvement_sum, improvement_count=improvement_count,
+                improved_count=improved_count)
+            for user_id, category, completed, rating_sum, rating_count,
+                improvement_sum, improvement_count, improved_count in rows
+        ])
+        return len(rows)
+
 class ActivityStreak(db.Model):
     """Model tracking user's activity completion streaks."""
     __tablename__ = 'activity_streak'
@@ -830,24 +1186,17 @@ class ActivityStreak(db.Model):
     last_activity_date = db.Column(db.Date)
     total_activities_completed = db.Column(db.Integer, default=0)
 
-    def update_streak(self, completion_time: datetime):
+    def update_streak(self, completion_time: datetime, calendar: 'DayCalendar'):
         """
         Update streak based on activity completion.
         
         Args:
             completion_time: Datetime when activity was completed
+            calendar: The user's activity calendar, including that day
         """
         today = completion_time.date()
-        
-        if not self.last_activity_date:
-            self.current_streak = 1
-        elif (today - self.last_activity_date).days == 1:
-            self.current_streak += 1
-        elif (today - self.last_activity_date).days > 1:
-            self.current_streak = 1
-        # If completed on same day, streak stays the same
-        
-        self.longest_streak = max(self.longest_streak, self.current_streak)
+        self.current_streak = calendar.current_streak(today)
+        self.longest_streak = max(self.longest_streak or 0, self.current_streak)
         self.last_activity_date = today
         self.total_activities_completed += 1
 
@@ -859,9 +1208,130 @@ class ActivityStreak(db.Model):
             'total_activities_completed': self.total_activities_completed,
             'last_activity_date': self.last_activity_date.isoformat() if self.last_activity_date else None
         }
+class ActivityCalendar(db.Model):
+    """
+    Days a user was active, one row per user, kind and month.
+
+    ``days`` has bit ``d - 1`` set if the user was active on day ``d`` of
+    the month; see calendar_bits.DayCalendar for the streak and window
+    queries over these bits.
+    """
+    __tablename__ = 'activity_calendar'
+    __table_args__ = (
+        db.Index('ix_activity_calendar_user_kind_month', 'user_id', 'kind', 'month', unique=True),
+        {'extend_existing': True}
+    )
+
+    KINDS = ('activity', 'meditation', 'journey', 'mood')
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    month = db.Column(db.Integer, nullable=False)  # calendar_bits.month_index
+    days = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+
+    @classmethod
+    def mark(cls, user_id: int, kind: str, day: date) -> None:
+        """Mark a day as active; part of the caller's transaction"""
+        from counters import counters
+        from calendar_bits import day_bit, month_index
+
+        month = month_index(day)
+        counters.claim(cls, user_id=user_id, kind=kind, month=month)
+        cls.query.filter_by(user_id=user_id, kind=kind, month=month).update(
+            {cls.days: cls.days.op('|')(day_bit(day))}, synchronize_session=False
+        )
+
+    @classmethod
+    def load(cls, user_id: int, kinds: Union[str, Iterable[str]],
+             since: Optional[date] = None) -> 'DayCalendar':
+        """
+        Get the active days of one or more kinds combined.
+
+        Args:
+            user_id (int): User
+            kinds: Kind or kinds of activity
+            since (Optional[date]): Skip months before this day's month
+
+        Returns:
+            DayCalendar: Calendar of the combined kinds
+        """
+        from calendar_bits import DayCalendar, month_index
+
+        query = db.session.query(cls.month, cls.days).filter(
+            cls.user_id == user_id,
+            cls.kind.in_([kinds] if isinstance(kinds, str) else list(kinds))
+        )
+        if since is not None:
+            query = query.filter(cls.month >= month_index(since))
+        return DayCalendar.from_months(query.all())
+
+    @classmethod
+    def backfill(cls, user_ids: List[int]) -> int:
+        """
+        Rebuild the calendars of some users from their activity, meditation,
+        journey and mood history, replacing existing ones; see backfills.py.
+        Mood days are read from the rollups, which must be built first.
+
+        Args:
+            user_ids (List[int]): Users to rebuild
+
+        Returns:
+            int: Number of rows created
+        """
+        from calendar_bits import day_bit, month_index
+
+        cls.query.filter(cls.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+        sources = {
+            'activity': db.session.query(UserActivity.user_id, UserActivity.completed_at).filter(
+                UserActivity.user_id.in_(user_ids),
+                UserActivity.completed_at.isnot(None)),
+            'meditation': db.session.query(MeditationSession.user_id, MeditationSession.completed_at).filter(
+                MeditationSession.user_id.in_(user_ids),
+                MeditationSession.completion_status == 'completed',
+                MeditationSession.completed_at.isnot(None)),
+            # Journey progress only keeps the latest milestone day
+            'journey': db.session.query(UserJourneyProgress.user_id, UserJourneyProgress.last_activity_date).filter(
+                UserJourneyProgress.user_id.in_(user_ids),
+                UserJourneyProgress.last_activity_date.isnot(None)),
+            'mood': db.session.query(MoodDailyRollup.user_id, MoodDailyRollup.day).filter(
+                MoodDailyRollup.user_id.in_(user_ids))
+        }
+
+        months = defaultdict(int)
+        for kind, query in sources.items():
+            for user_id, moment in query.yield_per(10000):
+                day = moment.date() if isinstance(moment, datetime) else moment
+                months[(user_id, kind, month_index(day))] |= day_bit(day)
+
+        db.session.add_all([
+            cls(user_id=user_id, kind=kind, month=month, days=days)
+            for (user_id, kind, month), days in months.items()
+        ])
+        return len(months)
+
+class UserAchievement(db.Model):
+    """An achievement awarded to a user; codes are defined in achievements.rules"""
+    __tablename__ = 'user_achievement'
+    __table_args__ = (
+        db.Index('ix_user_achievement_user_code', 'user_id', 'code', unique=True),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    code = db.Column(db.String(50), nullable=False)
+    awarded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class MoodEntry(db.Model):
     __tablename__ = 'mood_entry'
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        db.Index('ix_mood_entry_user_timestamp', 'user_id', 'timestamp'),
+        # Idempotent retries of entries synced from the mobile app
+        db.Index('ix_mood_entry_user_client_id', 'user_id', 'client_id', unique=True),
+        {'extend_existing': True}
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -869,6 +1339,7 @@ class MoodEntry(db.Model):
     emotions = db.Column(db.JSON)  # Store selected emotion tags
     notes = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    client_id = db.Column(db.String(64))  # Set by the app for offline entries
     
     # Add relationship to User model
     user = db.relationship('User', backref=db.backref('mood_entries', lazy=True))
@@ -880,7 +1351,144 @@ class MoodEntry(db.Model):
             'emotions': self.emotions,
             'notes': self.notes,
             'timestamp': self.timestamp.isoformat(),
+            'client_id': self.client_id,
         }
+
+class MoodEntryEmotion(db.Model):
+    """One emotion tag of a mood entry, so tag queries use indexes"""
+    __tablename__ = 'mood_entry_emotion'
+    __table_args__ = (
+        db.Index('ix_mood_entry_emotion_entry_tag', 'entry_id', 'tag', unique=True),
+        db.Index('ix_mood_entry_emotion_user_tag_timestamp', 'user_id', 'tag', 'timestamp'),
+        db.Index('ix_mood_entry_emotion_user_timestamp', 'user_id', 'timestamp'),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entry_id = db.Column(db.Integer, db.ForeignKey('mood_entry.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    tag = db.Column(db.String(50), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)  # Copied from the entry
+
+    @staticmethod
+    def normalize_tag(tag: Any) -> Optional[str]:
+        """Case-folded, trimmed tag, or None if it is not a usable tag"""
+        if not isinstance(tag, str):
+            return None
+        tag = ' '.join(tag.split()).casefold()[:50]
+        return tag or None
+
+    @classmethod
+    def rows_for(cls, entry_id: int, user_id: int, timestamp: datetime,
+                 emotions: Any) -> List[Dict[str, Any]]:
+        """Insertable rows for the distinct tags of one mood entry"""
+        tags = {cls.normalize_tag(tag) for tag in emotions} if isinstance(emotions, list) else set()
+        tags.discard(None)
+        return [
+            {'entry_id': entry_id, 'user_id': user_id, 'tag': tag, 'timestamp': timestamp}
+            for tag in sorted(tags)
+        ]
+
+    @classmethod
+    def backfill(cls, user_ids: List[int]) -> int:
+        """
+        Re-index the tags of some users' mood entries, replacing existing
+        rows; see backfills.py.
+
+        Args:
+            user_ids (List[int]): Users to rebuild
+
+        Returns:
+            int: Number of tag rows created
+        """
+        cls.query.filter(cls.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+        created = 0
+        batch = []
+        entries = db.session.query(
+            MoodEntry.id, MoodEntry.user_id, MoodEntry.timestamp, MoodEntry.emotions
+        ).filter(MoodEntry.user_id.in_(user_ids), MoodEntry.timestamp.isnot(None)).yield_per(10000)
+        for entry_id, user_id, timestamp, emotions in entries:
+            batch.extend(cls.rows_for(entry_id, user_id, timestamp, emotions))
+            if len(batch) >= 10000:
+                db.session.execute(db.insert(cls), batch)
+                created += len(batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(cls), batch)
+            created += len(batch)
+        return created
+
+class MoodDailyRollup(db.Model):
+    """Per-user daily mood aggregates, maintained as entries are created"""
+    __tablename__ = 'mood_daily_rollup'
+    __table_args__ = (
+        db.Index('ix_mood_daily_rollup_user_day', 'user_id', 'day', unique=True),
+        {'extend_existing': True}
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)  # UTC day of the entries
+    entry_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    mood_sum = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    mood_min = db.Column(db.Integer)
+    mood_max = db.Column(db.Integer)
+    emotion_counts = db.Column(db.JSON)  # emotion tag -> number of entries
+
+    def add_entry(self, mood_level: int, emotions: Any) -> None:
+        """Fold one mood entry into the day's aggregates"""
+        self.entry_count = (self.entry_count or 0) + 1
+        self.mood_sum = (self.mood_sum or 0) + mood_level
+        self.mood_min = mood_level if self.mood_min is None else min(self.mood_min, mood_level)
+        self.mood_max = mood_level if self.mood_max is None else max(self.mood_max, mood_level)
+        # Reassigned rather than mutated so the JSON change is persisted
+        counts = dict(self.emotion_counts or {})
+        # Tags are normalized like MoodEntryEmotion so 'Happy' and 'happy' count together
+        tags = {MoodEntryEmotion.normalize_tag(tag) for tag in emotions} if isinstance(emotions, list) else set()
+        tags.discard(None)
+        for tag in tags:
+            counts[tag] = counts.get(tag, 0) + 1
+        self.emotion_counts = counts
+
+    def to_dict(self):
+        return {
+            'date': self.day.isoformat(),
+            'entry_count': self.entry_count,
+            'average_mood': self.mood_sum / self.entry_count if self.entry_count else None,
+            'min_mood': self.mood_min,
+            'max_mood': self.mood_max,
+            'emotion_counts': self.emotion_counts or {}
+        }
+
+    @classmethod
+    def backfill(cls, user_ids: List[int]) -> int:
+        """
+        Rebuild the rollups of some users from their mood entries, replacing
+        existing rows; see backfills.py.
+
+        Args:
+            user_ids (List[int]): Users to rebuild
+
+        Returns:
+            int: Number of rollup rows created
+        """
+        cls.query.filter(cls.user_id.in_(user_ids)).delete(synchronize_session=False)
+
+        rollups = {}
+        entries = db.session.query(
+            MoodEntry.user_id, MoodEntry.timestamp, MoodEntry.mood_level, MoodEntry.emotions
+        ).filter(MoodEntry.user_id.in_(user_ids), MoodEntry.timestamp.isnot(None)).yield_per(10000)
+        for user_id, timestamp, mood_level, emotions in entries:
+            key = (user_id, timestamp.date())
+            rollup = rollups.get(key)
+            if rollup is None:
+                rollup = rollups[key] = cls(user_id=user_id, day=key[1])
+            rollup.add_entry(mood_level, emotions)
+
+        db.session.add_all(rollups.values())
+        return len(rollups)
+
 class ChatRequest(db.Model):
     __tablename__ = 'chat_request'
     __table_args__ = {'extend_existing': True}
@@ -945,4 +1553,91 @@ def init_auth(app: Flask, user_model: Any) -> LoginManager:
         LoginManager: Configured login manager instance
     """
     auth_config = AuthConfig(app, user_model)
-    return auth_config.login_manager
\ No newline at end of file
+    return auth_config.login_manager
+
+class BackfillProgress(db.Model):
+    """Checkpoint of a backfill job, see backfills.py"""
+    __tablename__ = 'backfill_progress'
+    __table_args__ = {'extend_existing': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    # Highest user or item id processed; the next batch starts after it
+    last_id = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    processed = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+
+def ensure_schema() -> set:
+    """
+    Bring an existing database up to date with the models.
+
+    ``db.create_all`` only creates missing tables. Columns and indexes that
+    were added to models whose tables already exist are applied here, so
+    older databases keep working without a separate migration step.
+
+    Returns:
+        set: ``(table, column)`` pairs that were added, so callers can
+        backfill derived columns
+
+    Raises:
+        RuntimeError: If existing rows conflict with a new unique index;
+        they are never deleted here, see migrate_unique_indexes.py
+    """
+    from sqlalchemy import inspect as sa_inspect
+    from sqlalchemy.schema import CreateColumn
+
+    engine = db.engine
+    inspector = sa_inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = set()
+    conflicts = []
+
+    with engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                table_name = engine.dialect.identifier_preparer.quote(table.name)
+                conn.exec_driver_sql(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}")
+                added.add((table.name, column.name))
+
+            indexed = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.unique and index.name not in indexed and duplicate_keys(conn, table, index):
+                    conflicts.append(index.name)
+                    continue
+                index.create(conn, checkfirst=True)
+
+    if conflicts:
+        raise RuntimeError(
+            f"Existing rows conflict with unique indexes {', '.join(conflicts)}; "
+            f"run `python migrate_unique_indexes.py` to review and resolve them"
+        )
+    return added
+
+
+def duplicate_keys(conn, table, index) -> List[Tuple]:
+    """
+    Keys that occur more than once among the rows of a table, which keep a
+    unique index from being created. Rows with a NULL key never conflict.
+
+    Returns:
+        List[Tuple]: Key values followed by the number of rows with them
+    """
+    from sqlalchemy import and_, select
+
+    columns = list(index.columns)
+    count = func.count()
+    return [tuple(row) for row in conn.execute(
+        select(*columns, count)
+        .where(and_(*(column.isnot(None) for column in columns)))
+        .group_by(*columns)
+        .having(count > 1)
+    )]
@@ -1,12 +1,32 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from datetime import datetime, timedelta
-from sqlalchemy import func
-from models import MoodEntry, User
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, func, insert, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+import numpy as np
+from models import ActivityCalendar, MoodDailyRollup, MoodEntry, MoodEntryEmotion, User
+from counters import counters
+from achievements.utils import achievements
+from downsample import downsample, parse_args as parse_downsample_args
 from extensions import db
 
 mood_bp = Blueprint('mood', __name__)
 
+# Longest history window, in days
+MAX_HISTORY_DAYS = 366
+# Windows up to this many days also return the individual entries
+MAX_ENTRY_DAYS = 31
+# Offline sync limits
+MAX_BATCH_ENTRIES = 500
+MAX_CLIENT_ID_LENGTH = 64
+MAX_CLOCK_SKEW = timedelta(minutes=5)
+# Emotion tag queries
+FREQUENCY_BUCKETS = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m'}
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+
 @mood_bp.route('/entry', methods=['POST'])
 @login_required
 def create_mood_entry():
@@ -28,52 +48,272 @@ def create_mood_entry():
         )
         
         db.session.add(new_entry)
-        db.session.commit()
+        db.session.flush()
+        index_emotions([(new_entry.id, new_entry.timestamp, new_entry.emotions)])
+        add_to_rollups(current_user.id, [(new_entry.timestamp, new_entry.mood_level, new_entry.emotions)])
         
         # Update user's current emotional state for the chatbot
-        current_user.current_mood = data['mood_level']
-        current_user.current_emotions = data.get('emotions', [])
+        update_current_mood(current_user, new_entry.timestamp, new_entry.mood_level, new_entry.emotions)
+        awarded = record_mood_achievements(current_user.id)
         db.session.commit()
         
         return jsonify({
             'message': 'Mood entry created successfully',
-            'entry': new_entry.to_dict()
+            'entry': new_entry.to_dict(),
+            'achievements': awarded
         })
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@mood_bp.route('/entries/batch', methods=['POST'])
+@login_required
+def create_mood_entries():
+    """
+    Create mood entries captured offline by the mobile app.
+
+    Each entry carries a client-generated ``client_id``; entries whose id
+    was already stored are reported as duplicates, so a batch can be
+    retried safely. Invalid entries are rejected individually, the valid
+    ones are inserted in one transaction.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('entries')
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'A non-empty list of entries is required'}), 400
+        if len(items) > MAX_BATCH_ENTRIES:
+            return jsonify({'error': f'At most {MAX_BATCH_ENTRIES} entries per batch'}), 400
+
+        entries, rejected = validate_batch(items)
+
+        # Idempotent retries: skip ids stored by an earlier attempt
+        client_ids = [entry['client_id'] for entry in entries]
+        stored = {client_id for client_id, in db.session.query(MoodEntry.client_id).filter(
+            MoodEntry.user_id == current_user.id,
+            MoodEntry.client_id.in_(client_ids)
+        )} if client_ids else set()
+        entries = [entry for entry in entries if entry['client_id'] not in stored]
+
+        if entries:
+            inserted = db.session.execute(
+                insert(MoodEntry).returning(MoodEntry.id, MoodEntry.client_id),
+                [{**entry, 'user_id': current_user.id} for entry in entries]
+            )
+            entry_ids = {client_id: entry_id for entry_id, client_id in inserted}
+            index_emotions([
+                (entry_ids[entry['client_id']], entry['timestamp'], entry['emotions']) for entry in entries
+            ])
+            add_to_rollups(current_user.id, [
+                (entry['timestamp'], entry['mood_level'], entry['emotions']) for entry in entries
+            ])
+            latest = max(entries, key=lambda entry: entry['timestamp'])
+            update_current_mood(current_user, latest['timestamp'], latest['mood_level'], latest['emotions'])
+            awarded = record_mood_achievements(current_user.id)
+            db.session.commit()
+
+        return jsonify({
+            'created': [entry['client_id'] for entry in entries],
+            'duplicates': sorted(stored),
+            'rejected': rejected,
+            'achievements': awarded if entries else []
+        })
+
+    except IntegrityError:
+        # A concurrent retry stored some of these ids first; retrying sorts it out
+        db.session.rollback()
+        return jsonify({'error': 'Entries were stored concurrently, please retry'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @mood_bp.route('/history', methods=['GET'])
 @login_required
 def get_mood_history():
-    """Get user's mood history with optional date filtering"""
+    """
+    Get user's mood history over the last ``days`` days, including today.
+
+    Statistics and the daily series come from the daily rollups; entries
+    are only listed for windows of up to MAX_ENTRY_DAYS days. With
+    ``points`` a chart ``series`` of at most that many points is added,
+    built from the entries when listed and from the rollups otherwise
+    (``mode`` 'lttb' or 'minmax', see downsample).
+    """
     try:
         # Get query parameters for filtering
         days = request.args.get('days', default=7, type=int)
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Query mood entries
-        entries = MoodEntry.query.filter(
-            MoodEntry.user_id == current_user.id,
-            MoodEntry.timestamp >= start_date
-        ).order_by(MoodEntry.timestamp).all()
-        
+        days = max(1, min(days, MAX_HISTORY_DAYS))
+        try:
+            points, mode = parse_downsample_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        start_day = datetime.utcnow().date() - timedelta(days=days - 1)
+
+        rollups = MoodDailyRollup.query.filter(
+            MoodDailyRollup.user_id == current_user.id,
+            MoodDailyRollup.day >= start_day
+        ).order_by(MoodDailyRollup.day).all()
+
+        entries = []
+        if days <= MAX_ENTRY_DAYS:
+            entries = MoodEntry.query.filter(
+                MoodEntry.user_id == current_user.id,
+                MoodEntry.timestamp >= datetime.combine(start_day, datetime.min.time())
+            ).order_by(MoodEntry.timestamp).all()
+
         # Calculate mood statistics
         stats = {
-            'average_mood': calculate_average_mood(entries),
-            'common_emotions': get_common_emotions(entries),
-            'total_entries': len(entries)
+            'average_mood': calculate_average_mood(rollups),
+            'common_emotions': get_common_emotions(rollups),
+            'total_entries': sum(rollup.entry_count for rollup in rollups)
         }
         
-        return jsonify({
+        response = {
+            'days': days,
             'entries': [entry.to_dict() for entry in entries],
+            'daily': [rollup.to_dict() for rollup in rollups],
             'statistics': stats
-        })
+        }
+        if points is not None:
+            response['series'] = mood_series(entries if days <= MAX_ENTRY_DAYS else None,
+                                             rollups, points, mode)
+        return jsonify(response)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@mood_bp.route('/emotions/frequency', methods=['GET'])
+@login_required
+def get_emotion_frequency():
+    """
+    Count the user's emotion tags per day, week or month.
+
+    Query parameters: ``days`` (window, default 30), ``bucket`` (day, week
+    or month) and ``tags`` (comma-separated, default all tags).
+    """
+    try:
+        days, since = emotion_window()
+        bucket = request.args.get('bucket', 'day')
+        if bucket not in FREQUENCY_BUCKETS:
+            return jsonify({'error': f"bucket must be one of {', '.join(FREQUENCY_BUCKETS)}"}), 400
+        tags = [MoodEntryEmotion.normalize_tag(tag) for tag in request.args.get('tags', '').split(',')]
+        tags = [tag for tag in tags if tag]
+
+        period = func.strftime(FREQUENCY_BUCKETS[bucket], MoodEntryEmotion.timestamp).label('period')
+        query = db.session.query(
+            MoodEntryEmotion.tag, period, func.count(MoodEntryEmotion.id)
+        ).filter(
+            MoodEntryEmotion.user_id == current_user.id,
+            MoodEntryEmotion.timestamp >= since
+        )
+        if tags:
+            query = query.filter(MoodEntryEmotion.tag.in_(tags))
+        rows = query.group_by(MoodEntryEmotion.tag, period).order_by(period).all()
+
+        totals = Counter()
+        series = {}
+        for tag, tag_period, count in rows:
+            totals[tag] += count
+            series.setdefault(tag, []).append({'period': tag_period, 'count': count})
+
+        return jsonify({
+            'days': days,
+            'bucket': bucket,
+            'tags': [{'tag': tag, 'count': count} for tag, count in totals.most_common()],
+            'series': series
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mood_bp.route('/emotions/co-occurrence', methods=['GET'])
+@login_required
+def get_emotion_co_occurrence():
+    """
+    Count how often pairs of emotion tags were logged on the same entry.
+
+    Query parameters: ``days`` (window, default 30), ``tag`` (only pairs
+    with this tag) and ``limit`` (number of pairs).
+    """
+    try:
+        days, since = emotion_window()
+        tag = MoodEntryEmotion.normalize_tag(request.args.get('tag'))
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+        first = aliased(MoodEntryEmotion)
+        second = aliased(MoodEntryEmotion)
+        query = db.session.query(
+            first.tag, second.tag, func.count().label('count')
+        ).join(
+            second, and_(second.entry_id == first.entry_id, second.tag != first.tag)
+        ).filter(
+            first.user_id == current_user.id,
+            first.timestamp >= since
+        )
+        # Each pair once, or every partner of the requested tag
+        query = query.filter(first.tag == tag) if tag else query.filter(first.tag < second.tag)
+        rows = query.group_by(first.tag, second.tag)\
+            .order_by(func.count().desc(), first.tag, second.tag).limit(limit).all()
+
+        return jsonify({
+            'days': days,
+            'tag': tag,
+            'pairs': [{'tags': [a, b], 'count': count} for a, b, count in rows]
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@mood_bp.route('/entries', methods=['GET'])
+@login_required
+def get_entries_by_emotion():
+    """
+    List the user's entries with an emotion tag, newest first.
+
+    Query parameters: ``tag`` (required), ``limit`` and ``before`` (the
+    ``next_before`` of the previous page).
+    """
+    try:
+        tag = MoodEntryEmotion.normalize_tag(request.args.get('tag'))
+        if not tag:
+            return jsonify({'error': 'tag is required'}), 400
+        limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+
+        query = db.session.query(MoodEntry).join(
+            MoodEntryEmotion, MoodEntryEmotion.entry_id == MoodEntry.id
+        ).filter(
+            MoodEntryEmotion.user_id == current_user.id,
+            MoodEntryEmotion.tag == tag
+        )
+        before = request.args.get('before', type=int)
+        if before is not None:
+            anchor = db.session.query(MoodEntryEmotion.timestamp).filter(
+                MoodEntryEmotion.user_id == current_user.id,
+                MoodEntryEmotion.entry_id == before,
+                MoodEntryEmotion.tag == tag
+            ).scalar()
+            if anchor is None:
+                return jsonify({'error': 'Invalid before'}), 400
+            query = query.filter(or_(
+                MoodEntryEmotion.timestamp < anchor,
+                and_(MoodEntryEmotion.timestamp == anchor, MoodEntryEmotion.entry_id < before)
+            ))
+
+        entries = query.order_by(MoodEntryEmotion.timestamp.desc(), MoodEntryEmotion.entry_id.desc())\
+            .limit(limit + 1).all()
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        return jsonify({
+            'tag': tag,
+            'entries': [entry.to_dict() for entry in entries],
+            'next_before': entries[-1].id if has_more else None
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @mood_bp.route('/recent', methods=['GET'])
 @login_required
 def get_recent_mood():
@@ -91,29 +331,181 @@ def get_recent_mood():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def calculate_average_mood(entries):
-    """Calculate average mood level from entries"""
-    if not entries:
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into naive UTC, or None if invalid"""
+    if not isinstance(value, str):
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
         return None
-    return sum(entry.mood_level for entry in entries) / len(entries)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
 
-def get_common_emotions(entries):
-    """Get most common emotions from entries"""
-    if not entries:
-        return []
-        
-    emotion_counts = {}
-    for entry in entries:
-        for emotion in entry.emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
-            
-    # Sort by count and return top emotions
-    sorted_emotions = sorted(
-        emotion_counts.items(),
-        key=lambda x: x[1],
-        reverse=True
+def validate_batch(items):
+    """
+    Validate a batch of offline mood entries.
+
+    Type checks run per entry in Python; the range checks are NumPy
+    comparisons over the whole batch. Each rejected entry reports the
+    first rule it fails.
+
+    Returns:
+        Tuple[List[dict], List[dict]]: Insertable entry rows, and
+        ``{'index', 'client_id', 'error'}`` for every rejected entry
+    """
+    count = len(items)
+    items = [item if isinstance(item, dict) else {} for item in items]
+    client_ids = [item.get('client_id') for item in items]
+    levels = [item.get('mood_level') for item in items]
+    emotions = [item.get('emotions', []) for item in items]
+    notes = [item.get('notes') for item in items]
+    timestamps = [parse_timestamp(item.get('timestamp')) for item in items]
+
+    now = datetime.utcnow()
+    oldest = now - timedelta(days=MAX_HISTORY_DAYS)
+    valid_id = np.array([isinstance(client_id, str) and 0 < len(client_id) <= MAX_CLIENT_ID_LENGTH
+                         for client_id in client_ids], dtype=bool)
+    is_int = np.array([isinstance(level, int) and not isinstance(level, bool) for level in levels], dtype=bool)
+    level_values = np.array([level if ok else 0 for level, ok in zip(levels, is_int)], dtype=np.int64)
+    has_time = np.array([timestamp is not None for timestamp in timestamps], dtype=bool)
+    time_values = np.array([timestamp or now for timestamp in timestamps], dtype='datetime64[us]')
+    valid_emotions = np.array([isinstance(tags, list) and all(isinstance(tag, str) for tag in tags)
+                               for tags in emotions], dtype=bool)
+
+    checks = [
+        (valid_id, f'client_id must be a string of 1 to {MAX_CLIENT_ID_LENGTH} characters'),
+        (is_int & (level_values >= 1) & (level_values <= 5), 'Valid mood level (1-5) is required'),
+        (has_time, 'timestamp must be an ISO 8601 date and time'),
+        (time_values <= np.datetime64(now + MAX_CLOCK_SKEW), 'timestamp is in the future'),
+        (time_values >= np.datetime64(oldest), f'timestamp is older than {MAX_HISTORY_DAYS} days'),
+        (valid_emotions, 'emotions must be a list of strings'),
+    ]
+
+    # The first otherwise valid entry of each client id wins within a batch
+    valid = np.logical_and.reduce([passed for passed, _ in checks])
+    is_first = np.ones(count, dtype=bool)
+    if valid.any():
+        candidates = np.flatnonzero(valid)
+        _, first = np.unique(np.array([client_ids[i] for i in candidates]), return_index=True)
+        is_first[candidates] = False
+        is_first[candidates[first]] = True
+    checks.append((is_first, 'Duplicate client_id in batch'))
+
+    # Report the first failed check of each entry
+    error = np.full(count, -1)
+    for check_index, (passed, _) in reversed(list(enumerate(checks))):
+        error[~passed] = check_index
+
+    entries = [
+        {
+            'client_id': client_ids[i],
+            'mood_level': levels[i],
+            'emotions': emotions[i],
+            'notes': notes[i] if isinstance(notes[i], str) else '',
+            'timestamp': timestamps[i]
+        }
+        for i in np.flatnonzero(error < 0)
+    ]
+    rejected = [
+        {'index': int(i), 'client_id': client_ids[i], 'error': checks[error[i]][1]}
+        for i in np.flatnonzero(error >= 0)
+    ]
+    return entries, rejected
+
+def index_emotions(entries):
+    """
+    Add the emotion tags of new entries of the current user to the tag index.
+
+    Args:
+        entries: ``(entry_id, timestamp, emotions)`` of each entry
+    """
+    rows = [
+        row for entry_id, timestamp, emotions in entries
+        for row in MoodEntryEmotion.rows_for(entry_id, current_user.id, timestamp, emotions)
+    ]
+    if rows:
+        db.session.execute(insert(MoodEntryEmotion), rows)
+
+def emotion_window():
+    """Start of the ``days`` query window, clamped like the history window"""
+    days = request.args.get('days', default=30, type=int)
+    days = max(1, min(days, MAX_HISTORY_DAYS))
+    start_day = datetime.utcnow().date() - timedelta(days=days - 1)
+    return days, datetime.combine(start_day, datetime.min.time())
+
+def add_to_rollups(user_id, readings):
+    """
+    Fold new mood entries into their days' rollups and mark the days in
+    the user's mood calendar, in the entries' transaction; every affected
+    day is read and written once.
+
+    Args:
+        user_id (int): Owner of the entries
+        readings: ``(timestamp, mood_level, emotions)`` of each entry
+    """
+    days = {timestamp.date() for timestamp, _, _ in readings}
+    for day in days:
+        counters.claim(MoodDailyRollup, user_id=user_id, day=day)
+        ActivityCalendar.mark(user_id, 'mood', day)
+    rollups = {
+        rollup.day: rollup for rollup in MoodDailyRollup.query.filter(
+            MoodDailyRollup.user_id == user_id,
+            MoodDailyRollup.day.in_(days)
+        ).with_for_update()
+    }
+    for timestamp, mood_level, emotions in readings:
+        rollups[timestamp.date()].add_entry(mood_level, emotions)
+
+def update_current_mood(user, timestamp, mood_level, emotions):
+    """Record a check-in as the user's current mood unless a newer one exists"""
+    if user.current_mood_at is None or timestamp >= user.current_mood_at:
+        user.current_mood = mood_level
+        user.current_emotions = emotions
+        user.current_mood_at = timestamp
+
+def record_mood_achievements(user_id):
+    """Award mood logging achievements from the user's mood calendar"""
+    calendar = ActivityCalendar.load(user_id, 'mood')
+    return achievements.record(user_id, 'mood', {
+        'days_logged': len(calendar),
+        'streak': calendar.current_streak(datetime.utcnow().date())
+    })
+
+def mood_series(entries, rollups, points, mode):
+    """Downsampled mood chart from entries, or from daily rollups if None"""
+    if entries is not None:
+        return downsample([entry.timestamp for entry in entries],
+                          [entry.mood_level for entry in entries], points, mode)
+
+    rollups = [rollup for rollup in rollups if rollup.entry_count]
+    return downsample(
+        [datetime.combine(rollup.day, datetime.min.time()) for rollup in rollups],
+        [rollup.mood_sum / rollup.entry_count for rollup in rollups],
+        points, mode,
+        minimums=[rollup.mood_min for rollup in rollups],
+        maximums=[rollup.mood_max for rollup in rollups],
+        counts=[rollup.entry_count for rollup in rollups]
     )
-    return [emotion for emotion, _ in sorted_emotions[:5]]  # Return top 5
+
+def calculate_average_mood(rollups):
+    """Calculate average mood level from daily rollups"""
+    total_entries = sum(rollup.entry_count for rollup in rollups)
+    if not total_entries:
+        return None
+    return sum(rollup.mood_sum for rollup in rollups) / total_entries
+
+def get_common_emotions(rollups):
+    """Get most common emotions from daily rollups"""
+    emotion_counts = Counter()
+    for rollup in rollups:
+        # Rollups written before tags were normalized may still hold raw tags
+        for emotion, count in (rollup.emotion_counts or {}).items():
+            tag = MoodEntryEmotion.normalize_tag(emotion)
+            if tag:
+                emotion_counts[tag] += count
+    return [emotion for emotion, _ in emotion_counts.most_common(5)]  # Return top 5
 
 def register_mood_routes(app):
     """Register mood tracking routes with the application"""
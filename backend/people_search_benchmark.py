@@ -0,0 +1,96 @@
+"""
+Per-keystroke latency benchmark for the people search prefix index.
+
+Builds the index over synthetic users and replays typing names one
+character at a time, as the autocomplete box does.
+
+Usage:
+    python people_search_benchmark.py [--users 1000000] [--friends 200] [--typed 500]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from friends.people_index import PeopleIndex
+
+FIRST_NAMES = [
+    'aarav', 'aditi', 'alice', 'amara', 'ananya', 'arjun', 'bella', 'carlos', 'chen',
+    'daniel', 'deepa', 'elena', 'emma', 'farah', 'gabriel', 'hana', 'ishaan', 'ivan',
+    'jia', 'kavya', 'liam', 'lucia', 'maya', 'mohammed', 'nia', 'noah', 'olivia',
+    'priya', 'rahul', 'sara', 'sofia', 'tariq', 'uma', 'vikram', 'wei', 'yara', 'zoe'
+]
+SMILE_REASONS = [
+    'family', 'friends', 'work', 'studies', 'health', 'music', 'travel', 'pets',
+    'sports', 'nature', 'art', 'food'
+]
+
+
+def synthetic_name(rng):
+    """A first name plus a random pronounceable surname"""
+    syllables = ['ka', 'ri', 'so', 'me', 'lan', 'dor', 'vi', 'ta', 'nu', 'shi', 'ro', 'bel']
+    surname = ''.join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+    return f'{rng.choice(FIRST_NAMES).title()} {surname.title()}'
+
+
+def keystrokes(name):
+    """Every prefix typed while entering a name, e.g. 'a', 'al', ..."""
+    return [name[:length] for length in range(1, len(name) + 1) if not name[length - 1].isspace()]
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{name:<28} median={statistics.median(timings) * 1000:>8.1f} us  "
+          f"p99={p99 * 1000:>8.1f} us  max={timings[-1] * 1000:>8.1f} us  n={len(timings)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--friends', type=int, default=200)
+    parser.add_argument('--typed', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    people = [
+        (user_id, synthetic_name(rng), rng.choice(SMILE_REASONS))
+        for user_id in range(1, args.users + 1)
+    ]
+
+    index = PeopleIndex()
+    started = time.perf_counter()
+    index.load(people)
+    print(f"Loaded {len(index)} users in {time.perf_counter() - started:.1f}s")
+
+    friends = set(rng.sample(range(1, args.users + 1), args.friends))
+    typed = [name for _, name, _ in rng.sample(people, args.typed)]
+
+    for label, reason in (('keystroke', None), ('keystroke, same reason', 'music')):
+        timings = []
+        for name in typed:
+            for prefix in keystrokes(name):
+                started = time.perf_counter()
+                index.search(prefix, limit=10, exclude=friends, smile_reason=reason)
+                timings.append((time.perf_counter() - started) * 1000)
+        report(label, timings)
+
+    # Incremental maintenance on register and smile reason updates
+    timings = []
+    for user_id in range(args.users + 1, args.users + 1001):
+        started = time.perf_counter()
+        index.add(user_id, synthetic_name(rng), rng.choice(SMILE_REASONS))
+        timings.append((time.perf_counter() - started) * 1000)
+    report('register (add)', timings)
+
+    timings = []
+    for user_id in rng.sample(range(1, args.users + 1), 1000):
+        started = time.perf_counter()
+        index.set_smile_reason(user_id, rng.choice(SMILE_REASONS))
+        timings.append((time.perf_counter() - started) * 1000)
+    report('smile reason update', timings)
+
+
+if __name__ == '__main__':
+    main()
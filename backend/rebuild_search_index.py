@@ -0,0 +1,32 @@
+"""
+Rebuild the full-text search index from the blog, community post and message tables.
+
+Run after restoring a database backup or when the index has drifted, e.g.
+because rows were edited outside the application.
+
+Usage:
+    python rebuild_search_index.py [--only blogs|posts|messages]
+"""
+import argparse
+
+from search.utils import FTS_INDEXES, search_index
+
+
+def rebuild_search_index(app, only=None):
+    """
+    Rebuild one or all search indexes
+    """
+    with app.app_context():
+        counts = search_index.rebuild(only)
+        for name, count in counts.items():
+            print(f"Indexed {count} {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--only', choices=sorted(FTS_INDEXES))
+    args = parser.parse_args()
+
+    # Importing app creates the application
+    from app import app
+    rebuild_search_index(app, args.only)
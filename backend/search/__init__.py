@@ -0,0 +1,17 @@
+from flask import Blueprint
+
+search_bp = Blueprint('search', __name__)
+
+def create_search_routes(app, db):
+    """
+    Register full-text search routes with the Flask application.
+    
+    Args:
+        app: Flask application instance
+        db: SQLAlchemy database instance
+    """
+    from .routes import register_search_routes
+    from .utils import search_index
+    search_index.ensure_tables()
+    register_search_routes(search_bp, db)
+    app.register_blueprint(search_bp, url_prefix='/search')
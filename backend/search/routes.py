@@ -0,0 +1,61 @@
+from flask import request, jsonify
+from flask_login import login_required, current_user
+import logging
+
+from .utils import search_index
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS_PER_PAGE = 50
+
+
+def register_search_routes(bp, db):
+    def page_size():
+        limit = request.args.get('limit', 20, type=int)
+        return max(1, min(limit, MAX_RESULTS_PER_PAGE))
+
+    @bp.route('/blogs', methods=['GET'])
+    @login_required
+    def search_blogs():
+        """Search blogs by title and content, best matches first"""
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Search query is required'}), 400
+        if not search_index.available:
+            return jsonify({'error': 'Search is not available'}), 503
+
+        try:
+            return jsonify(search_index.search_blogs(
+                query,
+                limit=page_size(),
+                cursor=request.args.get('cursor')
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.error(f"Error searching blogs: {str(e)}")
+            return jsonify({'error': 'Failed to search blogs'}), 500
+
+    @bp.route('/posts', methods=['GET'])
+    @login_required
+    def search_posts():
+        """Search posts of the communities the user has joined"""
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Search query is required'}), 400
+        if not search_index.available:
+            return jsonify({'error': 'Search is not available'}), 503
+
+        try:
+            return jsonify(search_index.search_posts(
+                query,
+                user_id=current_user.id,
+                community_id=request.args.get('community_id', type=int),
+                limit=page_size(),
+                cursor=request.args.get('cursor')
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.error(f"Error searching posts: {str(e)}")
+            return jsonify({'error': 'Failed to search posts'}), 500
@@ -0,0 +1,363 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from cursors import decode_cursor, encode_cursor
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+HIGHLIGHT_OPEN = '<mark>'
+HIGHLIGHT_CLOSE = '</mark>'
+TOKENIZER = 'porter unicode61 remove_diacritics 2'
+
+# name -> (FTS table, column definitions, insert columns, source query).
+# The source row id is used as rowid so results join back to it directly.
+FTS_INDEXES = {
+    'blogs': (
+        'blog_fts', 'title, content', 'rowid, title, content',
+        "SELECT id, coalesce(title, ''), coalesce(content, '') FROM blog"
+    ),
+    'posts': (
+        'community_post_fts', 'content, community_id UNINDEXED', 'rowid, content, community_id',
+        "SELECT id, coalesce(content, ''), community_id FROM community_post"
+    ),
+    # Private messages only; participants holds one "u<id>" token per user
+    # so restricting a search to the caller's conversations uses the index
+    'messages': (
+        'message_fts', 'content, participants', 'rowid, content, participants',
+        "SELECT id, coalesce(content, ''), 'u' || sender_id || ' u' || receiver_id "
+        "FROM message WHERE receiver_id IS NOT NULL"
+    ),
+}
+
+# bm25 column weights: a match in a blog title counts ten times a body match
+BLOG_RANK = 'bm25(blog_fts, 10.0, 1.0)'
+POST_RANK = 'bm25(community_post_fts)'
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word is quoted so FTS5 operators typed by users are treated as
+    plain text, and the last word is matched as a prefix so results update
+    while the user is still typing.
+
+    Args:
+        query (str): Raw search text
+
+    Returns:
+        Optional[str]: MATCH expression, or None if the text has no words
+    """
+    terms = re.findall(r'\w+', query.lower())
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms[:-1]]
+    quoted.append(f'"{terms[-1]}"*')
+    return ' '.join(quoted)
+
+
+class SearchIndex:
+    """
+    Full-text index over blogs, community posts and private messages built
+    on SQLite FTS5.
+
+    The FTS tables keep their own copy of the indexed text with the source
+    row's id as rowid. Writes go through the caller's session so the index
+    commits or rolls back together with the blog or post change.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    @property
+    def available(self) -> bool:
+        """FTS5 is only available on SQLite databases"""
+        return self.db.engine.dialect.name == 'sqlite'
+
+    def ensure_tables(self) -> Dict[str, int]:
+        """
+        Create the FTS5 virtual tables if they do not exist.
+
+        A newly created table is filled from its source table right away, so
+        adding an index to an existing database needs no manual rebuild.
+
+        Returns:
+            Dict[str, int]: Number of indexed rows per newly created index
+        """
+        created = {}
+        if not self.available:
+            logger.warning("Full-text search disabled: FTS5 requires SQLite")
+            return created
+
+        with self.db.engine.begin() as conn:
+            existing = {row[0] for row in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )}
+            for name, (table, columns, _, _) in FTS_INDEXES.items():
+                if table in existing:
+                    continue
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, tokenize='{TOKENIZER}')"
+                )
+                created[name] = self._populate(conn, name)
+
+        return created
+
+    def index_blog(self, blog) -> None:
+        """Add or replace a blog in the index; the blog must have an id"""
+        if not self.available:
+            return
+        self.remove_blog(blog.id)
+        self.db.session.execute(
+            text("INSERT INTO blog_fts(rowid, title, content) VALUES (:id, :title, :content)"),
+            {'id': blog.id, 'title': blog.title or '', 'content': blog.content or ''}
+        )
+
+    def remove_blog(self, blog_id: int) -> None:
+        """Remove a blog from the index"""
+        if not self.available:
+            return
+        self.db.session.execute(text("DELETE FROM blog_fts WHERE rowid = :id"), {'id': blog_id})
+
+    def index_post(self, post) -> None:
+        """Add or replace a community post in the index; the post must have an id"""
+        if not self.available:
+            return
+        self.remove_post(post.id)
+        self.db.session.execute(
+            text("INSERT INTO community_post_fts(rowid, content, community_id) "
+                 "VALUES (:id, :content, :community_id)"),
+            {'id': post.id, 'content': post.content or '', 'community_id': post.community_id}
+        )
+
+    def remove_post(self, post_id: int) -> None:
+        """Remove a community post from the index"""
+        if not self.available:
+            return
+        self.db.session.execute(
+            text("DELETE FROM community_post_fts WHERE rowid = :id"), {'id': post_id}
+        )
+
+    def index_message(self, message) -> None:
+        """Add a private message to the index; group messages are not indexed"""
+        if not self.available or message.receiver_id is None:
+            return
+        self.db.session.execute(
+            text("INSERT INTO message_fts(rowid, content, participants) "
+                 "VALUES (:id, :content, :participants)"),
+            {
+                'id': message.id,
+                'content': message.content or '',
+                'participants': f'u{message.sender_id} u{message.receiver_id}'
+            }
+        )
+
+    def search_messages(self, query: str, user_id: int, friend_id: Optional[int] = None,
+                        limit: int = 20, before: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Search the private messages of one user, newest first.
+
+        Args:
+            query (str): Raw search text
+            user_id (int): ID of the searching user; only conversations this
+                user takes part in are searched
+            friend_id (Optional[int]): Restrict results to one conversation
+            limit (int): Maximum number of hits
+            before (Optional[int]): Only return messages with a lower id
+
+        Returns:
+            List[Dict]: Message ids with highlighted snippets
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        participants = f'participants : "u{user_id}"'
+        if friend_id is not None:
+            participants += f' AND participants : "u{friend_id}"'
+
+        params = {'match': f'{participants} AND content : ({match})', 'limit': limit,
+                  'open': HIGHLIGHT_OPEN, 'close': HIGHLIGHT_CLOSE}
+        before_filter = ''
+        if before is not None:
+            before_filter = 'AND message_fts.rowid < :before'
+            params['before'] = before
+
+        rows = self.db.session.execute(text(f"""
+            SELECT message_fts.rowid AS id,
+                   snippet(message_fts, 0, :open, :close, '...', 16) AS snippet
+            FROM message_fts
+            WHERE message_fts MATCH :match {before_filter}
+            ORDER BY message_fts.rowid DESC
+            LIMIT :limit
+        """), params).mappings().all()
+
+        return [dict(row) for row in rows]
+
+    def search_blogs(self, query: str, limit: int = 20,
+                     cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search blog titles and content ranked by BM25.
+
+        Args:
+            query (str): Raw search text
+            limit (int): Page size
+            cursor (Optional[str]): Cursor returned with the previous page
+
+        Returns:
+            Dict: Ranked results with highlighted title and snippet, and the
+            cursor of the next page or None
+        """
+        match = build_match_query(query)
+        if not match:
+            return {'results': [], 'next_cursor': None}
+
+        params = {'match': match, 'limit': limit + 1,
+                  'open': HIGHLIGHT_OPEN, 'close': HIGHLIGHT_CLOSE}
+        rows = self.db.session.execute(text(f"""
+            SELECT blog_fts.rowid AS id,
+                   {BLOG_RANK} AS score,
+                   highlight(blog_fts, 0, :open, :close) AS title,
+                   snippet(blog_fts, 1, :open, :close, '...', 24) AS snippet,
+                   blog.user_id AS user_id,
+                   blog.created_at AS created_at,
+                   "user".name AS author_name
+            FROM blog_fts
+            JOIN blog ON blog.id = blog_fts.rowid
+            LEFT JOIN "user" ON "user".id = blog.user_id
+            WHERE blog_fts MATCH :match {self._after(BLOG_RANK, 'blog_fts', cursor, params)}
+            ORDER BY score, blog_fts.rowid
+            LIMIT :limit
+        """), params).mappings().all()
+
+        return self._page(rows, limit, lambda row: {
+            'blog_id': row['id'],
+            'title': row['title'],
+            'snippet': row['snippet'],
+            'created_by': row['user_id'],
+            'author_name': row['author_name'] or 'Unknown',
+            'created_at': self._isoformat(row['created_at'])
+        })
+
+    def search_posts(self, query: str, user_id: int, community_id: Optional[int] = None,
+                     limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search community posts ranked by BM25.
+
+        Only posts of communities the user is a member of are returned.
+
+        Args:
+            query (str): Raw search text
+            user_id (int): ID of the searching user
+            community_id (Optional[int]): Restrict results to one community
+            limit (int): Page size
+            cursor (Optional[str]): Cursor returned with the previous page
+
+        Returns:
+            Dict: Ranked results with snippet and the next cursor or None
+        """
+        match = build_match_query(query)
+        if not match:
+            return {'results': [], 'next_cursor': None}
+
+        params = {'match': match, 'user_id': user_id, 'limit': limit + 1,
+                  'open': HIGHLIGHT_OPEN, 'close': HIGHLIGHT_CLOSE}
+        community_filter = ''
+        if community_id is not None:
+            community_filter = 'AND community_post_fts.community_id = :community_id'
+            params['community_id'] = community_id
+
+        rows = self.db.session.execute(text(f"""
+            SELECT community_post_fts.rowid AS id,
+                   {POST_RANK} AS score,
+                   snippet(community_post_fts, 0, :open, :close, '...', 32) AS snippet,
+                   community_post.community_id AS community_id,
+                   community_post.likes AS likes,
+                   community_post.created_at AS created_at,
+                   "user".name AS author_name
+            FROM community_post_fts
+            JOIN community_post ON community_post.id = community_post_fts.rowid
+            LEFT JOIN "user" ON "user".id = community_post.user_id
+            WHERE community_post_fts MATCH :match
+              AND community_post_fts.community_id IN (
+                  SELECT community_id FROM community_members WHERE user_id = :user_id
+              )
+              {community_filter}
+              {self._after(POST_RANK, 'community_post_fts', cursor, params)}
+            ORDER BY score, community_post_fts.rowid
+            LIMIT :limit
+        """), params).mappings().all()
+
+        return self._page(rows, limit, lambda row: {
+            'id': row['id'],
+            'community_id': row['community_id'],
+            'snippet': row['snippet'],
+            'author': row['author_name'] or 'Unknown',
+            'likes': row['likes'] or 0,
+            'created_at': self._isoformat(row['created_at'])
+        })
+
+    def rebuild(self, only: Optional[str] = None) -> Dict[str, int]:
+        """
+        Rebuild the index from the source tables.
+
+        Args:
+            only (Optional[str]): Name of a single index to rebuild, e.g. 'blogs'
+
+        Returns:
+            Dict[str, int]: Number of indexed rows per index
+        """
+        if not self.available:
+            raise RuntimeError('Full-text search requires SQLite with FTS5')
+
+        counts = self.ensure_tables()
+        with self.db.engine.begin() as conn:
+            for name in FTS_INDEXES:
+                if only in (None, name) and name not in counts:
+                    counts[name] = self._populate(conn, name)
+
+        return {name: count for name, count in counts.items() if only in (None, name)}
+
+    @staticmethod
+    def _populate(conn, name: str) -> int:
+        """Refill one FTS table from its source table and return its size"""
+        table, _, insert_columns, source = FTS_INDEXES[name]
+        conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql(f"INSERT INTO {table}({insert_columns}) {source}")
+        conn.exec_driver_sql(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        return conn.exec_driver_sql(f"SELECT count(*) FROM {table}").scalar()
+
+    @staticmethod
+    def _after(rank: str, table: str, cursor: Optional[str], params: Dict) -> str:
+        """Keyset condition continuing after the cursor position"""
+        if not cursor:
+            return ''
+        params['after_score'], params['after_id'] = decode_cursor(cursor, float)
+        return (f"AND ({rank} > :after_score OR "
+                f"({rank} = :after_score AND {table}.rowid > :after_id))")
+
+    @staticmethod
+    def _page(rows: List, limit: int, serialize) -> Dict[str, Any]:
+        """Trim the look-ahead row and build the next cursor"""
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            'results': [serialize(row) for row in rows],
+            'next_cursor': encode_cursor(rows[-1]['score'], rows[-1]['id']) if has_more else None
+        }
+
+    @staticmethod
+    def _isoformat(value) -> Optional[str]:
+        """Format a datetime read through a raw query, where SQLite returns text"""
+        if value is None:
+            return None
+        if isinstance(value, str):
+            return value.replace(' ', 'T', 1)
+        return value.isoformat()
+
+
+search_index = SearchIndex(db)
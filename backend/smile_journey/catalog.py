@@ -0,0 +1,111 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class MilestoneInfo:
+    """Immutable copy of a JourneyMilestone row"""
+    id: int
+    path_id: int
+    title: str
+    description: Optional[str]
+    order_number: int
+    milestone_type: Optional[str]
+    coins_reward: int
+    required_days: Optional[int]
+    required_activities: Optional[int]
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'type': self.milestone_type,
+            'order_number': self.order_number,
+            'coins_reward': self.coins_reward
+        }
+
+
+@dataclass(frozen=True)
+class PathInfo:
+    """Immutable copy of a JourneyPath row with its milestones in order"""
+    id: int
+    community_id: Optional[int]
+    name: str
+    description: Optional[str]
+    total_milestones: int
+    coins_per_milestone: int
+    milestones: Tuple[MilestoneInfo, ...]
+
+    def milestone_at(self, order_number: int) -> Optional[MilestoneInfo]:
+        """Milestone with the given order number, if any"""
+        for milestone in self.milestones:
+            if milestone.order_number == order_number:
+                return milestone
+        return None
+
+
+class JourneyCatalog:
+    """
+    In-memory copy of all journey paths and milestones.
+
+    Paths change only when a community's journey is created, so they are
+    loaded once into immutable structures indexed by path, milestone and
+    community; ``invalidate`` marks the catalog for reloading on next use.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths: Dict[int, PathInfo] = {}
+        self._milestones: Dict[int, MilestoneInfo] = {}
+        self._by_community: Dict[Optional[int], Tuple[PathInfo, ...]] = {}
+        self.loaded = False
+
+    def load(self, paths: Iterable[Dict], milestones: Iterable[Dict]) -> None:
+        """
+        Replace the catalog contents.
+
+        Args:
+            paths: Path columns, as keyword arguments of PathInfo without milestones
+            milestones: Milestone columns, as keyword arguments of MilestoneInfo
+        """
+        by_path: Dict[int, list] = {}
+        milestone_index = {}
+        for row in milestones:
+            milestone = MilestoneInfo(**row)
+            milestone_index[milestone.id] = milestone
+            by_path.setdefault(milestone.path_id, []).append(milestone)
+
+        path_index = {}
+        by_community: Dict[Optional[int], list] = {}
+        for row in paths:
+            path = PathInfo(milestones=tuple(sorted(
+                by_path.get(row['id'], ()), key=lambda milestone: milestone.order_number
+            )), **row)
+            path_index[path.id] = path
+            by_community.setdefault(path.community_id, []).append(path)
+
+        with self._lock:
+            self._paths = path_index
+            self._milestones = milestone_index
+            self._by_community = {community_id: tuple(sorted(paths, key=lambda path: path.id))
+                                  for community_id, paths in by_community.items()}
+            self.loaded = True
+
+    def invalidate(self) -> None:
+        """Reload on next use; the current contents are served until then"""
+        self.loaded = False
+
+    def path(self, path_id: int) -> Optional[PathInfo]:
+        return self._paths.get(path_id)
+
+    def milestone(self, milestone_id: int) -> Optional[MilestoneInfo]:
+        return self._milestones.get(milestone_id)
+
+    def community_paths(self, community_id: int) -> Tuple[PathInfo, ...]:
+        """Paths of a community, ordered by id"""
+        return self._by_community.get(community_id, ())
+
+    def __len__(self) -> int:
+        return len(self._paths)
@@ -0,0 +1,268 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event as sa_event, func
+from sqlalchemy.orm import Session
+
+from extensions import db
+from models import JourneyPath, UserJourneyProgress
+
+logger = logging.getLogger(__name__)
+
+_PENDING = 'leaderboard_pending'
+
+
+class ScoreIndex:
+    """
+    Fenwick tree counting users per integer score.
+
+    Counting the users above a score and finding the score of the k-th
+    highest user are O(log C) for scores below the capacity C, which
+    doubles whenever a larger score is added.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self.capacity = capacity
+        self.total = 0
+        self._tree = [0] * (capacity + 1)
+
+    def add(self, score: int, delta: int) -> None:
+        """Add delta users with a score"""
+        if score >= self.capacity:
+            self._grow(score)
+        self.total += delta
+        i = score + 1
+        while i <= self.capacity:
+            self._tree[i] += delta
+            i += i & -i
+
+    def count_below(self, score: int) -> int:
+        """Number of users with a score lower than the given one"""
+        i, count = min(score, self.capacity), 0
+        while i > 0:
+            count += self._tree[i]
+            i -= i & -i
+        return count
+
+    def count_above(self, score: int) -> int:
+        """Number of users with a score higher than the given one"""
+        return self.total - self.count_below(score + 1)
+
+    def kth_highest(self, k: int) -> int:
+        """Score of the k-th highest user, 1-based; k must be at most total"""
+        # Smallest score whose prefix count reaches the same user from below
+        remaining, position = self.total - k + 1, 0
+        step = 1 << self.capacity.bit_length()
+        while step:
+            if position + step <= self.capacity and self._tree[position + step] < remaining:
+                position += step
+                remaining -= self._tree[position]
+            step >>= 1
+        return position
+
+    def _grow(self, score: int) -> None:
+        """Raise the capacity above a score and rebuild the tree"""
+        capacity = self.capacity
+        while capacity <= score:
+            capacity *= 2
+
+        counts = [0] * (capacity + 1)
+        for i in range(1, self.capacity + 1):
+            counts[i] = self.count_below(i) - self.count_below(i - 1)
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                counts[parent] += counts[i]
+        self.capacity, self._tree = capacity, counts
+
+
+class Leaderboard:
+    """
+    Users ranked by coins, highest first.
+
+    Users with equal coins share a rank and are listed by id. Only users
+    with coins are ranked.
+    """
+
+    def __init__(self):
+        self._scores: Dict[int, int] = {}
+        self._buckets: Dict[int, List[int]] = {}  # score -> sorted user ids
+        self._index = ScoreIndex()
+
+    def add(self, user_id: int, coins: int) -> None:
+        """Add coins to a user's score"""
+        self.set(user_id, self._scores.get(user_id, 0) + coins)
+
+    def set(self, user_id: int, coins: int) -> None:
+        """Set a user's score"""
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            bucket = self._buckets[old]
+            del bucket[bisect.bisect_left(bucket, user_id)]
+            if not bucket:
+                del self._buckets[old]
+            self._index.add(old, -1)
+
+        if coins > 0:
+            self._scores[user_id] = coins
+            bisect.insort(self._buckets.setdefault(coins, []), user_id)
+            self._index.add(coins, 1)
+
+    def score(self, user_id: int) -> int:
+        return self._scores.get(user_id, 0)
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """1-based rank of a user, None without coins"""
+        coins = self._scores.get(user_id)
+        return self._index.count_above(coins) + 1 if coins is not None else None
+
+    def top(self, limit: int) -> List[Tuple[int, int, int]]:
+        """``(rank, user_id, coins)`` of the first ``limit`` users"""
+        entries = []
+        rank = 1
+        while len(entries) < limit and rank <= len(self._scores):
+            coins = self._index.kth_highest(rank)
+            bucket = self._buckets[coins]
+            entries.extend((rank, user_id, coins) for user_id in bucket[:limit - len(entries)])
+            rank += len(bucket)
+        return entries
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class CoinLeaderboards:
+    """
+    Global and per-community journey coin leaderboards.
+
+    A user's coins are the ``total_coins_earned`` of their journey progress,
+    summed over all paths or over the paths of one community. The boards
+    are built from the database with one grouped query on first use and
+    updated in memory when a transaction that completed a milestone commits,
+    so top-N and rank lookups never sort progress rows. Coins themselves are
+    persisted with the progress row in that transaction; the boards are
+    rebuilt every ``refresh_interval`` seconds to pick up milestones
+    completed by other workers.
+    """
+
+    def __init__(self, db, refresh_interval: float = 300.0):
+        self.db = db
+        self.refresh_interval = refresh_interval
+        self._boards: Dict[Optional[int], Leaderboard] = {}
+        self._built_at: Optional[float] = None
+        self._generation = 0
+        self._lock = threading.RLock()
+
+    def init_app(self, app) -> None:
+        """
+        Configure the leaderboards from the application config.
+
+        Args:
+            app: Flask application instance
+        """
+        self.refresh_interval = app.config.get('LEADERBOARD_REFRESH_INTERVAL', self.refresh_interval)
+
+    def rebuild(self) -> None:
+        """Rebuild every board from the journey progress table"""
+        totals = self.db.session.query(
+            UserJourneyProgress.user_id,
+            JourneyPath.community_id,
+            func.sum(UserJourneyProgress.total_coins_earned)
+        ).join(JourneyPath, JourneyPath.id == UserJourneyProgress.path_id)\
+            .group_by(UserJourneyProgress.user_id, JourneyPath.community_id)
+
+        coins: Dict[Optional[int], Dict[int, int]] = {None: {}}
+        for user_id, community_id, total in totals:
+            if community_id is not None:
+                coins.setdefault(community_id, {})[user_id] = total or 0
+            coins[None][user_id] = coins[None].get(user_id, 0) + (total or 0)
+
+        boards = {}
+        for community_id, scores in coins.items():
+            board = boards[community_id] = Leaderboard()
+            for user_id, total in scores.items():
+                board.set(user_id, total)
+
+        with self._lock:
+            self._boards = boards
+            self._built_at = time.monotonic()
+            # Updates recorded against the old boards are part of this build or the next
+            self._generation += 1
+        logger.info(f"Built coin leaderboards for {len(boards[None])} users")
+
+    def record(self, user_id: int, community_id: Optional[int], coins: int) -> None:
+        """
+        Add coins a user earned on a path, once the caller's transaction
+        commits.
+
+        Args:
+            user_id (int): User who earned the coins
+            community_id (Optional[int]): Community of the path
+            coins (int): Coins earned
+        """
+        self.db.session.info.setdefault(_PENDING, []).append(
+            (self._generation, user_id, community_id, coins)
+        )
+
+    def top(self, community_id: Optional[int] = None, limit: int = 10) -> List[Tuple[int, int, int]]:
+        """
+        Get the first entries of a leaderboard.
+
+        Args:
+            community_id (Optional[int]): Community to rank in; global if None
+            limit (int): Number of users
+
+        Returns:
+            List[Tuple[int, int, int]]: ``(rank, user_id, coins)``, highest first
+        """
+        with self._lock:
+            return self._board(community_id).top(limit)
+
+    def rank(self, user_id: int, community_id: Optional[int] = None) -> Tuple[Optional[int], int]:
+        """
+        Get a user's position on a leaderboard.
+
+        Returns:
+            Tuple[Optional[int], int]: Rank, None without coins, and coins
+        """
+        with self._lock:
+            board = self._board(community_id)
+            return board.rank(user_id), board.score(user_id)
+
+    def size(self, community_id: Optional[int] = None) -> int:
+        """Number of ranked users on a leaderboard"""
+        with self._lock:
+            return len(self._board(community_id))
+
+    def _board(self, community_id: Optional[int]) -> Leaderboard:
+        """Get a board, rebuilding all of them when they are due"""
+        if self._built_at is None or time.monotonic() - self._built_at >= self.refresh_interval:
+            self.rebuild()
+        return self._boards.get(community_id) or Leaderboard()
+
+    def _committed(self, session) -> None:
+        """Apply the coins of a committed transaction"""
+        pending = session.info.pop(_PENDING, ())
+        with self._lock:
+            for generation, user_id, community_id, coins in pending:
+                if generation != self._generation:
+                    continue
+                self._boards.setdefault(None, Leaderboard()).add(user_id, coins)
+                if community_id is not None:
+                    self._boards.setdefault(community_id, Leaderboard()).add(user_id, coins)
+
+
+leaderboards = CoinLeaderboards(db)
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _apply_committed_coins(session):
+    leaderboards._committed(session)
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_coins(session):
+    session.info.pop(_PENDING, None)
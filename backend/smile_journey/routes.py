@@ -5,9 +5,14 @@ from sqlalchemy import func
 from typing import Dict, List, Optional
 
 from models import (
-    JourneyPath, JourneyMilestone, UserJourneyProgress,
+    JourneyPath, JourneyMilestone, UserJourneyProgress, ActivityCalendar,
     User, Group, UserProblem, db
 )
+from smile_journey.utils import (
+    JourneyManager, get_journey_catalog, get_milestone, get_path, get_user_progress
+)
+from smile_journey.leaderboard import leaderboards
+from achievements.utils import achievements
 
 journey_bp = Blueprint('journey', __name__)
 
@@ -24,21 +29,13 @@ def register_journey_routes(app, db):
             if not community:
                 return jsonify({'error': 'Community not found'}), 404
 
-            # Get paths for the community
-            paths = JourneyPath.query.filter_by(community_id=community_id).all()
+            # Get paths for the community and the user's progress on them
+            paths = get_journey_catalog().community_paths(community_id)
+            progress_by_path = get_user_progress(current_user.id, [path.id for path in paths])
             paths_data = []
 
             for path in paths:
-                # Get user's progress for this path
-                progress = UserJourneyProgress.query.filter_by(
-                    user_id=current_user.id,
-                    path_id=path.id
-                ).first()
-
-                # Get milestones for this path
-                milestones = JourneyMilestone.query.filter_by(
-                    path_id=path.id
-                ).order_by(JourneyMilestone.order_number).all()
+                progress = progress_by_path.get(path.id)
 
                 # Build response data
                 paths_data.append({
@@ -54,14 +51,7 @@ def register_journey_routes(app, db):
                         'current_milestone': progress.current_milestone if progress else None,
                         'current_streak': progress.current_streak if progress else 0
                     },
-                    'milestones': [{
-                        'id': m.id,
-                        'title': m.title,
-                        'description': m.description,
-                        'type': m.milestone_type,
-                        'order_number': m.order_number,
-                        'coins_reward': m.coins_reward
-                    } for m in milestones]
+                    'milestones': [m.to_dict() for m in path.milestones]
                 })
 
             return jsonify(paths_data)
@@ -75,7 +65,7 @@ def register_journey_routes(app, db):
         """Start a new journey path"""
         try:
             # Check if path exists
-            path = JourneyPath.query.get(path_id)
+            path = get_path(path_id)
             if not path:
                 return jsonify({'error': 'Journey path not found'}), 404
 
@@ -112,7 +102,7 @@ def register_journey_routes(app, db):
     def complete_milestone(milestone_id: int):
         """Mark a milestone as completed"""
         try:
-            milestone = JourneyMilestone.query.get(milestone_id)
+            milestone = get_milestone(milestone_id)
             if not milestone:
                 return jsonify({'error': 'Milestone not found'}), 404
 
@@ -128,28 +118,42 @@ def register_journey_routes(app, db):
             if milestone.order_number != progress.current_milestone:
                 return jsonify({'error': 'Cannot skip milestones'}), 400
 
+            now = datetime.utcnow()
+            if milestone.required_days:
+                days_active = JourneyManager.days_active(progress, now)
+                if days_active < milestone.required_days:
+                    return jsonify({
+                        'error': f'Be active on {milestone.required_days} days to complete this milestone',
+                        'days_active': days_active,
+                        'required_days': milestone.required_days
+                    }), 400
+
             # Update progress
             progress.completed_milestones += 1
             progress.current_milestone += 1
             progress.total_coins_earned += milestone.coins_reward
-            progress.last_activity_date = datetime.utcnow()
+            progress.last_activity_date = now
+
+            path = get_path(milestone.path_id)
+            leaderboards.record(current_user.id, path.community_id, milestone.coins_reward)
 
             # Update streak
-            if progress.last_activity_date:
-                days_diff = (datetime.utcnow() - progress.last_activity_date).days
-                if days_diff <= 1:
-                    progress.current_streak += 1
-                else:
-                    progress.current_streak = 1
-            else:
-                progress.current_streak = 1
+            ActivityCalendar.mark(current_user.id, 'journey', now.date())
+            progress.current_streak = ActivityCalendar.load(current_user.id, 'journey').current_streak(now.date())
+
+            awarded = achievements.record(current_user.id, 'journey', {
+                'milestones': progress.completed_milestones,
+                'journeys_completed': int(progress.completed_milestones >= path.total_milestones),
+                'streak': progress.current_streak
+            })
 
             db.session.commit()
 
             return jsonify({
                 'message': 'Milestone completed',
                 'coins_earned': milestone.coins_reward,
-                'current_streak': progress.current_streak
+                'current_streak': progress.current_streak,
+                'achievements': awarded
             })
 
         except Exception as e:
@@ -161,17 +165,15 @@ def register_journey_routes(app, db):
     def get_progress():
         """Get user's progress across all journeys"""
         try:
-            progress_entries = UserJourneyProgress.query.filter_by(
-                user_id=current_user.id
-            ).all()
+            progress_entries = get_user_progress(current_user.id).values()
+            catalog = get_journey_catalog()
 
             progress_data = []
             for entry in progress_entries:
-                path = JourneyPath.query.get(entry.path_id)
-                current_milestone = JourneyMilestone.query.filter_by(
-                    path_id=path.id,
-                    order_number=entry.current_milestone
-                ).first()
+                path = catalog.path(entry.path_id)
+                if not path:
+                    continue
+                current_milestone = path.milestone_at(entry.current_milestone)
 
                 progress_data.append({
                     'path_name': path.name,
@@ -215,5 +217,37 @@ def register_journey_routes(app, db):
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
+    @journey_bp.route('/leaderboard', methods=['GET'])
+    @journey_bp.route('/leaderboard/<int:community_id>', methods=['GET'])
+    @login_required
+    def get_leaderboard(community_id: Optional[int] = None):
+        """Get the global or a community's coin leaderboard"""
+        try:
+            if community_id is not None and not Group.query.get(community_id):
+                return jsonify({'error': 'Community not found'}), 404
+
+            limit = min(max(request.args.get('limit', 10, type=int), 1), 100)
+            top = leaderboards.top(community_id, limit)
+            rank, coins = leaderboards.rank(current_user.id, community_id)
+
+            names = dict(db.session.query(User.id, User.name).filter(
+                User.id.in_([user_id for _, user_id, _ in top])
+            )) if top else {}
+
+            return jsonify({
+                'leaderboard': [{
+                    'rank': entry_rank,
+                    'user_id': user_id,
+                    'name': names.get(user_id),
+                    'coins': entry_coins
+                } for entry_rank, user_id, entry_coins in top],
+                'user_rank': rank,
+                'user_coins': coins,
+                'total_ranked': leaderboards.size(community_id)
+            })
+
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+
     # Register the blueprint with the app
     app.register_blueprint(journey_bp, url_prefix='/journey')
\ No newline at end of file
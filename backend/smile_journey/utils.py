@@ -2,13 +2,93 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import func
 from models import (
-    JourneyPath, JourneyMilestone, UserJourneyProgress,
+    JourneyPath, JourneyMilestone, UserJourneyProgress, ActivityCalendar,
     User, Group, UserProblem, db
 )
+from cache import invalidate_on_commit
+from .catalog import JourneyCatalog, MilestoneInfo, PathInfo
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Journey paths and milestones, loaded on first use
+journey_catalog = JourneyCatalog()
+_journey_catalog_load_lock = threading.Lock()
+
+_PATH_COLUMNS = ('id', 'community_id', 'name', 'description', 'total_milestones', 'coins_per_milestone')
+_MILESTONE_COLUMNS = ('id', 'path_id', 'title', 'description', 'order_number', 'milestone_type',
+                      'coins_reward', 'required_days', 'required_activities')
+
+
+def get_journey_catalog() -> JourneyCatalog:
+    """
+    Get the journey catalog, loading it from the database on first use.
+
+    Returns:
+        JourneyCatalog: All paths and milestones
+    """
+    if not journey_catalog.loaded:
+        with _journey_catalog_load_lock:
+            if not journey_catalog.loaded:
+                paths = db.session.query(*(getattr(JourneyPath, c) for c in _PATH_COLUMNS))
+                milestones = db.session.query(*(getattr(JourneyMilestone, c) for c in _MILESTONE_COLUMNS))
+                journey_catalog.load((row._asdict() for row in paths), (row._asdict() for row in milestones))
+                logger.info(f"Loaded journey catalog with {len(journey_catalog)} paths")
+    return journey_catalog
+
+
+def get_path(path_id: int) -> Optional[PathInfo]:
+    """
+    Get a journey path from the catalog.
+
+    A miss is checked against the database, since the path may have been
+    created by another worker; only then is the catalog reloaded.
+    """
+    path = get_journey_catalog().path(path_id)
+    if path is None and db.session.query(JourneyPath.id).filter_by(id=path_id).scalar() is not None:
+        journey_catalog.invalidate()
+        path = get_journey_catalog().path(path_id)
+    return path
+
+
+def get_milestone(milestone_id: int) -> Optional[MilestoneInfo]:
+    """Get a journey milestone from the catalog; a miss is checked like in get_path"""
+    milestone = get_journey_catalog().milestone(milestone_id)
+    if milestone is None and \
+            db.session.query(JourneyMilestone.id).filter_by(id=milestone_id).scalar() is not None:
+        journey_catalog.invalidate()
+        milestone = get_journey_catalog().milestone(milestone_id)
+    return milestone
+
+
+def get_user_progress(user_id: int, path_ids: Optional[List[int]] = None) -> Dict[int, UserJourneyProgress]:
+    """
+    Get a user's journey progress in one query.
+
+    Args:
+        user_id (int): User whose progress to load
+        path_ids (Optional[List[int]]): Only these paths; all when None
+
+    Returns:
+        Dict[int, UserJourneyProgress]: Progress by path id
+    """
+    if path_ids is not None and not path_ids:
+        return {}
+    query = UserJourneyProgress.query.filter(UserJourneyProgress.user_id == user_id)
+    if path_ids is not None:
+        query = query.filter(UserJourneyProgress.path_id.in_(path_ids))
+    progress_by_path = {}
+    for progress in query.order_by(UserJourneyProgress.id):
+        progress_by_path.setdefault(progress.path_id, progress)
+    return progress_by_path
+
+
+# Reload the catalog after any path or milestone is added, edited or removed
+invalidate_on_commit(JourneyPath, lambda _: journey_catalog.invalidate())
+invalidate_on_commit(JourneyMilestone, lambda _: journey_catalog.invalidate())
+
+
 class JourneyManager:
     """Utility class for managing journey-related operations"""
     
@@ -115,21 +195,30 @@ class JourneyManager:
         if not progress or not progress.last_activity_date:
             return 0
 
-        today = datetime.utcnow().date()
-        last_activity = progress.last_activity_date.date()
-        days_diff = (today - last_activity).days
-
-        if days_diff > 1:  # Streak broken if more than 1 day gap
-            progress.current_streak = 0
+        streak = ActivityCalendar.load(user_id, 'journey').current_streak(datetime.utcnow().date())
+        if streak != progress.current_streak:
+            progress.current_streak = streak
             db.session.commit()
-            return 0
 
-        return progress.current_streak
+        return streak
+
+    @staticmethod
+    def days_active(progress: UserJourneyProgress, today: datetime) -> int:
+        """
+        Count the days with any activity, meditation, mood check-in or
+        milestone from the day of the previous milestone of a journey, or
+        the day it was started, through today; today always counts.
+        """
+        since = (progress.last_activity_date or progress.started_at or today).date()
+
+        calendar = ActivityCalendar.load(progress.user_id, ActivityCalendar.KINDS, since=since)
+        calendar.add(today.date())
+        return calendar.days_active(since, today.date())
 
     @staticmethod
     def get_milestone_requirements(milestone_id: int) -> Dict:
         """Get requirements for completing a milestone"""
-        milestone = JourneyMilestone.query.get(milestone_id)
+        milestone = get_milestone(milestone_id)
         if not milestone:
             return {}
 
@@ -153,7 +242,8 @@ class JourneyManager:
     def get_journey_analytics(user_id: int) -> Dict:
         """Get comprehensive analytics for user's journey progress"""
         try:
-            progress_entries = UserJourneyProgress.query.filter_by(user_id=user_id).all()
+            progress_entries = list(get_user_progress(user_id).values())
+            catalog = get_journey_catalog()
             
             total_coins = sum(p.total_coins_earned for p in progress_entries)
             total_milestones = sum(p.completed_milestones for p in progress_entries)
@@ -162,8 +252,8 @@ class JourneyManager:
             # Calculate completion rates
             completion_rates = []
             for progress in progress_entries:
-                path = JourneyPath.query.get(progress.path_id)
-                if path:
+                path = catalog.path(progress.path_id)
+                if path and path.total_milestones:
                     rate = (progress.completed_milestones / path.total_milestones) * 100
                     completion_rates.append(rate)
             
@@ -185,7 +275,7 @@ class JourneyManager:
     def check_milestone_completion(user_id: int, milestone_id: int, data: Dict) -> Tuple[bool, str]:
         """Validate if milestone completion requirements are met"""
         try:
-            milestone = JourneyMilestone.query.get(milestone_id)
+            milestone = get_milestone(milestone_id)
             if not milestone:
                 return False, "Milestone not found"
 
@@ -201,6 +291,10 @@ class JourneyManager:
             if milestone.order_number != progress.current_milestone:
                 return False, "Cannot skip milestones"
 
+            if milestone.required_days and \
+                    JourneyManager.days_active(progress, datetime.utcnow()) < milestone.required_days:
+                return False, f"Be active on {milestone.required_days} days to complete this milestone"
+
             # Type-specific validation
             if milestone.milestone_type == 'reflection':
                 if not data.get('reflection_text'):
@@ -230,14 +324,13 @@ class JourneyManager:
     def get_recommended_actions(user_id: int) -> List[Dict]:
         """Get personalized recommended actions based on user's progress"""
         try:
-            progress_entries = UserJourneyProgress.query.filter_by(user_id=user_id).all()
+            progress_entries = get_user_progress(user_id).values()
+            catalog = get_journey_catalog()
             recommendations = []
 
             for progress in progress_entries:
-                current_milestone = JourneyMilestone.query.filter_by(
-                    path_id=progress.path_id,
-                    order_number=progress.current_milestone
-                ).first()
+                path = catalog.path(progress.path_id)
+                current_milestone = path.milestone_at(progress.current_milestone) if path else None
 
                 if current_milestone:
                     # Add milestone-specific recommendations
@@ -5,8 +5,12 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from models import StressAssessment, db
+from downsample import downsample, parse_args as parse_downsample_args
 stress_bp = Blueprint('stress', __name__)
 
+# Longest history window, in days
+MAX_HISTORY_DAYS = 3660
+
 @stress_bp.route('/assessment', methods=['POST'])
 @login_required
 def submit_assessment():
@@ -48,6 +52,50 @@ def submit_assessment():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@stress_bp.route('/history', methods=['GET'])
+@login_required
+def get_assessment_history():
+    """
+    Get the user's stress scores over the last ``days`` days (default 90).
+
+    With ``points`` the scores are returned as a chart ``series`` of at
+    most that many points (``mode`` 'lttb' or 'minmax', see downsample)
+    instead of one item per assessment.
+    """
+    try:
+        days = request.args.get('days', default=90, type=int)
+        days = max(1, min(days, MAX_HISTORY_DAYS))
+        try:
+            points, mode = parse_downsample_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        rows = db.session.query(
+            StressAssessment.id, StressAssessment.assessment_date, StressAssessment.stress_score
+        ).filter(
+            StressAssessment.user_id == current_user.id,
+            StressAssessment.assessment_date >= datetime.utcnow() - timedelta(days=days)
+        ).order_by(StressAssessment.assessment_date).all()
+
+        response = {
+            'days': days,
+            'total_assessments': len(rows),
+            'average_score': round(sum(row.stress_score for row in rows) / len(rows), 2) if rows else None
+        }
+        if points is None:
+            response['assessments'] = [
+                {'id': row.id, 'assessment_date': row.assessment_date.isoformat(),
+                 'stress_score': row.stress_score}
+                for row in rows
+            ]
+        else:
+            response['series'] = downsample([row.assessment_date for row in rows],
+                                            [row.stress_score for row in rows], points, mode)
+        return jsonify(response)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 def calculate_stress_score(data):
     weights = {
         'sleep_quality': 0.2,
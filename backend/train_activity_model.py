@@ -0,0 +1,62 @@
+"""
+Train the item-item activity recommendation model from all users' completed activities.
+
+Run periodically, e.g. nightly from cron. The model is written next to the
+old one and swapped in atomically; running workers pick it up on their
+next reload check.
+
+Usage:
+    python train_activity_model.py [--neighbors 20] [--output PATH]
+"""
+import argparse
+
+import numpy as np
+
+from activity.collaborative import interaction_scores, save, train
+
+
+def train_activity_model(app, neighbors=20, output=None):
+    """
+    Train the model on every completed, rated activity and save it
+    """
+    from models import UserActivity
+
+    with app.app_context():
+        rows = UserActivity.query.with_entities(
+            UserActivity.user_id,
+            UserActivity.activity_id,
+            UserActivity.effectiveness_rating,
+            UserActivity.mood_before,
+            UserActivity.mood_after
+        ).filter(
+            UserActivity.completed_at.isnot(None)
+        ).all()
+
+        columns = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        rated = ~np.isnan(columns[:, 2]) | ~np.isnan(columns[:, 4] - columns[:, 3])
+        columns = columns[rated]
+        if not len(columns):
+            print("No rated activities to train on")
+            return
+
+        scores = interaction_scores(columns[:, 2], columns[:, 4] - columns[:, 3])
+        model = train(
+            columns[:, 0].astype(np.int64),
+            columns[:, 1].astype(np.int64),
+            scores,
+            neighbors=neighbors
+        )
+        path = output or app.config['ACTIVITY_MODEL_PATH']
+        save(model, path)
+        print(f"Trained on {len(columns)} completions of {len(model)} activities, saved to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--neighbors', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    # Importing app creates the application
+    from app import app
+    train_activity_model(app, args.neighbors, args.output)
@@ -0,0 +1,305 @@
+# trending.py
+import atexit
+import bisect
+import logging
+import math
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, event as sa_event, func, update
+from sqlalchemy.orm import Session
+
+from counters import CounterBuffer, run_periodically
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+_PENDING = 'trending_pending'
+
+class TopK:
+    """
+    Bounded set of the K highest-scoring items.
+
+    Trending scores only ever grow (see TrendingEngine), so an item outside
+    the set can only enter it through its own update; offering every update
+    is enough to keep the set exact without rescanning.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self._scores: Dict[int, float] = {}
+        self._order: List[Tuple[float, int]] = []  # ascending
+
+    def offer(self, item_id: int, score: float) -> None:
+        """Insert or raise an item's score, evicting the lowest if full"""
+        old = self._scores.get(item_id)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (old, item_id))]
+        elif len(self._order) >= self.k:
+            if score <= self._order[0][0]:
+                return
+            _, evicted = self._order.pop(0)
+            del self._scores[evicted]
+
+        self._scores[item_id] = score
+        bisect.insort(self._order, (score, item_id))
+
+    def discard(self, item_id: int) -> None:
+        """Remove an item, e.g. after it was deleted"""
+        old = self._scores.pop(item_id, None)
+        if old is not None:
+            del self._order[bisect.bisect_left(self._order, (old, item_id))]
+
+    def score(self, item_id: int) -> Optional[float]:
+        return self._scores.get(item_id)
+
+    def top(self, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Items with their scores, highest first"""
+        entries = self._order[::-1] if limit is None else self._order[:-limit - 1:-1]
+        return [(item_id, score) for score, item_id in entries]
+
+
+class TrendingEngine:
+    """
+    Incrementally maintained, time-decayed trending ranking for blogs and
+    community posts.
+
+    The decayed score ``sum(w * exp(-rate * (now - t)))`` of an item is
+    stored as ``log(sum(w * exp(rate * (t - EPOCH))))``. Every interaction
+    then adds one term with ``logaddexp`` and never has to touch older
+    ones, and because all items decay at the same rate this stored value
+    ranks items exactly like their current decayed score. The value is kept
+    in a ``trending_score`` column and mirrored in bounded top-K boards,
+    one global board per kind plus one per community, which serve the
+    trending endpoints without scanning the posts table.
+    """
+
+    EPOCH = datetime(2024, 1, 1)
+    WEIGHTS = {'create': 1.0, 'view': 1.0, 'like': 3.0, 'comment': 5.0}
+
+    def __init__(self, db):
+        self.db = db
+        self.top_k = 100
+        self.rate = math.log(2) / (24 * 3600)
+        self.flush_interval = 5.0
+        # Views are coalesced per item and written by flush_views
+        self.views = CounterBuffer()
+        self._boards: Dict[Tuple[str, Optional[int]], TopK] = {}
+        self._lock = threading.RLock()
+        self._app = None
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def init_app(self, app) -> None:
+        """
+        Configure the engine from the application config and start
+        flushing buffered views.
+
+        Args:
+            app: Flask application instance
+        """
+        self.top_k = app.config.get('TRENDING_TOP_K', 100)
+        half_life_hours = app.config.get('TRENDING_HALF_LIFE_HOURS', 24.0)
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self.flush_interval = app.config.get('TRENDING_VIEW_FLUSH_INTERVAL', 5.0)
+        self._app = app
+        if self._flusher is None:
+            self._flusher = run_periodically(app, self.flush_interval, self.flush_views,
+                                             'trending-view-flusher', self._stop)
+            atexit.register(self.shutdown)
+
+    def increment(self, event: str, at: Optional[datetime] = None, count: int = 1) -> float:
+        """Log-space term added to a score by ``count`` events at time ``at``"""
+        return math.log(self.WEIGHTS[event] * count) + \
+            self.rate * ((at or datetime.utcnow()) - self.EPOCH).total_seconds()
+
+    def record(self, model, row_id: int, event: str, at: Optional[datetime] = None) -> Optional[float]:
+        """
+        Add one interaction to an item's trending score.
+
+        The score is raised by a single ``UPDATE`` that applies
+        ``logaddexp`` to the stored value, so concurrent interactions never
+        overwrite each other; it joins the caller's transaction, and the
+        trending boards see the new score once that commits. Views are only
+        buffered, see ``flush_views``.
+
+        Args:
+            model: ``Blog`` or ``CommunityPost``
+            row_id (int): ID of the item
+            event (str): One of WEIGHTS, e.g. 'like'
+            at (Optional[datetime]): Time of the interaction, defaults to now
+
+        Returns:
+            Optional[float]: New stored (log-space) score, None for a view
+        """
+        if event == 'view':
+            self.views.add(model.trending_score, row_id, 1)
+            return None
+        return self._add(model, row_id, self.increment(event, at))
+
+    def flush_views(self) -> int:
+        """
+        Write all buffered views in one transaction.
+
+        Returns:
+            int: Number of items updated
+        """
+        deltas = self.views.drain()
+        if not deltas:
+            return 0
+
+        try:
+            now = datetime.utcnow()
+            for (model, _, row_id), count in deltas.items():
+                self._add(model, row_id, self.increment('view', now, count))
+            self.db.session.commit()
+            return len(deltas)
+        except Exception as e:
+            logger.error(f"Error flushing trending views: {str(e)}")
+            self.db.session.rollback()
+            self.views.restore(deltas)
+            return 0
+
+    def shutdown(self) -> None:
+        """Stop the background flusher and write any remaining views"""
+        self._stop.set()
+        if self._app is not None:
+            with self._app.app_context():
+                self.flush_views()
+
+    def backfill(self, model, row_ids: List[int], **counts) -> int:
+        """
+        Score items that have no trending score yet, e.g. created before
+        scores were maintained; see backfills.py.
+
+        Their past interactions are counted as if they happened when the
+        item was created.
+
+        Args:
+            model: ``Blog`` or ``CommunityPost``
+            row_ids (List[int]): Items to consider; scored ones are skipped
+            **counts: Event name -> column or scalar subquery counting
+                the item's past events of that kind, e.g. ``like=Blog.likes``
+
+        Returns:
+            int: Number of items scored
+        """
+        events = list(counts)
+        rows = self.db.session.query(
+            model.id, model.created_at, *(counts[event] for event in events)
+        ).filter(model.id.in_(row_ids), model.trending_score.is_(None)).all()
+        if not rows:
+            return 0
+
+        scores = []
+        for row_id, created_at, *totals in rows:
+            weight = self.WEIGHTS['create'] + sum(
+                self.WEIGHTS[event] * (total or 0) for event, total in zip(events, totals)
+            )
+            scores.append({
+                'id': row_id,
+                'trending_score': math.log(weight) + self.increment('create', created_at or self.EPOCH)
+            })
+
+        self.db.session.execute(update(model), scores)
+        return len(scores)
+
+    def _add(self, model, row_id: int, increment: float) -> Optional[float]:
+        """Add a log-space term to an item's stored score and offer it to its boards"""
+        # logaddexp in SQL; ln and exp need SQLite 3.35+ math functions
+        score = model.trending_score
+        added = case(
+            (score.is_(None), increment),
+            (score >= increment, score + func.ln(1 + func.exp(increment - score))),
+            else_=increment + func.ln(1 + func.exp(score - increment))
+        )
+        community = getattr(model, 'community_id', None)
+        stmt = update(model).where(model.id == row_id).values({model.trending_score: added})\
+            .returning(model.trending_score, *([community] if community is not None else []))\
+            .execution_options(synchronize_session=False)
+        row = self.db.session.execute(stmt).first()
+        if row is None:
+            return None
+
+        new_score, community_id = row[0], row[1] if community is not None else None
+        kind = model.__tablename__
+        keys = [(kind, None)] + ([(kind, community_id)] if community_id is not None else [])
+        # The boards only see the score once the transaction commits
+        self.db.session.info.setdefault(_PENDING, []).append((keys, row_id, new_score))
+        return new_score
+
+    def top(self, model, community_id: Optional[int] = None,
+            limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Get the trending items of a kind, globally or in one community.
+
+        Args:
+            model: ``Blog`` or ``CommunityPost``
+            community_id (Optional[int]): Community to rank posts in
+            limit (Optional[int]): Number of items, at most the board size
+
+        Returns:
+            List[Tuple[int, float]]: ``(id, current decayed score)`` pairs,
+            highest first
+        """
+        board = self._board(model, community_id)
+        offset = self.rate * (datetime.utcnow() - self.EPOCH).total_seconds()
+        with self._lock:
+            return [(item_id, math.exp(score - offset)) for item_id, score in board.top(limit)]
+
+    def remove(self, model, row_id: int) -> None:
+        """Take a deleted item off every board of its kind"""
+        kind = model.__tablename__
+        with self._lock:
+            for (board_kind, _), board in self._boards.items():
+                if board_kind == kind:
+                    board.discard(row_id)
+
+    def reset(self) -> None:
+        """Drop all boards; they are reloaded from the database on next use"""
+        with self._lock:
+            self._boards.clear()
+
+    def _committed(self, session) -> None:
+        """Offer the scores of a committed transaction to their boards"""
+        pending = session.info.pop(_PENDING, ())
+        with self._lock:
+            for keys, row_id, score in pending:
+                for key in keys:
+                    board = self._boards.get(key)
+                    # Concurrent updates may commit out of order; scores only grow
+                    if board is not None and (board.score(row_id) is None or board.score(row_id) < score):
+                        board.offer(row_id, score)
+
+    def _board(self, model, community_id: Optional[int]) -> TopK:
+        """Get a board, loading its top K from the trending score index"""
+        key = (model.__tablename__, community_id)
+        with self._lock:
+            board = self._boards.get(key)
+            if board is not None:
+                return board
+
+            query = self.db.session.query(model.id, model.trending_score)\
+                .filter(model.trending_score.isnot(None))
+            if community_id is not None:
+                query = query.filter(model.community_id == community_id)
+
+            board = TopK(self.top_k)
+            for item_id, score in query.order_by(model.trending_score.desc()).limit(self.top_k):
+                board.offer(item_id, score)
+            self._boards[key] = board
+            return board
+
+
+trending = TrendingEngine(db)
+
+
+@sa_event.listens_for(Session, 'after_commit')
+def _offer_committed_scores(session):
+    trending._committed(session)
+
+
+@sa_event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_scores(session):
+    session.info.pop(_PENDING, None)
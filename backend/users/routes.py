@@ -2,6 +2,8 @@ from flask import request, jsonify, current_app, url_for
 from werkzeug.utils import secure_filename
 from flask_login import login_required, current_user
 from models import Profile, Friendship, Blog, User
+from search.utils import search_index
+from trending import trending
 
 def register_routes(bp, db):
     """Register routes with the users blueprint"""
@@ -98,6 +100,9 @@ def register_routes(bp, db):
             content=data['content']
         )
         db.session.add(new_blog)
+        db.session.flush()
+        search_index.index_blog(new_blog)
+        trending.record(Blog, new_blog.id, 'create')
         db.session.commit()
         
         return jsonify({'message': 'Blog created successfully'}), 201
@@ -110,8 +115,10 @@ def register_routes(bp, db):
             return jsonify({'error': 'Blog not found or unauthorized'}), 404
 
         if request.method == 'DELETE':
+            search_index.remove_blog(blog.id)
             db.session.delete(blog)
             db.session.commit()
+            trending.remove(Blog, blog_id)
             return jsonify({'message': 'Blog deleted successfully'})
 
         data = request.json
@@ -120,6 +127,7 @@ def register_routes(bp, db):
 
         blog.title = data.get('title', blog.title)
         blog.content = data.get('content', blog.content)
+        search_index.index_blog(blog)
         db.session.commit()
         
         return jsonify({'message': 'Blog updated successfully'})
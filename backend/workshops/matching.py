@@ -0,0 +1,198 @@
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from how i in into is it its me my of on or our so
+    that the their this to up we what when with you your will can about all more
+""".split())
+
+# Field weights: a tag word says more about a workshop than a description word
+TITLE_WEIGHT = 2
+DESCRIPTION_WEIGHT = 1
+TAG_WEIGHT = 3
+
+# Profile weights: the smile reason is chosen deliberately, emotions are noisier
+SMILE_REASON_WEIGHT = 3.0
+MOOD_EMOTION_WEIGHT = 1.0
+BOT_EMOTION_WEIGHT = 0.5
+
+# Words an emotion implies, so 'anxiety' also matches a "calm breathing" workshop
+EMOTION_TERMS = {
+    'anxiety': 'anxiety anxious calm relaxation breathing',
+    'anxious': 'anxiety anxious calm relaxation breathing',
+    'stress': 'stress stressed relief relaxation mindfulness',
+    'stressed': 'stress stressed relief relaxation mindfulness',
+    'overwhelmed': 'overwhelmed stress relief burnout rest',
+    'depression': 'depression mood lifting hope',
+    'sadness': 'sadness sad mood lifting hope comfort',
+    'sad': 'sadness sad mood lifting hope comfort',
+    'anger': 'anger angry management calm',
+    'angry': 'anger angry management calm',
+    'loneliness': 'loneliness lonely connection community friends',
+    'lonely': 'loneliness lonely connection community friends',
+    'joy': 'joy happiness gratitude',
+    'happy': 'joy happiness gratitude',
+    'hopeful': 'hope hopeful growth goals',
+    'grateful': 'gratitude grateful journaling',
+}
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Split text into case-folded words without stop words"""
+    return [word for word in re.findall(r'[^\W\d_]+', (text or '').casefold())
+            if len(word) > 1 and word not in STOP_WORDS]
+
+
+def workshop_terms(title: Optional[str], description: Optional[str],
+                   tag: Optional[str]) -> Counter:
+    """Weighted term counts of a workshop's title, description and tag"""
+    terms = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (description, DESCRIPTION_WEIGHT), (tag, TAG_WEIGHT)):
+        for word in tokenize(text):
+            terms[word] += weight
+    return terms
+
+
+def emotion_terms(emotion: Optional[str]) -> List[str]:
+    """Words for an emotion tag, expanded with the words it implies"""
+    words = tokenize(emotion)
+    return tokenize(EMOTION_TERMS.get(' '.join(words), '')) or words
+
+
+def profile_terms(smile_reason: Optional[str], mood_emotions: Iterable[str] = (),
+                  bot_emotions: Iterable[str] = ()) -> Counter:
+    """
+    Weighted terms describing what a user needs right now.
+
+    Args:
+        smile_reason (Optional[str]): Reason chosen on the problem page
+        mood_emotions: Emotion tags of recent mood entries, repeats count
+        bot_emotions: Emotions recently detected by the chatbot
+    """
+    terms = Counter()
+    for word in tokenize(smile_reason):
+        terms[word] += SMILE_REASON_WEIGHT
+    for emotions, weight in ((mood_emotions, MOOD_EMOTION_WEIGHT), (bot_emotions, BOT_EMOTION_WEIGHT)):
+        for emotion in emotions:
+            if not isinstance(emotion, str) or emotion == 'neutral':
+                continue
+            for word in emotion_terms(emotion):
+                terms[word] += weight
+    return terms
+
+
+class WorkshopMatcher:
+    """
+    TF-IDF index over workshop titles, descriptions and tags.
+
+    Each workshop is tokenized once, when it is loaded or created, into a
+    row of term columns and counts. The sparse matrix of normalized TF-IDF
+    weights is assembled from those rows with NumPy on the first ranking
+    after a change, since one new workshop shifts the IDF of every other;
+    that pass is a few array operations over the non-zero entries. Ranking
+    a profile is then one gather and one ``bincount`` over the same
+    entries.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._vocabulary: Dict[str, int] = {}
+        self._rows: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._matrix = None
+        self.loaded = False
+
+    def load(self, workshops: Iterable[Tuple[int, str, str, str]]) -> None:
+        """
+        Replace the index contents.
+
+        Args:
+            workshops: ``(workshop_id, title, description, tag)`` rows
+        """
+        with self._lock:
+            self._vocabulary = {}
+            self._rows = {}
+            for workshop_id, title, description, tag in workshops:
+                self._rows[workshop_id] = self._row(workshop_terms(title, description, tag))
+            self._matrix = None
+            self.loaded = True
+
+    def upsert(self, workshop_id: int, title: str, description: str, tag: str) -> None:
+        """Index a new workshop or re-index an edited one"""
+        with self._lock:
+            self._rows[workshop_id] = self._row(workshop_terms(title, description, tag))
+            self._matrix = None
+
+    def remove(self, workshop_id: int) -> None:
+        """Drop a deleted workshop"""
+        with self._lock:
+            if self._rows.pop(workshop_id, None) is not None:
+                self._matrix = None
+
+    def rank(self, profile: Counter, limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Rank workshops by cosine similarity to a profile.
+
+        Args:
+            profile (Counter): Weighted profile terms, see profile_terms
+            limit (Optional[int]): Number of workshops to return
+
+        Returns:
+            List[Tuple[int, float]]: ``(workshop_id, score)`` pairs with a
+            positive score, best match first
+        """
+        with self._lock:
+            matrix = self._build()
+            known = [(self._vocabulary[term], weight) for term, weight in profile.items()
+                     if term in self._vocabulary and weight > 0]
+        ids, rows, indices, weights, idf = matrix
+        if not known or not len(ids):
+            return []
+
+        columns = np.array([column for column, _ in known], dtype=np.int64)
+        # Profile weights are already graded, so they are used as term frequencies
+        counts = np.array([weight for _, weight in known], dtype=np.float64)
+        query = np.zeros(len(idf), dtype=np.float64)
+        query[columns] = counts * idf[columns]
+        query /= np.linalg.norm(query)
+
+        scores = np.bincount(rows, weights=weights * query[indices], minlength=len(ids))
+        matched = np.flatnonzero(scores > 0)
+        if limit is not None and limit < len(matched):
+            matched = matched[np.argpartition(-scores[matched], limit - 1)[:limit]]
+        # Best score first, newest workshop first among equals
+        order = matched[np.lexsort((-ids[matched], -scores[matched]))]
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _row(self, terms: Counter) -> Tuple[np.ndarray, np.ndarray]:
+        """Term columns and counts of one workshop, growing the vocabulary"""
+        columns = [self._vocabulary.setdefault(term, len(self._vocabulary)) for term in terms]
+        return (np.array(columns, dtype=np.int64),
+                np.array(list(terms.values()), dtype=np.float64))
+
+    def _build(self):
+        """Assemble the normalized TF-IDF matrix; caller holds the lock"""
+        if self._matrix is not None:
+            return self._matrix
+
+        ids = np.array(list(self._rows), dtype=np.int64)
+        rows = list(self._rows.values())
+        lengths = np.array([len(columns) for columns, _ in rows], dtype=np.int64)
+        row_of = np.repeat(np.arange(len(ids)), lengths)
+        indices = np.concatenate([columns for columns, _ in rows]) if rows else np.zeros(0, np.int64)
+        counts = np.concatenate([counts for _, counts in rows]) if rows else np.zeros(0)
+
+        document_frequency = np.bincount(indices, minlength=len(self._vocabulary))
+        idf = np.log((1.0 + len(ids)) / (1.0 + document_frequency)) + 1.0
+        weights = (1.0 + np.log(counts)) * idf[indices]
+        norms = np.sqrt(np.bincount(row_of, weights=weights ** 2, minlength=len(ids)))
+        weights /= np.where(norms > 0, norms, 1.0)[row_of]
+
+        self._matrix = (ids, row_of, indices, weights, idf)
+        return self._matrix
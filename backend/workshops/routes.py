@@ -2,9 +2,53 @@ from flask import request, jsonify
 from flask_login import login_required, current_user
 from models import UserProblem, Workshop, User, Feedback
 from extensions import db
-from .utils import admin_required
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from cursors import decode_cursor, encode_cursor
+from .utils import (
+    admin_required, catalog_cache, get_workshop_matcher, user_profile, workshop_matcher
+)
 from . import workshops_bp  # Import the blueprint from __init__.py
 
+DEFAULT_FEEDBACK_PAGE_SIZE = 20
+MAX_FEEDBACK_PAGE_SIZE = 50
+DEFAULT_RECOMMENDATIONS = 10
+MAX_RECOMMENDATIONS = 50
+
+def serialize_workshop(workshop, creator_name):
+    """Serialize a catalog entry; meet links of paid workshops stay private"""
+    return {
+        'id': workshop.id,
+        'title': workshop.title,
+        'description': workshop.description,
+        'banner_url': workshop.banner_url,
+        'meet_link': workshop.meet_link if not workshop.is_paid else None,
+        'is_paid': workshop.is_paid,
+        'price': workshop.price,
+        'sponsored': workshop.sponsored,
+        'tag': workshop.tag,
+        'created_by': creator_name or "Unknown",
+        'average_rating': workshop.average_rating,
+        'rating_count': workshop.rating_count or 0
+    }
+
+def load_catalog(tag):
+    """Load the workshops of a tag, or all for None, with creators joined"""
+    query = db.session.query(Workshop, User.name).outerjoin(User, User.id == Workshop.created_by)
+    if tag is not None:
+        query = query.filter(Workshop.tag == tag)
+    rows = query.order_by(Workshop.sponsored.desc(), Workshop.id.desc()).all()
+    return [serialize_workshop(workshop, creator_name) for workshop, creator_name in rows]
+
+def get_catalog(tag):
+    """Get the cached listing of a tag, or of all workshops for None"""
+    workshops_data = catalog_cache.get(tag)
+    if workshops_data is None:
+        generation = catalog_cache.generation()
+        workshops_data = load_catalog(tag)
+        catalog_cache.put(tag, workshops_data, generation)
+    return workshops_data
+
 @workshops_bp.route('/list', methods=['GET'])
 @login_required
 def list_workshops():
@@ -12,41 +56,39 @@ def list_workshops():
     user_problem = UserProblem.query.filter_by(user_id=current_user.id).first()
     
     # If no smile reason is set, return all workshops
-    if not user_problem or not user_problem.smile_reason:
-        workshops = Workshop.query.order_by(
-            Workshop.sponsored.desc(),
-            Workshop.id.desc()
-        ).all()
-    else:
-        # Filter workshops by smile reason
-        workshops = Workshop.query.filter_by(tag=user_problem.smile_reason).order_by(
-            Workshop.sponsored.desc(),
-            Workshop.id.desc()
-        ).all()
-
-    workshops_data = []
-    for workshop in workshops:
-        feedback_list = Feedback.query.filter_by(workshop_id=workshop.id).all()
-        avg_rating = sum(f.rating for f in feedback_list) / len(feedback_list) if feedback_list else None
-
-        creator = User.query.get(workshop.created_by)
-        creator_name = creator.name if creator else "Unknown"
-
-        workshops_data.append({
-            'id': workshop.id,
-            'title': workshop.title,
-            'description': workshop.description,
-            'banner_url': workshop.banner_url,
-            'meet_link': workshop.meet_link if not workshop.is_paid else None,
-            'is_paid': workshop.is_paid,
-            'price': workshop.price,
-            'sponsored': workshop.sponsored,
-            'tag': workshop.tag,
-            'created_by': creator_name,
-            'average_rating': avg_rating
-        })
-
-    return jsonify(workshops_data)
+    tag = user_problem.smile_reason if user_problem and user_problem.smile_reason else None
+
+    return jsonify(get_catalog(tag))
+
+@workshops_bp.route('/recommended', methods=['GET'])
+@login_required
+def recommended_workshops():
+    """
+    Rank workshops against the user's smile reason, recent mood emotions
+    and chatbot-detected emotions. Remaining slots are filled from the
+    catalog in its usual order with a match_score of 0.
+    """
+    limit = request.args.get('limit', DEFAULT_RECOMMENDATIONS, type=int)
+    limit = max(1, min(limit, MAX_RECOMMENDATIONS))
+
+    user_problem = UserProblem.query.filter_by(user_id=current_user.id).first()
+    smile_reason = user_problem.smile_reason if user_problem else None
+    ranked = get_workshop_matcher().rank(user_profile(current_user.id, smile_reason), limit)
+
+    catalog = get_catalog(None)
+    by_id = {workshop['id']: workshop for workshop in catalog}
+    recommendations = [
+        {**by_id[workshop_id], 'match_score': round(score, 4)}
+        for workshop_id, score in ranked if workshop_id in by_id
+    ]
+    if len(recommendations) < limit:
+        matched = {workshop['id'] for workshop in recommendations}
+        recommendations.extend(
+            {**workshop, 'match_score': 0.0}
+            for workshop in catalog if workshop['id'] not in matched
+        )
+
+    return jsonify(recommendations[:limit])
 
 @workshops_bp.route('/create', methods=['POST'])
 @login_required
@@ -76,6 +118,8 @@ def create_workshop():
     )
     db.session.add(new_workshop)
     db.session.commit()
+    catalog_cache.invalidate(tag)
+    workshop_matcher.upsert(new_workshop.id, title, description, tag)
     return jsonify({'message': 'Workshop created successfully', 'workshop_id': new_workshop.id})
 
 @workshops_bp.route('/<int:workshop_id>/promote', methods=['POST'])
@@ -88,6 +132,7 @@ def promote_workshop(workshop_id):
 
     workshop.sponsored = True
     db.session.commit()
+    catalog_cache.invalidate(workshop.tag)
     return jsonify({'message': 'Workshop promoted successfully'})
 
 @workshops_bp.route('/<int:workshop_id>', methods=['DELETE'])
@@ -98,8 +143,11 @@ def delete_workshop(workshop_id):
     if not workshop:
         return jsonify({'error': 'Workshop not found'}), 404
 
+    tag = workshop.tag
     db.session.delete(workshop)
     db.session.commit()
+    catalog_cache.invalidate(tag)
+    workshop_matcher.remove(workshop_id)
     return jsonify({'message': 'Workshop deleted successfully'})
 
 @workshops_bp.route('/<int:workshop_id>/feedback', methods=['POST'])
@@ -112,8 +160,13 @@ def submit_feedback(workshop_id):
     if not rating:
         return jsonify({'error': 'Rating is required'}), 400
 
-    if not (1 <= rating <= 5):
-        return jsonify({'error': 'Rating must be between 1 and 5'}), 400
+    # Whole stars only: each rating lands in one histogram column
+    if not isinstance(rating, int) or isinstance(rating, bool) or not (1 <= rating <= 5):
+        return jsonify({'error': 'Rating must be a whole number between 1 and 5'}), 400
+
+    workshop = Workshop.query.get(workshop_id)
+    if not workshop:
+        return jsonify({'error': 'Workshop not found'}), 404
 
     existing_feedback = Feedback.query.filter_by(
         workshop_id=workshop_id, 
@@ -130,7 +183,21 @@ def submit_feedback(workshop_id):
         rating=rating
     )
     db.session.add(feedback)
-    db.session.commit()
+    # Keep the aggregates in the feedback's transaction so listings never
+    # see one without the other
+    Workshop.query.filter_by(id=workshop_id).update({
+        Workshop.rating_sum: Workshop.rating_sum + rating,
+        Workshop.rating_count: Workshop.rating_count + 1,
+        Workshop.histogram_column(rating): Workshop.histogram_column(rating) + 1
+    }, synchronize_session=False)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent submission by the same user won the unique constraint
+        db.session.rollback()
+        return jsonify({'error': 'You have already submitted feedback for this workshop'}), 400
+
+    catalog_cache.invalidate(workshop.tag)
     return jsonify({'message': 'Feedback submitted successfully'})
 
 @workshops_bp.route('/<int:workshop_id>/feedback', methods=['GET'])
@@ -140,14 +207,43 @@ def view_feedback(workshop_id):
     if not workshop:
         return jsonify({'error': 'Workshop not found'}), 404
 
-    feedback_list = Feedback.query.filter_by(workshop_id=workshop_id).all()
+    # One page of feedback, newest first, with authors joined
+    query = db.session.query(Feedback, User.name)\
+        .outerjoin(User, User.id == Feedback.user_id)\
+        .filter(Feedback.workshop_id == workshop_id)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            timestamp, feedback_id = decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        query = query.filter(or_(
+            Feedback.timestamp < timestamp,
+            and_(Feedback.timestamp == timestamp, Feedback.id < feedback_id)
+        ))
+
+    limit = request.args.get('limit', DEFAULT_FEEDBACK_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_FEEDBACK_PAGE_SIZE))
+    rows = query.order_by(Feedback.timestamp.desc(), Feedback.id.desc()).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
     feedback_data = [
         {
-            'user': User.query.get(feedback.user_id).name,
+            'id': feedback.id,
+            'user': user_name or "Unknown",
             'comments': feedback.comments,
             'rating': feedback.rating,
             'timestamp': feedback.timestamp.isoformat()
         }
-        for feedback in feedback_list
+        for feedback, user_name in rows
     ]
-    return jsonify({'workshop_title': workshop.title, 'feedback': feedback_data})
\ No newline at end of file
+    return jsonify({
+        'workshop_title': workshop.title,
+        'average_rating': workshop.average_rating,
+        'rating_count': workshop.rating_count or 0,
+        'histogram': workshop.rating_histogram,
+        'feedback': feedback_data,
+        'next_cursor': encode_cursor(rows[-1][0].timestamp, rows[-1][0].id) if has_more else None
+    })
@@ -1,6 +1,24 @@
 from flask import jsonify
 from flask_login import current_user
 from functools import wraps
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+import threading
+
+from cache import LRUCache
+from extensions import db
+from models import MoodEntry, Workshop
+from .matching import WorkshopMatcher, profile_terms
+
+logger = logging.getLogger(__name__)
+
+# Mood entries that shape the matching profile
+PROFILE_MOOD_DAYS = 14
+PROFILE_MOOD_ENTRIES = 20
+# Chatbot emotions are not stored, so the latest ones are kept per user
+BOT_EMOTIONS_PER_USER = 20
 
 def admin_required(f):
     @wraps(f)
@@ -14,3 +32,103 @@ def admin_required(f):
             
         return f(*args, **kwargs)
     return decorated_function
+
+
+
+class CatalogCache:
+    """
+    Cache of the workshop listing per tag.
+
+    Users with the same smile reason see the same catalog, so each tag's
+    serialized listing is cached and dropped whenever a workshop of that
+    tag is created, promoted, deleted or rated. The unfiltered listing is
+    dropped together with every tag.
+    """
+
+    ALL = None
+
+    def __init__(self, max_tags: int = 256, ttl: Optional[float] = 300.0):
+        self.cache = LRUCache(max_entries=max_tags, ttl=ttl)
+        # Bumped on every invalidation so a listing read from the database
+        # before a change is not stored after it
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, tag: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Get the cached listing of a tag, or of all workshops for None"""
+        return self.cache.get(tag)
+
+    def generation(self) -> int:
+        """Get the invalidation generation to pass to put"""
+        with self._lock:
+            return self._generation
+
+    def put(self, tag: Optional[str], workshops: List[Dict[str, Any]], generation: int) -> None:
+        """Store a listing unless the catalog changed since it was read"""
+        with self._lock:
+            if generation == self._generation:
+                self.cache.set(tag, workshops)
+
+    def invalidate(self, tag: Optional[str]) -> None:
+        """Drop the listing of a tag and the unfiltered listing"""
+        with self._lock:
+            self._generation += 1
+            self.cache.invalidate(tag)
+            self.cache.invalidate(self.ALL)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit-rate metrics for the catalog cache"""
+        return self.cache.stats()
+
+
+catalog_cache = CatalogCache()
+
+# TF-IDF index over the workshop catalog, loaded on first use
+workshop_matcher = WorkshopMatcher()
+_workshop_matcher_load_lock = threading.Lock()
+
+# user_id -> deque of the latest emotions detected by the chatbot
+bot_emotions = LRUCache(max_entries=10000, ttl=24 * 3600.0)
+
+
+def get_workshop_matcher() -> WorkshopMatcher:
+    """
+    Get the workshop matcher, loading it from the database on first use.
+
+    Returns:
+        WorkshopMatcher: Index kept current by workshop create and delete
+    """
+    if not workshop_matcher.loaded:
+        with _workshop_matcher_load_lock:
+            if not workshop_matcher.loaded:
+                rows = db.session.query(
+                    Workshop.id, Workshop.title, Workshop.description, Workshop.tag
+                )
+                workshop_matcher.load(rows.yield_per(1000))
+                logger.info(f"Loaded workshop matcher with {len(workshop_matcher)} workshops")
+    return workshop_matcher
+
+
+def record_bot_emotion(user_id: int, emotion: Optional[str]) -> None:
+    """Remember an emotion the chatbot detected for a user"""
+    if not emotion or emotion == 'neutral':
+        return
+    if not bot_emotions.update(user_id, lambda emotions: emotions.append(emotion)):
+        bot_emotions.set(user_id, deque([emotion], maxlen=BOT_EMOTIONS_PER_USER))
+
+
+def user_profile(user_id: int, smile_reason: Optional[str]):
+    """
+    Build a user's matching profile from their smile reason, recent mood
+    entry emotions and emotions the chatbot detected.
+    """
+    since = datetime.utcnow() - timedelta(days=PROFILE_MOOD_DAYS)
+    mood_emotions = []
+    for emotions, in db.session.query(MoodEntry.emotions).filter(
+        MoodEntry.user_id == user_id,
+        MoodEntry.timestamp >= since
+    ).order_by(MoodEntry.timestamp.desc()).limit(PROFILE_MOOD_ENTRIES):
+        if isinstance(emotions, list):
+            mood_emotions.extend(emotions)
+
+    return profile_terms(smile_reason, mood_emotions, list(bot_emotions.get(user_id, ())))
@@ -2,12 +2,14 @@ import React, { useEffect, useState } from 'react';
 import PropTypes from 'prop-types'; // For type-checking props
 import axios from 'axios';
 import './BlogDetailsPage.css';
-import { useLocation } from 'react-router-dom';
+import { useLocation, useParams } from 'react-router-dom';
 import NavAfterLogin from './NavAfterLogin';
 
 const BlogDetailsPage = () => {
     const location=useLocation();
-    const { blog } = location.state || {}
+    const { blogId } = useParams();
+    // The listing only carries an excerpt; full content is loaded here
+    const [blog, setBlog] = useState((location.state || {}).blog || null);
     const [comments, setComments] = useState([]);
     const [likeCount, setLikeCount] = useState(0);
     const [dislikeCount, setDislikeCount] = useState(0);
@@ -15,13 +17,22 @@ const BlogDetailsPage = () => {
     console.log(blog);
 
     useEffect(() => {
-        // If there is logic to update the comments or actions dynamically, it can be handled here.
+        const fetchBlog = async () => {
+            try {
+                const response = await axios.get(`http://localhost:8000/blogs/${blogId}`);
+                setBlog(response.data);
+            } catch (error) {
+                console.error('Error fetching blog:', error);
+            }
+        };
+
+        fetchBlog();
         fetchComments();
-    }, [blog]);
+    }, [blogId]);
 
     const handleLike = async () => {
         try {
-            await axios.post(`http://localhost:8000/blogs/${blog.blog_id}/like`);
+            await axios.post(`http://localhost:8000/blogs/${blogId}/like`);
             setLikeCount(prev => prev + 1);
         } catch (error) {
             console.error('Error liking blog:', error);
@@ -32,7 +43,7 @@ const BlogDetailsPage = () => {
     // Handle dislike button click
     const handleDislike = async () => {
         try {
-            await axios.post(`http://localhost:8000/blogs/${blog.blog_id}/dislike`);
+            await axios.post(`http://localhost:8000/blogs/${blogId}/dislike`);
             setDislikeCount(prev => prev + 1);
         } catch (error) {
             console.error('Error disliking blog:', error);
@@ -41,8 +52,11 @@ const BlogDetailsPage = () => {
     };
     const fetchComments = async () => {
         try {
-            const response = await axios.get(`http://localhost:8000/blogs/${blog.blog_id}/comments`);
-            setComments(response.data || []); // Ensure comments is always an array
+            const response = await axios.get(`http://localhost:8000/blogs/${blogId}/comments`);
+            const page = response.data || {};
+            setComments(page.comments || []); // Ensure comments is always an array
+            setLikeCount(page.likes || 0);
+            setDislikeCount(page.dislikes || 0);
         } catch (error) {
             console.error('Error fetching comments:', error);
         }
@@ -51,10 +65,10 @@ const BlogDetailsPage = () => {
     const handleCommentSubmit = async () => {
         if (newComment.trim() === '') return; // Avoid empty comments
         try {
-            const response = await axios.post(`http://localhost:8000/blogs/${blog.blog_id}/comments`, {
+            const response = await axios.post(`http://localhost:8000/blogs/${blogId}/comments`, {
                 content: newComment,
             });
-            setComments((prevComments) => [...prevComments, response.data]); // Add new comment to the list
+            setComments((prevComments) => [response.data.comment, ...prevComments]); // Newest comments come first
             setNewComment(''); // Clear the input field
         } catch (error) {
             console.error('Error posting comment:', error);
@@ -69,7 +83,7 @@ const BlogDetailsPage = () => {
         <div className="blog-details-container">
             <NavAfterLogin />
             <h1 className="blog-title">{blog.title}</h1>
-            <p className="blog-content">{blog.content}</p>
+            <p className="blog-content">{blog.content || blog.excerpt}</p>
             <div className="blog-actions">
                 <button className="like-button" onClick={handleLike}>
                     👍 Like ({likeCount})
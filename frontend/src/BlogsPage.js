@@ -6,21 +6,26 @@ import NavAfterLogin from './NavAfterLogin';
 
 const BlogsPage = () => {
     const [blogs, setBlogs] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const navigate = useNavigate();
     const [likes,setLikes] = useState(2);
     const [dislikes,setDislikes] = useState(0);
 
-    useEffect(() => {
-        const fetchBlogs = async () => {
-            try {
-                const response = await axios.get("http://localhost:8000/blogs");
-                console.log('API Response:', response.data); // Debug the response
-                setBlogs(response.data || []); // Ensure blogs is always an array
-            } catch (error) {
-                console.error('Error fetching blogs:', error);
-            }
-        };
+    // Fetch one page of blogs; pass the cursor of the previous page to load more
+    const fetchBlogs = async (cursor = null) => {
+        try {
+            const response = await axios.get("http://localhost:8000/blogs", {
+                params: cursor ? { cursor } : {}
+            });
+            const page = response.data || {};
+            setBlogs(prevBlogs => cursor ? [...prevBlogs, ...(page.blogs || [])] : (page.blogs || []));
+            setNextCursor(page.next_cursor || null);
+        } catch (error) {
+            console.error('Error fetching blogs:', error);
+        }
+    };
 
+    useEffect(() => {
         fetchBlogs();
     }, []);
 
@@ -60,14 +65,6 @@ const BlogsPage = () => {
         }
     };
 
-    // Function to truncate content
-    const truncateContent = (content, length = 100) => {
-        if (content.length > length) {
-            return content.substring(0, length) + '...';
-        }
-        return content;
-    };
-
     return (
         <div className="Blogs-container">
             <NavAfterLogin />
@@ -95,7 +92,8 @@ const BlogsPage = () => {
                                 </a>
                             </h3>
                             <h2 className="blog-title">{blog.title}</h2>
-                            <p className="blog-content">{truncateContent(blog.content)}</p>
+                            <p className="blog-content">{blog.excerpt}</p>
+                            <p className="blog-reading-time">{blog.reading_time} min read</p>
                             <div className="blog-meta">
                                 <span className="meta-item">
                                     Likes: <span onClick={(e) => { handleLike(blog.blog_id); e.stopPropagation(); }}>👍</span>
@@ -107,6 +105,11 @@ const BlogsPage = () => {
                         </div>
                     ))
                 )}
+                {nextCursor && (
+                    <button className="load-more-button" onClick={() => fetchBlogs(nextCursor)}>
+                        Load more
+                    </button>
+                )}
             </div>
         </div>
     );
@@ -16,7 +16,7 @@ const CommentsPage = () => {
             try {
                 const response = await axios.get(`http://localhost:8000/blogs/${blogId}/comments`);
                 console.log(response.data)
-                setComments(response.data || []);
+                setComments((response.data || {}).comments || []);
             } catch (error) {
                 console.error('Error fetching comments:', error);
                 setComments([])
@@ -44,7 +44,7 @@ const CommentsPage = () => {
             },{headers:{"Content-Type" : "application/json"},withCredentials:true});
 
             // Update the comments list with the new comment
-            setComments(prevComments => [...prevComments, response.data.content]);
+            setComments(prevComments => [response.data.comment, ...prevComments]);
             setNewComment('');
             setImageURL('');
         } catch (error) {
@@ -13,8 +13,7 @@ const BlogsPage = () => {
             try {
                 const response = await axios.get("http://localhost:8000/blogs");
                 console.log('API Response:', response.data); // Debug the response
-                setBlogs(response.data || []); // Ensure blogs is always an array
-                // setBlogs(response.data.blogs_list);
+                setBlogs((response.data || {}).blogs || []); // Ensure blogs is always an array
             } catch (error) {
                 console.error('Error fetching blogs:', error);
             }
@@ -46,7 +45,7 @@ const BlogsPage = () => {
                                 </a> */}
                             </h3>
                             <h2 className="blog-title">{blog.title}</h2>
-                            <p className="blog-content">{blog.content}</p>
+                            <p className="blog-content">{blog.excerpt}</p>
                             <div className="blog-meta">
                                 <span>Likes: {blog.likes}</span>
                                 <span>Dislikes: {blog.dislikes}</span>
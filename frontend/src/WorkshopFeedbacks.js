@@ -7,28 +7,38 @@ const FeedbacksPage = () => {
   const { workshopId } = useParams();
   const [feedbacks, setFeedbacks] = useState([]);
   const [workshopTitle, setWorkshopTitle] = useState("");
+  const [histogram, setHistogram] = useState({});
+  const [ratingCount, setRatingCount] = useState(0);
+  const [averageRating, setAverageRating] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const navigate = useNavigate();
 
-  useEffect(() => {
-    const fetchFeedbacks = async () => {
-      try {
-        const response = await axios.get(`http://localhost:8000/workshops/feedback/${workshopId}`, {
-          headers: { "Content-Type": "application/json" },
-          withCredentials: true,
-        });
-        setWorkshopTitle(response.data.workshop_title);
-        setFeedbacks(response.data.feedback);
-      } catch (err) {
-        setError("Failed to load feedback. Please try again later.");
-        console.error(err);
-      } finally {
-        setLoading(false);
-      }
-    };
+  const fetchFeedbacks = async (cursor = null) => {
+    try {
+      const response = await axios.get(`http://localhost:8000/workshops/${workshopId}/feedback`, {
+        params: cursor ? { cursor } : {},
+        headers: { "Content-Type": "application/json" },
+        withCredentials: true,
+      });
+      setWorkshopTitle(response.data.workshop_title);
+      setHistogram(response.data.histogram);
+      setRatingCount(response.data.rating_count);
+      setAverageRating(response.data.average_rating);
+      setFeedbacks((previous) => (cursor ? [...previous, ...response.data.feedback] : response.data.feedback));
+      setNextCursor(response.data.next_cursor);
+    } catch (err) {
+      setError("Failed to load feedback. Please try again later.");
+      console.error(err);
+    } finally {
+      setLoading(false);
+    }
+  };
 
+  useEffect(() => {
     fetchFeedbacks();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [workshopId]);
 
   if (loading) {
@@ -42,12 +52,31 @@ const FeedbacksPage = () => {
   return (
     <div className="feedbacks-container">
       <h1 className="header">{workshopTitle}</h1>
+      {ratingCount > 0 && (
+        <div className="rating-summary">
+          <p className="rating-average">
+            {averageRating.toFixed(1)}/5 from {ratingCount} {ratingCount === 1 ? "rating" : "ratings"}
+          </p>
+          {[5, 4, 3, 2, 1].map((stars) => (
+            <div key={stars} className="histogram-row">
+              <span className="histogram-label">{stars}★</span>
+              <div className="histogram-bar">
+                <div
+                  className="histogram-fill"
+                  style={{ width: `${((histogram[stars] || 0) / ratingCount) * 100}%` }}
+                />
+              </div>
+              <span className="histogram-count">{histogram[stars] || 0}</span>
+            </div>
+          ))}
+        </div>
+      )}
       <div className="feedback-list">
         {feedbacks.length === 0 ? (
           <p className="no-feedback-message">No feedback available for this workshop.</p>
         ) : (
-          feedbacks.map((feedback, index) => (
-            <div key={index} className="feedback-card">
+          feedbacks.map((feedback) => (
+            <div key={feedback.id} className="feedback-card">
               <p className="feedback-user">
                 <strong>User:</strong> {feedback.user}
               </p>
@@ -64,6 +93,11 @@ const FeedbacksPage = () => {
           ))
         )}
       </div>
+      {nextCursor && (
+        <button onClick={() => fetchFeedbacks(nextCursor)} className="load-more-btn">
+          Load more
+        </button>
+      )}
       <button onClick={() => navigate(`/workshops/${workshopId}/add-feedback`)} className="add-feedback-btn">
         Add Feedback
       </button>